@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+from bigbuy.fake_server import FakeBigBuyServer
+
+# Override with e.g. BENCHMARK_CATALOG_SIZE=100000 to benchmark at production scale
+CATALOG_SIZE = int(os.environ.get("BENCHMARK_CATALOG_SIZE", "5000"))
+LATENCY = float(os.environ.get("BENCHMARK_LATENCY", "0"))
+
+
+@pytest.fixture(scope="session")
+def fake_server():
+    with FakeBigBuyServer(catalog_size=CATALOG_SIZE, latency=LATENCY, purse_amount=1e12) as server:
+        yield server
+
+
+@pytest.fixture()
+def client(fake_server):
+    bb = fake_server.client()
+    yield bb
+    bb.close()
@@ -0,0 +1,83 @@
+"""
+End-to-end benchmarks of the client against the local fake server.
+
+Run with ``poetry run pytest benchmarks/``. Use ``--benchmark-autosave`` and ``--benchmark-compare`` to compare
+against a previous run.
+"""
+import itertools
+
+BULK_LANGUAGE_METHODS = ("get_products_information", "get_products_tags", "get_attributes", "get_attribute_groups",
+                         "get_tags", "get_taxonomies")
+BULK_METHODS = ("get_products", "get_products_prices", "get_products_images", "get_products_categories",
+                "get_products_stock_by_handling_days", "get_products_variations",
+                "get_products_variations_stock_by_handling_days", "get_product_variations_prices",
+                "get_variations", "get_manufacturers")
+PAGE_SIZE = 1000
+
+_order_references = itertools.count()
+
+
+def _fetch_all_pages(method, **params):
+    records = []
+    for page in itertools.count():
+        page_records = method(pageSize=PAGE_SIZE, page=page, **params)
+        records.extend(page_records)
+        if len(page_records) < PAGE_SIZE:
+            return records
+
+
+def test_full_sync(benchmark, client):
+    languages = [language["isoCode"] for language in client.get_languages()]
+
+    def full_sync():
+        count = 0
+        for name in BULK_METHODS:
+            count += len(_fetch_all_pages(getattr(client, name)))
+        for name in BULK_LANGUAGE_METHODS:
+            for iso_code in languages:
+                count += len(_fetch_all_pages(getattr(client, name), isoCode=iso_code))
+        return count
+
+    assert benchmark(full_sync) > 0
+
+
+def test_order_flow(benchmark, client, fake_server):
+    products = [p for p in client.get_products(pageSize=100, page=0)
+                if fake_server.catalog.stocks[p["id"]][0]["warehouse"] == 1]
+
+    def order_flow():
+        order = {
+            "internalReference": f"bench-{next(_order_references)}",
+            "language": "es",
+            "paymentMethod": "moneybox",
+            "carriers": [{"name": "chrono"}],
+            "shippingAddress": {"firstName": "John", "lastName": "Doe", "country": "ES", "postcode": "46005",
+                                "town": "Valencia", "address": "C/ Altea", "phone": "664869570",
+                                "email": "john@email.com", "comment": ""},
+            "products": [{"reference": product["sku"], "quantity": 1} for product in products[:3]],
+        }
+        client.check_order(order)
+        order_id = client.create_order_id(order)
+        return client.get_order_by_id(order_id)
+
+    assert benchmark(order_flow)["id"]
+
+
+def test_tracking(benchmark, client, fake_server):
+    product = next(p for p in client.get_products(pageSize=100, page=0)
+                   if fake_server.catalog.stocks[p["id"]][0]["warehouse"] == 1)
+    order_ids = []
+    for _ in range(100):
+        order_ids.append(client.create_order_id({
+            "internalReference": f"bench-tracking-{next(_order_references)}",
+            "shippingAddress": {"country": "ES", "postcode": "46005"},
+            "products": [{"reference": product["sku"], "quantity": 1}],
+        }))
+
+    def tracking():
+        trackings = client.get_tracking_orders(order_ids)
+        for order_id in order_ids[:10]:
+            client.get_tracking_order(order_id)
+        return trackings
+
+    assert all(benchmark(tracking))
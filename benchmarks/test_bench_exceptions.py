@@ -0,0 +1,80 @@
+"""
+Micro-benchmarks of ``raise_for_response`` over a corpus of real-world BigBuy responses.
+
+Run with ``poetry run pytest benchmarks/test_bench_exceptions.py``.
+"""
+import json
+
+import pytest
+from requests import Response
+
+from bigbuy import exceptions as ex
+from bigbuy.fake_server import ERROR_PAGES
+
+_VALIDATION_ERRORS = {
+    "code": 400,
+    "message": "ERROR: This value is not valid.\\n",
+    "errors": {
+        "errors": ["This value is not valid."],
+        "children": {
+            "internalReference": [], "cashOnDelivery": [], "language": [], "paymentMethod": [],
+            "shippingAddress": {"children": {"firstName": [], "lastName": {"errors": ["This value is too long."]},
+                                             "country": [], "postcode": [], "town": [], "address": [], "phone": [],
+                                             "email": [], "comment": [], "vatNumber": [], "companyName": []}},
+            "carriers": [], "products": [], "dateAdd": [],
+        }
+    }
+}
+
+# (name, status, body, expected exception class)
+CORPUS: list[tuple[str, int, str, type[ex.BBResponseError]]] = [
+    ("rate_limit", 429, "You exceeded the rate limit", ex.BBRateLimitError),
+    *((f"html_{status}", status, body, ex.BBServerError if status < 503 else ex.BBTimeoutError)
+      for status, body in ERROR_PAGES),
+    ("idle_timeout", 504, "Idle timeout reached for \"https://api.bigbuy.eu/rest/order/create.json\"",
+     ex.BBTimeoutError),
+    ("not_found", 404, json.dumps({"code": 404, "message": "Product not found"}), ex.BBResponseError),
+    ("stock", 409, json.dumps({"code": "ER003", "message": json.dumps(
+        {"info": "Stock error.", "data": {"skus": ["S0123456"]}})}), ex.BBStockError),
+    ("products_error", 409, json.dumps({"code": 409, "message": json.dumps(
+        {"info": "Products error.", "data": [{"sku": "S5001344", "message": "Inactive product."}]})}),
+     ex.BBProductError),
+    ("warehouse_split", 409, json.dumps({
+        "code": 409, "message": "This cart contains products from different warehouses.",
+        "error_detail": {"warehouses": [{"id": 1, "references": ["59430878"]}, {"id": 3, "references": ["S7106"]}]},
+    }), ex.BBWarehouseSplitError),
+    ("validation", 400, json.dumps(_VALIDATION_ERRORS), ex.BBValidationError),
+    ("inverted_code", 400, json.dumps({"code": "Bad request", "message": 400}), ex.BBResponseError),
+    ("soft_409", 200, json.dumps({"code": 409, "message": "Something went wrong 56783360c34fff84fe56880fbf62179b"}),
+     ex.BBResponseError),
+    ("embedded_500", 200, 'HTTP/1.0 500 Internal Server Error\r\nContent-Type:  application/json\r\n\r\n'
+                          '{"error":"Information is not available right now. Try it again later"}', ex.BBServerError),
+]
+
+
+def _response(status: int, body: str) -> Response:
+    response = Response()
+    response.status_code = status
+    response.encoding = "utf-8"
+    response._content = body.encode("utf-8")
+    return response
+
+
+@pytest.mark.parametrize("name,status,body,error_class", CORPUS, ids=[case[0] for case in CORPUS])
+def test_errors(benchmark, name, status, body, error_class):
+    def classify():
+        try:
+            ex.raise_for_response(_response(status, body))
+        except ex.BBResponseError as e:
+            return e
+        return None
+
+    assert type(benchmark(classify)) is error_class
+
+
+@pytest.mark.parametrize("size", [1, 1000])
+def test_success(benchmark, size):
+    body = json.dumps([{"id": i, "sku": f"S{i:07}", "name": "Something went right", "isoCode": "en"}
+                       for i in range(size)])
+    response = _response(200, body)
+    assert benchmark(ex.raise_for_response, response) is None
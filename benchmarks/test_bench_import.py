@@ -0,0 +1,25 @@
+"""
+Benchmark of the cold import of the package, in a new interpreter each time.
+
+Run with ``poetry run pytest benchmarks/test_bench_import.py``.
+"""
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize("statement", [
+    "import bigbuy",
+    "from bigbuy import BBError",
+    "from bigbuy import BigBuy",
+])
+def test_import(benchmark, statement):
+    benchmark.pedantic(subprocess.run, args=([sys.executable, "-c", statement],), kwargs={"check": True},
+                       rounds=10, warmup_rounds=1)
+
+
+def test_python(benchmark):
+    # Baseline: startup of the interpreter alone
+    benchmark.pedantic(subprocess.run, args=([sys.executable, "-c", "pass"],), kwargs={"check": True},
+                       rounds=10, warmup_rounds=1)
@@ -7,31 +7,94 @@ Bigbuy is a library for Python that wraps the BigBuy API.
 
 __author__ = 'Bixoto <tech@bixoto.com>'
 
-from .api import BigBuy
-from .exceptions import (
-    BBError, BBResponseError, BBPackError, BBExportError, BBProductError, BBStockError,
-    BBNoCarrierError, BBBankWireTooLowError, BBMoneyBoxTooLowError, BBTemporaryOrderError, BBOrderAlreadyExistsError,
-    BBOrderTooLowError, BBIncorrectRefError, BBInvalidPaymentError, BBZipcodeFormatError, BBProductNotFoundError,
-    BBServerError, BBRateLimitError, BBValidationError, BBWarehouseSplitError, BBShippingError, BBTimeoutError,
-)
-from .rate_limit import RateLimit
-from .types import (
-    BBAttributeDict, BBAttributeGroupDict, BBImageDict, BBCheckOrderDict, BBLanguageDict, BBLowestShippingCostDict,
-    BBTaxonomyDict, BBTrackingCarrierDict, BBProductImagesDict, BBProductTaxonomyDict, BBManufacturerDict,
-    BBProductDict, BBProductCategoryDict, BBProductInformationDict, BBOrderStatusDict, BBProductComplianceDict,
-    BBProductPriceDict, BBStockByHandlingDaysDict, BBProductStockByHandlingDaysDict, BBProductTagDict, BBTagDict,
-    BBPriceLargeQuantitiesDict, BBProductVariationDict, BBShippingServiceDict, BBCarrierDict, BBIntIdDict,
-    BBVariationDict,
-    BBSplitCheckOrderDict, BBMultiCheckOrderDict, BBOrderCarrierDict, BBOrderProductDict, BBOrderDict, BBSlimOrderDict,
-    BBOrderDeliveryNoteDict, BBReferenceQuantityDict, BBStrIdDict, BBTrackingDict, BBTrackingOrderDict,
-)
+import importlib
+from typing import Any, TYPE_CHECKING
+
 from .version import __version__
 
+if TYPE_CHECKING:
+    from .api import BigBuy
+    from .compression import CompressionPolicy
+    from .connections import ConnectionPolicy
+    from .exceptions import (
+        BBError, BBResponseError, BBPackError, BBExportError, BBProductError, BBStockError,
+        BBNoCarrierError, BBBankWireTooLowError, BBMoneyBoxTooLowError, BBTemporaryOrderError,
+        BBOrderAlreadyExistsError, BBOrderTooLowError, BBIncorrectRefError, BBInvalidPaymentError, BBZipcodeFormatError,
+        BBProductNotFoundError, BBServerError, BBRateLimitError, BBValidationError, BBWarehouseSplitError,
+        BBShippingError, BBTimeoutError, BBCircuitOpenError, BBDeadlineExceededError, BBOrderValidationError,
+        BBInsufficientPurseError,
+    )
+    from .hedging import HedgingPolicy
+    from .pool import BigBuyPool
+    from .rate_limit import RateLimit, RateLimiter
+    from .scheduler import PriorityScheduler
+    from .resilience import ResiliencePolicy, Backoff, RetryBudget, CircuitBreaker, Deadline
+    from .types import (
+        BBAttributeDict, BBAttributeGroupDict, BBImageDict, BBCheckOrderDict, BBLanguageDict,
+        BBLowestShippingCostDict, BBTaxonomyDict, BBTrackingCarrierDict, BBProductImagesDict, BBProductTaxonomyDict,
+        BBManufacturerDict, BBProductDict, BBProductCategoryDict, BBProductInformationDict, BBOrderStatusDict,
+        BBProductComplianceDict, BBProductPriceDict, BBStockByHandlingDaysDict, BBProductStockByHandlingDaysDict,
+        BBProductTagDict, BBTagDict, BBPriceLargeQuantitiesDict, BBProductVariationDict, BBShippingServiceDict,
+        BBCarrierDict, BBIntIdDict, BBVariationDict, BBSplitCheckOrderDict, BBMultiCheckOrderDict, BBOrderCarrierDict,
+        BBOrderProductDict, BBOrderDict, BBSlimOrderDict, BBOrderDeliveryNoteDict, BBReferenceQuantityDict,
+        BBStrIdDict, BBTrackingDict, BBTrackingOrderDict,
+    )
+
+# Public names by submodule. They are imported on first access by __getattr__, so that ``import bigbuy`` doesn't load
+# requests and the other dependencies of the client until they are needed.
+_LAZY_IMPORTS: dict[str, tuple[str, ...]] = {
+    ".api": ("BigBuy",),
+    ".compression": ("CompressionPolicy",),
+    ".connections": ("ConnectionPolicy",),
+    ".exceptions": (
+        "BBError", "BBResponseError", "BBPackError", "BBExportError", "BBProductError", "BBStockError",
+        "BBNoCarrierError", "BBBankWireTooLowError", "BBMoneyBoxTooLowError", "BBTemporaryOrderError",
+        "BBOrderAlreadyExistsError", "BBOrderTooLowError", "BBIncorrectRefError", "BBInvalidPaymentError",
+        "BBZipcodeFormatError", "BBProductNotFoundError", "BBServerError", "BBRateLimitError", "BBValidationError",
+        "BBWarehouseSplitError", "BBShippingError", "BBTimeoutError", "BBCircuitOpenError", "BBDeadlineExceededError",
+        "BBOrderValidationError", "BBInsufficientPurseError",
+    ),
+    ".hedging": ("HedgingPolicy",),
+    ".pool": ("BigBuyPool",),
+    ".rate_limit": ("RateLimit", "RateLimiter"),
+    ".scheduler": ("PriorityScheduler",),
+    ".resilience": ("ResiliencePolicy", "Backoff", "RetryBudget", "CircuitBreaker", "Deadline"),
+    ".types": (
+        "BBAttributeDict", "BBAttributeGroupDict", "BBImageDict", "BBCheckOrderDict", "BBLanguageDict",
+        "BBLowestShippingCostDict", "BBTaxonomyDict", "BBTrackingCarrierDict", "BBProductImagesDict",
+        "BBProductTaxonomyDict", "BBManufacturerDict", "BBProductDict", "BBProductCategoryDict",
+        "BBProductInformationDict", "BBOrderStatusDict", "BBProductComplianceDict", "BBProductPriceDict",
+        "BBStockByHandlingDaysDict", "BBProductStockByHandlingDaysDict", "BBProductTagDict", "BBTagDict",
+        "BBPriceLargeQuantitiesDict", "BBProductVariationDict", "BBShippingServiceDict", "BBCarrierDict", "BBIntIdDict",
+        "BBVariationDict", "BBSplitCheckOrderDict", "BBMultiCheckOrderDict", "BBOrderCarrierDict", "BBOrderProductDict",
+        "BBOrderDict", "BBSlimOrderDict", "BBOrderDeliveryNoteDict", "BBReferenceQuantityDict", "BBStrIdDict",
+        "BBTrackingDict", "BBTrackingOrderDict",
+    ),
+}
+_LAZY_MODULES = {name: module for module, names in _LAZY_IMPORTS.items() for name in names}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    # Cache it so that __getattr__ isn't called again for this name
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_MODULES})
+
+
 __all__ = (
     "__author__",
     "__version__",
 
     "BigBuy",
+    "BigBuyPool",
     "BBError",
     "BBResponseError",
     "BBPackError",
@@ -54,7 +117,21 @@ __all__ = (
     "BBWarehouseSplitError",
     "BBShippingError",
     "BBTimeoutError",
+    "BBCircuitOpenError",
+    "BBDeadlineExceededError",
+    "BBOrderValidationError",
+    "BBInsufficientPurseError",
     "RateLimit",
+    "RateLimiter",
+    "HedgingPolicy",
+    "ConnectionPolicy",
+    "CompressionPolicy",
+    "PriorityScheduler",
+    "ResiliencePolicy",
+    "Backoff",
+    "RetryBudget",
+    "CircuitBreaker",
+    "Deadline",
 
     "BBAttributeDict",
     "BBAttributeGroupDict",
@@ -1,15 +1,27 @@
 """
 The official documentation for Bigbuy API endpoints can be found at: https://api.bigbuy.eu/rest/doc/
 """
+import functools
+import random
+import time
 from http.cookiejar import DefaultCookiePolicy
 from typing import Optional, Union, Iterable, cast, Any
 
 import requests
 from api_session import APISession, JSONDict
-from urllib3 import Retry
-
-from .exceptions import raise_for_response, BBError
-from .rate_limit import RateLimit
+from urllib3 import Retry, HTTPConnectionPool
+
+from .compression import CompressionPolicy
+from .connections import ConnectionPolicy, warm_up_pool
+from .exceptions import raise_for_response, BBError, BBServerError, BBRateLimitError, BBCircuitOpenError, \
+    BBDeadlineExceededError
+from .hooks import HOOK_EVENTS, BEFORE_REQUEST, AFTER_RESPONSE, ON_ERROR, ON_RATE_LIMIT_WAIT, ON_RETRY, Hook, \
+    endpoint_template
+from .hedging import HedgingPolicy
+from .rate_limit import RateLimit, RateLimiter
+from .scheduler import PriorityScheduler, PRIORITY_NORMAL, endpoint_priority
+from .resilience import ResiliencePolicy, CircuitBreaker, Deadline
+from .responses import ResponseView, ResponseLike
 from .version import __version__
 
 __all__ = ['BigBuy']
@@ -30,6 +42,12 @@ class BigBuy(APISession):
                  sandbox: bool = False,
                  retry_on_rate_limit: bool = False,
                  max_retry_on_rate_limit: int = 2,
+                 resilience: Optional[ResiliencePolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 hedging: Optional[HedgingPolicy] = None,
+                 scheduler: Optional[PriorityScheduler] = None,
+                 connections: Optional[ConnectionPolicy] = None,
+                 compression: Optional[CompressionPolicy] = None,
                  **kwargs: Any):
         """Instantiates an instance of BigBuy.
 
@@ -37,7 +55,23 @@ class BigBuy(APISession):
         :param sandbox: if `True`, use the client in sandbox mode.
         :param retry_on_rate_limit:
         :param max_retry_on_rate_limit:
-        """
+        :param resilience: if set, retry failed requests according to this policy instead of the default fixed retry
+          on 5xx statuses. See ``bigbuy.resilience``.
+        :param rate_limiter: if set, wait for a token of this rate-limiter before sending each request. The
+          rate-limiter is paused when the API returns a rate-limit error.
+        :param hedging: if set, hedge ``GET`` requests on latency-critical endpoints. See ``bigbuy.hedging``.
+        :param scheduler: if set, wait for the turn of each request in this scheduler before sending it. Its
+          rate-limiter is used as the rate-limiter of the client. See ``bigbuy.scheduler``.
+        :param connections: if set, size the connection pool of the client according to this policy. See
+          ``bigbuy.connections``.
+        :param compression: if set, accept the encodings of this policy and record the size of the responses before
+          and after decoding. See ``bigbuy.compression``.
+        """
+        if scheduler is not None:
+            if rate_limiter is not None and rate_limiter is not scheduler.rate_limiter:
+                raise ValueError("rate_limiter must be the rate-limiter of the scheduler")
+            rate_limiter = scheduler.rate_limiter
+
         if sandbox:
             base_url = 'https://api.sandbox.bigbuy.eu/rest'
         else:
@@ -47,58 +81,286 @@ class BigBuy(APISession):
         # BigBuy likes returning '200 OK' responses with empty bodies instead of 404s.
         kwargs.setdefault("none_on_empty", True)
 
-        kwargs.setdefault("max_retries", Retry(
-            allowed_methods=self.READ_METHODS,
-            raise_on_status=False,
-            status_forcelist={500, 502, 503, 524},
-        ))
+        if resilience is not None:
+            # Retries are handled by the resilience policy
+            kwargs.setdefault("max_retries", 0)
+        else:
+            kwargs.setdefault("max_retries", Retry(
+                allowed_methods=self.READ_METHODS,
+                raise_on_status=False,
+                status_forcelist={500, 502, 503, 524},
+            ))
 
         super().__init__(base_url, user_agent=f'pyBigBuy v{__version__}', **kwargs)
 
         self.app_key = app_key
         self.retry_on_rate_limit = retry_on_rate_limit
         self.max_retry_on_rate_limit = max_retry_on_rate_limit
+        self.resilience = resilience
+        self.rate_limiter = rate_limiter
+        self.hedging = hedging
+        self.scheduler = scheduler
+        self.connections = connections
+        self.compression = compression
+        if compression is not None:
+            self.headers["Accept-Encoding"] = compression.accept_encoding
+        if connections is not None:
+            adapter = connections.adapter(self.max_retries if self.max_retries is not None else 0)
+            self.mount("https://", adapter)
+            self.mount("http://", adapter)
         self.headers.setdefault('Authorization', f'Bearer {app_key}')
         # Reject all cookies by default. They are not necessary for the API usage (and not documented).
         self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # Lifecycle hooks by event. Events without hooks have no key, so an empty dict means no hooks at all.
+        self.lifecycle_hooks: dict[str, list[Hook]] = {}
 
     def __repr__(self) -> str:
         attrs = f" key={self.app_key[:10]}…" if self.app_key else ""
         return f'<Bigbuy{attrs}>'
 
+    def warm_up(self, connections: Optional[int] = None) -> int:
+        """
+        Open connections to the API in parallel before the first requests, so that they don't pay for the handshakes.
+
+        :param connections: number of connections to open. Default to the ``warm_up`` of the connection policy, or 1.
+        :return: the number of connections opened
+        """
+        if connections is None:
+            connections = self.connections.warm_up if self.connections is not None else 1
+        adapter = self.get_adapter(self.base_url)
+        if not isinstance(adapter, requests.adapters.HTTPAdapter):
+            raise TypeError(f"Can't warm up connections of {adapter!r}")
+
+        # Get the pool the same way requests does, so that the connections are opened in the pool used by requests
+        request = requests.Request("GET", self.base_url).prepare()
+        settings = self.merge_environment_settings(self.base_url, {}, None, None, None)
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            pool = adapter.get_connection_with_tls_context(request, settings["verify"], proxies=settings["proxies"],
+                                                           cert=settings["cert"])
+        else:  # pragma: nocover
+            # requests < 2.32
+            pool = adapter.get_connection(self.base_url, settings["proxies"])
+        return warm_up_pool(cast(HTTPConnectionPool, pool), connections)
+
     def raise_for_response(self, response: requests.Response) -> None:
         return raise_for_response(response)
 
+    def add_hook(self, event: str, hook: Hook) -> None:
+        """
+        Register a lifecycle hook. See ``bigbuy.hooks`` for the list of events and the arguments passed to hooks.
+
+        :param event: event name, e.g. ``"before_request"``
+        :param hook: callable called with keyword arguments
+        """
+        if event not in HOOK_EVENTS:
+            raise ValueError(f"Unknown hook event {event!r}; must be one of {', '.join(HOOK_EVENTS)}")
+
+        self.lifecycle_hooks.setdefault(event, []).append(hook)
+
+    def remove_hook(self, event: str, hook: Hook) -> None:
+        """Remove a lifecycle hook registered with ``add_hook``. Raise ``ValueError`` if it's not registered."""
+        hooks = self.lifecycle_hooks.get(event, [])
+        hooks.remove(hook)
+        if not hooks:
+            del self.lifecycle_hooks[event]
+
+    def dispatch_lifecycle_hook(self, event: str, **kwargs: Any) -> None:
+        """Call all hooks registered for the given event."""
+        for hook in self.lifecycle_hooks.get(event, ()):
+            hook(**kwargs)
+
     def request_api(self, method: str, path: str, *args: Any,
                     throw: Optional[bool] = None,
                     retry_on_rate_limit: Optional[bool] = None,
                     max_retry_on_rate_limit: Optional[int] = None,
+                    deadline: Optional[Union[Deadline, float]] = None,
+                    priority: Optional[str] = None,
                     **kwargs: Any) -> requests.Response:
+        """
+        Call the API. See ``APISession.request_api`` for the common parameters.
+
+        :param throw: if ``True`` (the default), raise a ``BBError`` if the response is an error
+        :param retry_on_rate_limit: override the ``retry_on_rate_limit`` attribute for this call
+        :param max_retry_on_rate_limit: override the ``max_retry_on_rate_limit`` attribute for this call
+        :param deadline: ``Deadline`` or number of seconds after which the call, including its retries, is abandoned
+          with a ``BBDeadlineExceededError``. The timeout of each request is capped to the remaining time.
+        :param priority: priority class of the request for the scheduler. By default, it depends on the endpoint.
+        """
         if retry_on_rate_limit is None:
             retry_on_rate_limit = self.retry_on_rate_limit
 
         if max_retry_on_rate_limit is None:
             max_retry_on_rate_limit = self.max_retry_on_rate_limit
 
-        r = super().request_api(method, f'/{path}.json', *args,
-                                # We handle 'throw' by ourselves
-                                throw=False,
-                                **kwargs)
-
-        if retry_on_rate_limit and max_retry_on_rate_limit > 0:
-            if rate_limit := RateLimit.from_response(r):
-                rate_limit.wait_until_expiration()
-                # Retry after waiting for the rate-limit to expire
-                return self.request_api(method, path, *args,
-                                        throw=throw,
-                                        retry_on_rate_limit=retry_on_rate_limit,
-                                        max_retry_on_rate_limit=max_retry_on_rate_limit - 1,
-                                        **kwargs)
-
         # throw=None == default behavior (True)
-        if throw is True or throw is None:
-            self.raise_for_response(r)
+        throw = throw is True or throw is None
+
+        resilience = self.resilience
+        hooks = bool(self.lifecycle_hooks)
+        # Don't compute the endpoint template if nothing uses it
+        endpoint = endpoint_template(path) \
+            if hooks or resilience is not None or self.hedging is not None or self.scheduler is not None else path
+
+        if priority is None and self.scheduler is not None:
+            priority = endpoint_priority(method, endpoint)
+
+        if deadline is not None:
+            deadline = Deadline.coerce(deadline)
+
+        breaker: Optional[CircuitBreaker] = None
+        retryable = False
+        if resilience is not None:
+            breaker = resilience.circuit_breaker(endpoint)
+            retryable = method.upper() in self.READ_METHODS
+            if resilience.budget is not None:
+                resilience.budget.record_request()
+
+        rate_limit_attempts = 0
+        attempt = 0
+        r: Optional[requests.Response] = None
+        error: Optional[Exception] = None
+
+        # The breaker is checked once per call: a retry must not count as another half-open trial
+        if breaker is not None and not breaker.allow():
+            r, error = None, BBCircuitOpenError(endpoint, breaker.retry_after())
+            if hooks:
+                self.dispatch_lifecycle_hook(ON_ERROR, method=method, endpoint=endpoint, error=error)
+            raise error
+
+        # ``True`` if this call is the trial of a half-open breaker and its outcome is not recorded yet
+        trial = breaker is not None and breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            while True:
+                if deadline is not None:
+                    remaining = deadline.remaining()
+                    if remaining <= 0:
+                        r, error = None, BBDeadlineExceededError(f"Deadline exceeded for {method.upper()} {endpoint}")
+                        break
+                    timeout = kwargs.get("timeout", self.timeout)
+                    if isinstance(timeout, tuple):
+                        # (connect, read) timeouts
+                        kwargs["timeout"] = tuple(remaining if t is None or t > remaining else t for t in timeout)
+                    elif timeout is None or (isinstance(timeout, (int, float)) and timeout > remaining):
+                        kwargs["timeout"] = remaining
+
+                r = error = None
+                try:
+                    r = self._send_api_request(method, path, endpoint, hooks, priority, *args, **kwargs)
+                except requests.RequestException as e:
+                    if resilience is None or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                        if hooks:
+                            self.dispatch_lifecycle_hook(ON_ERROR, method=method, endpoint=endpoint, error=e)
+                        raise
+                    error = e
+
+                if r is not None and retry_on_rate_limit and rate_limit_attempts < max_retry_on_rate_limit:
+                    if rate_limit := RateLimit.from_response(r):
+                        wait_seconds = max(0.0, rate_limit.reset_timedelta().total_seconds())
+                        if resilience is not None and resilience.rate_limit_jitter:
+                            wait_seconds += random.uniform(0, resilience.rate_limit_jitter)
+
+                        if deadline is None or wait_seconds < deadline.remaining():
+                            rate_limit_attempts += 1
+                            if hooks:
+                                self.dispatch_lifecycle_hook(ON_RATE_LIMIT_WAIT, method=method, endpoint=endpoint,
+                                                             rate_limit=rate_limit, wait_seconds=wait_seconds)
+                            time.sleep(wait_seconds)
+                            # Retry after waiting for the rate-limit to expire
+                            if hooks:
+                                self.dispatch_lifecycle_hook(ON_RETRY, method=method, endpoint=endpoint,
+                                                             attempt=rate_limit_attempts + attempt, reason="rate_limit")
+                            continue
+
+                if resilience is None:
+                    break
+
+                if r is not None:
+                    try:
+                        self.raise_for_response(r)
+                    except BBError as e:
+                        error = e
+
+                if not isinstance(error, (BBServerError, requests.ConnectionError, requests.Timeout)):
+                    # A rate-limited response says nothing about the health of the endpoint: it's not recorded, and a
+                    # half-open trial is released in the ``finally`` below
+                    if breaker is not None and not isinstance(error, BBRateLimitError):
+                        breaker.record_success()
+                        trial = False
+                    break
+
+                if breaker is not None:
+                    breaker.record_failure()
+                    trial = False
+                    if breaker.state == CircuitBreaker.OPEN:
+                        break
+
+                if not retryable or attempt >= resilience.max_retries:
+                    break
+
+                delay = resilience.backoff.delay(attempt + 1)
+                if deadline is not None and delay >= deadline.remaining():
+                    break
+                if resilience.budget is not None and not resilience.budget.try_retry():
+                    break
+
+                attempt += 1
+                if hooks:
+                    reason = "server_error" if isinstance(error, BBError) else "connection_error"
+                    self.dispatch_lifecycle_hook(ON_RETRY, method=method, endpoint=endpoint,
+                                                 attempt=rate_limit_attempts + attempt, reason=reason)
+                time.sleep(delay)
+        finally:
+            if trial:
+                # e.g. deadline exceeded or an unexpected error: let another call try
+                assert breaker is not None
+                breaker.release_trial()
+
+        if r is None or (resilience is not None and error is not None and throw):
+            assert error is not None
+            if hooks:
+                self.dispatch_lifecycle_hook(ON_ERROR, method=method, endpoint=endpoint, error=error)
+            raise error
+
+        if resilience is None and throw:
+            try:
+                self.raise_for_response(r)
+            except BBError as e:
+                if hooks:
+                    self.dispatch_lifecycle_hook(ON_ERROR, method=method, endpoint=endpoint, error=e)
+                raise
+
+        return r
+
+    def _send_api_request(self, method: str, path: str, endpoint: str, hooks: bool, priority: Optional[str],
+                          *args: Any, **kwargs: Any) -> requests.Response:
+        # We handle 'throw' by ourselves
+        send = functools.partial(super().request_api, method, f'/{path}.json', *args, throw=False, **kwargs)
+        rate_limiter = self.rate_limiter
+        hedging = self.hedging
+
+        if hooks:
+            self.dispatch_lifecycle_hook(BEFORE_REQUEST, method=method, endpoint=endpoint)
+            start = time.perf_counter()
+
+        if self.scheduler is not None:
+            self.scheduler.acquire(priority or PRIORITY_NORMAL)
+        elif rate_limiter is not None:
+            rate_limiter.acquire()
+
+        if hedging is not None and endpoint in hedging.endpoints and method.upper() == "GET":
+            r = hedging.call(endpoint, send, rate_limiter.try_acquire if rate_limiter is not None else lambda: True)
+        else:
+            r = send()
+
+        if rate_limiter is not None and (rate_limit := RateLimit.from_response(r)):
+            rate_limiter.pause_for_rate_limit(rate_limit)
+
+        if self.compression is not None:
+            self.compression.stats.record(endpoint, r)
 
+        if hooks:
+            self.dispatch_lifecycle_hook(AFTER_RESPONSE, method=method, endpoint=endpoint, response=r,
+                                         elapsed=time.perf_counter() - start)
         return r
 
     # catalog
@@ -447,7 +709,9 @@ class BigBuy(APISession):
 
     def create_order_id(self, order: dict[str, Any], **params: Any) -> str:
         """Like create_order(), but return the order id."""
-        response = self.create_order(order, **params)
+        # Only keep the Location header of the response
+        response = ResponseView.from_response(self.create_order(order, **params), headers=("Location",),
+                                              content=False)
         # Format:
         # {
         #     'Content-Length': '0',
@@ -640,5 +904,5 @@ class BigBuy(APISession):
         return self.get_json_api("user/auth/status", **params)
 
 
-def _get_order_id_from_response_redirect(response: requests.Response) -> str:
+def _get_order_id_from_response_redirect(response: ResponseLike) -> str:
     return response.headers["Location"].replace("/rest/order/", "")
@@ -0,0 +1,217 @@
+"""
+bigbuy.changes
+~~~~~~~~~~~~~~
+
+Change detection between successive catalog syncs.
+
+Usage::
+
+    detector = ChangeDetector.load("fingerprints.json")  # or ChangeDetector() the first time
+    for event in detector.detect(client.get_products(), source="products"):
+        if event.type == PRICE_CHANGED:
+            update_price(event.key, event.values)
+    detector.save("fingerprints.json")
+
+The detector doesn't keep the records of the previous sync but only fingerprints: one 8-byte hash per record and one
+per field. Its memory thus depends on the number of records, not on the size of their values, and records can be
+streamed from the API or from the pages of a ``CatalogSyncJob``. Changed fields are grouped by event: price, stock,
+description, images and other fields.
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Optional, Any, Callable, Iterable, Iterator, Mapping, Union
+
+from .sync import _atomic_write
+
+__all__ = ['CREATED', 'DELETED', 'PRICE_CHANGED', 'STOCK_CHANGED', 'DESCRIPTION_CHANGED', 'IMAGES_CHANGED', 'UPDATED',
+           'DEFAULT_FIELD_EVENTS', 'DEFAULT_IGNORED_FIELDS', 'ChangeEvent', 'ChangeDetector', 'record_key']
+
+CREATED = "created"
+DELETED = "deleted"
+PRICE_CHANGED = "price_changed"
+STOCK_CHANGED = "stock_changed"
+DESCRIPTION_CHANGED = "description_changed"
+IMAGES_CHANGED = "images_changed"
+# Change of a field that isn't in any other group
+UPDATED = "updated"
+
+DEFAULT_FIELD_EVENTS: Mapping[str, str] = {
+    "wholesalePrice": PRICE_CHANGED,
+    "retailPrice": PRICE_CHANGED,
+    "inShopsPrice": PRICE_CHANGED,
+    "priceLargeQuantities": PRICE_CHANGED,
+    "stocks": STOCK_CHANGED,
+    "quantity": STOCK_CHANGED,
+    "name": DESCRIPTION_CHANGED,
+    "description": DESCRIPTION_CHANGED,
+    "url": DESCRIPTION_CHANGED,
+    "images": IMAGES_CHANGED,
+}
+
+# These dates change along with the fields they describe, so they would only duplicate the events of these fields.
+DEFAULT_IGNORED_FIELDS = frozenset({
+    "dateUpd",
+    "dateUpdCategories",
+    "dateUpdDescription",
+    "dateUpdImages",
+    "dateUpdProperties",
+    "dateUpdStock",
+})
+
+# Fingerprint of a record: the hash of the whole record and the hash of each field
+Fingerprint = tuple[bytes, dict[str, bytes]]
+
+
+def record_key(record: Mapping[str, Any]) -> str:
+    """Default key of a record: its id, followed by its language for records that have one."""
+    iso_code = record.get("isoCode")
+    if iso_code is not None:
+        return f"{record['id']}/{iso_code}"
+    return str(record["id"])
+
+
+def _hash(value: Any) -> bytes:
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+class ChangeEvent:
+    """
+    Change of a record.
+
+    :param type: ``CREATED``, ``DELETED`` or one of the ``*_CHANGED``/``UPDATED`` events
+    :param source: name of the stream of records, e.g. ``"products"``
+    :param key: key of the record
+    :param fields: names of the changed fields. This is empty for ``CREATED`` and ``DELETED`` events.
+    :param values: new values of the changed fields, or the whole record for ``CREATED`` events
+    """
+    __slots__ = ("type", "source", "key", "fields", "values")
+
+    def __init__(self, type: str, source: str, key: str, fields: tuple[str, ...] = (),
+                 values: Optional[dict[str, Any]] = None):
+        self.type = type
+        self.source = source
+        self.key = key
+        self.fields = fields
+        self.values = values if values is not None else {}
+
+    def __repr__(self) -> str:
+        fields = f" {','.join(self.fields)}" if self.fields else ""
+        return f"<ChangeEvent {self.type} {self.source}:{self.key}{fields}>"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ChangeEvent):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"type": self.type, "source": self.source, "key": self.key, "fields": list(self.fields),
+                "values": self.values}
+
+
+class ChangeDetector:
+    """
+    Detect changes between successive versions of streams of records, using fingerprints.
+
+    :param field_events: event emitted when a field changes. Fields that are not in this mapping emit ``UPDATED``.
+    :param ignored_fields: fields that don't emit any event
+    :param key: function that returns the key of a record
+    """
+
+    def __init__(self, *,
+                 field_events: Mapping[str, str] = DEFAULT_FIELD_EVENTS,
+                 ignored_fields: Iterable[str] = DEFAULT_IGNORED_FIELDS,
+                 key: Callable[[Mapping[str, Any]], str] = record_key):
+        self.field_events = dict(field_events)
+        self.ignored_fields = frozenset(ignored_fields)
+        self.key = key
+        # fingerprints by source and record key
+        self.fingerprints: dict[str, dict[str, Fingerprint]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(fingerprints) for fingerprints in self.fingerprints.values())
+
+    def _field_hashes(self, record: Mapping[str, Any]) -> dict[str, bytes]:
+        return {sys.intern(field): _hash(value) for field, value in record.items() if field not in self.ignored_fields}
+
+    def detect(self, records: Iterable[Mapping[str, Any]], *, source: str = "products",
+               complete: bool = True) -> Iterator[ChangeEvent]:
+        """
+        Compare records with the fingerprints of the previous version of the stream, update the fingerprints and
+        yield change events. A changed record yields one event per group of changed fields. With ``complete=True``,
+        the fingerprints are replaced once all events have been consumed.
+
+        :param records: records of the stream
+        :param source: name of the stream
+        :param complete: if ``True`` (default), the records are the whole stream: the records that are not in it any
+          more yield ``DELETED`` events. Use ``False`` for partial updates.
+        """
+        previous = self.fingerprints.setdefault(source, {})
+        current: dict[str, Fingerprint] = previous
+        if complete:
+            # Fingerprints left in `previous` at the end are the deleted records
+            previous = dict(previous)
+            current = {}
+
+        for record in records:
+            key = self.key(record)
+            field_hashes = self._field_hashes(record)
+            record_hash = hashlib.blake2b(b"".join(field.encode("utf-8") + field_hash
+                                                   for field, field_hash in sorted(field_hashes.items())),
+                                          digest_size=8).digest()
+            old = previous.pop(key, None) if complete else previous.get(key)
+
+            if old is not None and old[0] == record_hash:
+                current[key] = old
+                continue
+
+            current[key] = (record_hash, field_hashes)
+
+            if old is None:
+                yield ChangeEvent(CREATED, source, key, values=dict(record))
+                continue
+
+            old_field_hashes = old[1]
+            changes: dict[str, dict[str, Any]] = {}
+            for field, field_hash in field_hashes.items():
+                if old_field_hashes.get(field) != field_hash:
+                    changes.setdefault(self.field_events.get(field, UPDATED), {})[field] = record[field]
+            for field in old_field_hashes.keys() - field_hashes.keys():
+                # Removed field
+                changes.setdefault(self.field_events.get(field, UPDATED), {})[field] = None
+
+            for event_type, values in changes.items():
+                yield ChangeEvent(event_type, source, key, tuple(values), values)
+
+        if complete:
+            for key in previous:
+                yield ChangeEvent(DELETED, source, key)
+
+        self.fingerprints[source] = current
+
+    def save(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        """Save the fingerprints to a file."""
+        data = {
+            source: {key: [record_hash.hex(), {field: h.hex() for field, h in field_hashes.items()}]
+                     for key, (record_hash, field_hashes) in fingerprints.items()}
+            for source, fingerprints in self.fingerprints.items()
+        }
+        _atomic_write(os.path.abspath(path), json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"], **kwargs: Any) -> "ChangeDetector":
+        """
+        Load fingerprints saved with ``save``. Keyword arguments are passed to the constructor; they should be the same
+        as when the fingerprints were saved.
+        """
+        detector = cls(**kwargs)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        detector.fingerprints = {
+            source: {key: (bytes.fromhex(record_hash), {field: bytes.fromhex(h) for field, h in field_hashes.items()})
+                     for key, (record_hash, field_hashes) in fingerprints.items()}
+            for source, fingerprints in data.items()
+        }
+        return detector
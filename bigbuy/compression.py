@@ -0,0 +1,148 @@
+"""
+bigbuy.compression
+~~~~~~~~~~~~~~~~~~
+
+Compressed responses, and measure of their size on the wire.
+
+Usage::
+
+    compression = CompressionPolicy()  # the best encodings supported by urllib3 in this environment
+    client = BigBuy(app_key, compression=compression)
+    ...
+    print(compression.stats.as_dict())
+    # {"catalog/products": {"responses": 12, "compressed": 12, "wire_bytes": 1843200, "decoded_bytes": 14745600,
+    #                       "ratio": 0.125}, ...}
+
+Responses are decoded by urllib3 as they are read from the socket, chunk by chunk, so the compressed body is never
+held in memory in full. ``gzip`` and ``deflate`` are always available; ``br`` requires ``brotli`` (or ``brotlicffi``)
+and ``zstd`` requires ``zstandard`` (or Python 3.14+).
+"""
+import threading
+from typing import Optional, Any, Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+__all__ = ['ENCODINGS', 'CompressionPolicy', 'CompressionStats', 'EndpointTraffic', 'available_encodings',
+           'wire_size']
+
+# Encodings by order of preference
+ENCODINGS = ("zstd", "br", "gzip", "deflate")
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Return the encodings that urllib3 can decode in this environment, by order of preference."""
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    supported = {encoding.strip() for encoding in ACCEPT_ENCODING.split(",")}
+    return tuple(encoding for encoding in ENCODINGS if encoding in supported)
+
+
+def wire_size(response: "requests.Response") -> int:
+    """Return the number of bytes of the body of a response as received, before decoding."""
+    tell = getattr(response.raw, "tell", None)
+    if tell is not None:
+        try:
+            size = tell()
+        except (OSError, ValueError):  # pragma: nocover
+            size = None
+        if size:
+            return int(size)
+
+    content_length = response.headers.get("Content-Length", "")
+    if content_length.isdigit():
+        return int(content_length)
+    return len(response.content or b"")
+
+
+class EndpointTraffic:
+    """
+    Traffic of an endpoint.
+
+    * ``responses``: number of responses
+    * ``compressed``: number of compressed responses
+    * ``wire_bytes``: size of the bodies as received
+    * ``decoded_bytes``: size of the bodies after decoding
+    """
+    __slots__ = ("responses", "compressed", "wire_bytes", "decoded_bytes")
+
+    def __init__(self) -> None:
+        self.responses = 0
+        self.compressed = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    @property
+    def ratio(self) -> float:
+        """Wire bytes by decoded byte: 1 means no savings, 0.1 means 90% of the bandwidth was saved."""
+        return self.wire_bytes / self.decoded_bytes if self.decoded_bytes else 1.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "responses": self.responses,
+            "compressed": self.compressed,
+            "wire_bytes": self.wire_bytes,
+            "decoded_bytes": self.decoded_bytes,
+            "ratio": self.ratio,
+        }
+
+
+class CompressionStats:
+    """Traffic metrics by endpoint template."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointTraffic] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, response: "requests.Response") -> None:
+        """Record a response of an endpoint. This reads its body if it wasn't read yet."""
+        decoded_bytes = len(response.content or b"")
+        wire_bytes = wire_size(response)
+        compressed = response.headers.get("Content-Encoding", "identity") != "identity"
+        with self._lock:
+            traffic = self.endpoints.get(endpoint)
+            if traffic is None:
+                traffic = self.endpoints[endpoint] = EndpointTraffic()
+            traffic.responses += 1
+            traffic.compressed += compressed
+            traffic.wire_bytes += wire_bytes
+            traffic.decoded_bytes += decoded_bytes
+
+    def total(self) -> EndpointTraffic:
+        """Return the traffic of all endpoints."""
+        total = EndpointTraffic()
+        with self._lock:
+            for traffic in self.endpoints.values():
+                for name in EndpointTraffic.__slots__:
+                    setattr(total, name, getattr(total, name) + getattr(traffic, name))
+        return total
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {endpoint: traffic.as_dict() for endpoint, traffic in self.endpoints.items()}
+
+
+class CompressionPolicy:
+    """
+    Compression negotiated by a client.
+
+    :param encodings: accepted encodings, by order of preference. Default to all the ``available_encodings``.
+      Encodings that urllib3 can't decode in this environment raise a ``ValueError``.
+    """
+
+    def __init__(self, encodings: Optional[Iterable[str]] = None):
+        available = available_encodings()
+        if encodings is None:
+            encodings = available
+        self.encodings = tuple(encodings)
+
+        if unsupported := [encoding for encoding in self.encodings if encoding not in available]:
+            raise ValueError(f"Unsupported encodings: {', '.join(unsupported)}. "
+                             f"Available encodings are {', '.join(available)}")
+
+        self.stats = CompressionStats()
+
+    @property
+    def accept_encoding(self) -> str:
+        """Value of the ``Accept-Encoding`` header."""
+        return ", ".join(self.encodings) if self.encodings else "identity"
@@ -0,0 +1,211 @@
+"""
+bigbuy.connections
+~~~~~~~~~~~~~~~~~~
+
+Connection pooling for ``BigBuy`` clients shared by many threads.
+
+Usage::
+
+    connections = ConnectionPolicy.for_threads(32, idle_timeout=50)
+    client = BigBuy(app_key, connections=connections)
+    client.warm_up()
+    ...  # use the client from 32 threads
+    print(connections.stats.as_dict())
+
+By default, ``requests`` keeps at most 10 connections per host. When more threads share a client, the connections
+opened by the extra threads are closed as soon as their request completes, and each of their requests pays for a new
+TCP and TLS handshake. ``ConnectionPolicy`` sizes the pool; with ``block=True`` threads wait for a free connection
+instead of opening throwaway ones.
+
+Connections idle for longer than ``idle_timeout`` are closed before being reused: set it a bit below the keep-alive
+timeout of the server so that requests are not sent on connections that the server is closing.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Union
+
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager, HTTPConnectionPool, HTTPSConnectionPool, Retry
+
+__all__ = ['ConnectionPolicy', 'ConnectionStats', 'PooledHTTPAdapter', 'warm_up_pool']
+
+
+class ConnectionStats:
+    """
+    Connection metrics.
+
+    * ``opened``: number of connections opened, i.e. of TCP (and TLS) handshakes
+    * ``reused``: number of times a connection was reused from the pool
+    * ``idle_closed``: number of connections closed because they were idle for longer than the idle timeout
+    * ``discarded``: number of connections closed because the pool was full
+    """
+
+    def __init__(self) -> None:
+        self.opened = 0
+        self.reused = 0
+        self.idle_closed = 0
+        self.discarded = 0
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def reuse_rate(self) -> float:
+        """Share of connection checkouts that reused an open connection."""
+        total = self.opened + self.reused
+        return self.reused / total if total else 0.0
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "opened": self.opened,
+            "reused": self.reused,
+            "idle_closed": self.idle_closed,
+            "discarded": self.discarded,
+            "reuse_rate": self.reuse_rate,
+        }
+
+
+class _TrackedPoolMixin:
+    """Connection pool that closes idle connections and records its metrics."""
+    stats: ConnectionStats
+    idle_timeout: Optional[float]
+    pool: Any
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        released_at = conn.__dict__.pop("_bigbuy_released_at", None)
+        if conn.sock is not None and released_at is not None and self.idle_timeout is not None \
+                and time.monotonic() - released_at > self.idle_timeout:
+            conn.close()
+            self.stats.increment("idle_closed")
+
+        # Connections without a socket connect when they send their request
+        self.stats.increment("opened" if conn.sock is None else "reused")
+        return conn
+
+    def _put_conn(self, conn: Any) -> None:
+        if conn is not None:
+            conn.__dict__["_bigbuy_released_at"] = time.monotonic()
+            if self.pool is not None and self.pool.full():
+                self.stats.increment("discarded")
+        super()._put_conn(conn)  # type: ignore[misc]
+
+
+class _TrackedHTTPConnectionPool(_TrackedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackedHTTPSConnectionPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _TrackedPoolManager(PoolManager):
+    def __init__(self, *args: Any, stats: ConnectionStats, idle_timeout: Optional[float], **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self.idle_timeout = idle_timeout
+        self.pool_classes_by_scheme = {"http": _TrackedHTTPConnectionPool, "https": _TrackedHTTPSConnectionPool}
+
+    def _new_pool(self, scheme: str, host: str, port: int, request_context: Optional[dict[str, Any]] = None) -> Any:
+        pool: Any = super()._new_pool(scheme, host, port, request_context)
+        pool.stats = self.stats
+        pool.idle_timeout = self.idle_timeout
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    ``HTTPAdapter`` whose connection pools close idle connections and record metrics.
+
+    :param stats: metrics to update
+    :param idle_timeout: close connections idle for longer than this number of seconds instead of reusing them
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ["stats", "idle_timeout"]
+
+    def __init__(self, *args: Any, stats: Optional[ConnectionStats] = None, idle_timeout: Optional[float] = None,
+                 **kwargs: Any):
+        # Set before calling the parent constructor, which creates the pool manager
+        self.stats = stats if stats is not None else ConnectionStats()
+        self.idle_timeout = idle_timeout
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any) -> None:
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _TrackedPoolManager(num_pools=connections, maxsize=maxsize, block=block,
+                                               stats=self.stats, idle_timeout=self.idle_timeout, **pool_kwargs)
+
+
+class ConnectionPolicy:
+    """
+    Connection pooling configuration of a client.
+
+    :param pool_connections: number of hosts whose connection pool is kept
+    :param pool_maxsize: maximum number of connections kept open per host
+    :param block: if ``True``, requests wait for a free connection when ``pool_maxsize`` connections are in use
+      instead of opening a connection that is closed after the request
+    :param idle_timeout: close connections idle for longer than this number of seconds instead of reusing them
+    :param warm_up: number of connections opened by ``BigBuy.warm_up``. Default to ``pool_maxsize``.
+    """
+
+    def __init__(self, *,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 block: bool = False,
+                 idle_timeout: Optional[float] = None,
+                 warm_up: Optional[int] = None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.block = block
+        self.idle_timeout = idle_timeout
+        self.warm_up = pool_maxsize if warm_up is None else warm_up
+        self.stats = ConnectionStats()
+
+    @classmethod
+    def for_threads(cls, threads: int, **kwargs: Any) -> "ConnectionPolicy":
+        """
+        Policy for a client shared by the given number of threads: one connection per thread, and threads wait for a
+        connection rather than opening throwaway ones.
+        """
+        kwargs.setdefault("pool_maxsize", threads)
+        kwargs.setdefault("block", True)
+        return cls(**kwargs)
+
+    def adapter(self, max_retries: Union[int, Retry] = 0) -> PooledHTTPAdapter:
+        """Create an HTTP adapter that follows this policy."""
+        return PooledHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                                 pool_block=self.block, max_retries=max_retries, stats=self.stats,
+                                 idle_timeout=self.idle_timeout)
+
+
+def warm_up_pool(pool: HTTPConnectionPool, connections: int) -> int:
+    """
+    Open connections of a pool in parallel and put them back in the pool.
+
+    :return: the number of connections opened
+    """
+    # Don't take more connections than the pool keeps, nor block on a full pool
+    connections = min(connections, pool.pool.qsize() if pool.pool is not None else 0)
+    conns: list[Any] = [pool._get_conn() for _ in range(connections)]
+    to_open = [conn for conn in conns if conn.sock is None]
+    try:
+        if to_open:
+            with ThreadPoolExecutor(len(to_open), thread_name_prefix="bigbuy-warm-up") as executor:
+                list(executor.map(lambda conn: conn.connect(), to_open))
+    finally:
+        for conn in conns:
+            pool._put_conn(conn)
+    return len(to_open)
@@ -10,11 +10,15 @@ import json
 import re
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any, Type, cast, Sequence, Callable
+from typing import Optional, Union, Any, Type, Sequence, Callable, NoReturn, TYPE_CHECKING
 
-from requests import Response
+from bigbuy.rate_limit import RateLimit, RATE_LIMIT_RESPONSE_TEXT
+from bigbuy.responses import ResponseView, ResponseLike
 
-from bigbuy.rate_limit import RateLimit
+if TYPE_CHECKING:
+    from requests import Response
+
+    from bigbuy.validation import OrderValidation
 
 
 class BBError(Exception):
@@ -22,11 +26,18 @@ class BBError(Exception):
 
 
 class BBResponseError(BBError):
+    """
+    Error response of the API.
+
+    ``response`` is a ``ResponseView`` of the response rather than the ``requests.Response`` itself, so that errors
+    don't keep the request, the connection and the rest of the response alive.
+    """
+
     def __init__(self, text: str,
-                 response: Response,
+                 response: ResponseLike,
                  bb_code: Optional[Union[str, int]] = None,
                  bb_data: Optional[Union[dict[str, Any], list[Any]]] = None):
-        self.response = response
+        self.response = ResponseView.from_response(response)
         self.text = text
         self.bb_code = bb_code
         self.bb_data = bb_data
@@ -35,9 +46,9 @@ class BBResponseError(BBError):
 
 
 class BBRateLimitError(BBResponseError):
-    def __init__(self, text: str, response: Response):
+    def __init__(self, text: str, response: ResponseLike):
         super().__init__(text, response)
-        self.rate_limit = RateLimit.from_response(response)
+        self.rate_limit = RateLimit.from_response(self.response)
 
     # backward compatibility
     def reset_timedelta(self, utcnow: Optional[datetime] = None) -> Optional[timedelta]:
@@ -59,7 +70,8 @@ class BBRateLimitError(BBResponseError):
 
 
 class BBProductError(BBResponseError):
-    def __init__(self, text: str, response: Response, bb_code: Any, bb_data: Any, *, skus: Optional[list[str]] = None):
+    def __init__(self, text: str, response: ResponseLike, bb_code: Any, bb_data: Any, *,
+                 skus: Optional[list[str]] = None):
         if skus is None:
             skus = bb_data["skus"]
 
@@ -147,8 +159,38 @@ class BBTimeoutError(BBServerError, TimeoutError):
     pass
 
 
+class BBCircuitOpenError(BBError):
+    """Raised without sending the request when the circuit breaker of an endpoint is open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit breaker open for {endpoint}; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class BBDeadlineExceededError(BBError, TimeoutError):
+    """Raised when the deadline of a call passes before it could complete."""
+
+
+class BBInsufficientPurseError(BBError):
+    """Raised without sending the request when the local balance of a ``PurseTracker`` is too low for an order."""
+
+    def __init__(self, amount: float, available: float):
+        super().__init__(f"Insufficient purse balance: {amount:.2f} needed, {available:.2f} available")
+        self.amount = amount
+        self.available = available
+
+
+class BBOrderValidationError(BBError):
+    """Raised without sending the request when an order fails the local validation of ``OrderValidator``."""
+
+    def __init__(self, validation: "OrderValidation"):
+        super().__init__("Invalid order: %s" % "; ".join(issue.message for issue in validation.errors))
+        self.validation = validation
+
+
 class BBValidationError(BBResponseError):
-    def __init__(self, error_fields: Any, response: Response, **kwargs: Any):
+    def __init__(self, error_fields: Any, response: ResponseLike, **kwargs: Any):
         text = "Validation failed: %s" % str(error_fields)
         super().__init__(text, response, **kwargs)
         self.error_fields = error_fields
@@ -250,123 +292,154 @@ def flat_children_errors(children: Union[list[Any], dict[str, Any]], prefix: str
     return trimmed
 
 
-def raise_for_response(response: Response) -> None:
-    """
-    Equivalent of request.Response#raise_for_status() that raises an exception based on the response's status.
-    This may modify its argument to fix the status code if the response is a soft error.
-    """
-    text = response.text.strip()
-    content = json_or_none(text)
+# Classification of the errors whose body is not JSON. Exact bodies are looked up first, then timeout patterns.
+_TEXT_ERROR_CLASSES: dict[str, Type[BBResponseError]] = {
+    RATE_LIMIT_RESPONSE_TEXT: BBRateLimitError,
+    "Bad Gateway": BBServerError,
+}
+_TIMEOUT_PATTERN = re.compile("|".join(re.escape(s) for s in (
+    "504 Gateway Time-out",
+    "503 Service Unavailable",
+    "No server is available to handle this request.",
+    "The server didn't respond in time.",
+)))
+_TIMEOUT_PREFIXES = (
+    "Idle timeout reached for",
+    # (yes, there is a double space)
+    'HTTP/2 503  returned for "https://www.bigbuy.eu/order/payment/',
+)
+
+_HTML_PREFIXES = ("<html>", "<!DOCTYPE html>")
+_HTML_BODY_PATTERN = re.compile(r".+<body>(.+)</body>", re.DOTALL)
+_HTML_CONTAINER_PATTERN = re.compile(r'<div class="container">(.+)</div>', re.DOTALL)
+_HTML_500_PATTERN = re.compile(r'<h2>The server returned a "500 Internal Server Error".</h2>\s*<p>(.+)</p>$',
+                               re.DOTALL)
+_HTML_5XX_PATTERN = re.compile(r'<h1>5.. .*?</h1>\s*(.+)', re.DOTALL)
+
+# Start of the body of 200 OK responses that may be soft errors: a JSON object, or an embedded HTTP response
+_SOFT_ERROR_START_PATTERN = re.compile(rb"\s*(?:(\{)|HTTP/1\.)")
+_SOFT_ERROR_MESSAGE = "Something went wrong"
+_EMBEDDED_STATUS_PATTERN = re.compile(r"HTTP/1\.[01] (\d{3})")
+
+
+def _is_5xx_code(code: Any) -> bool:
+    """Return ``True`` if a BigBuy error code is a 5xx HTTP status, without raising on non-numeric codes."""
+    if isinstance(code, str):
+        if not code.strip().isdigit():
+            return False
+        code = int(code)
+    return isinstance(code, (int, float)) and int(code) // 100 == 5
+
+
+def _trim_html(text: str) -> str:
+    if m := _HTML_BODY_PATTERN.match(text):
+        text = m.group(1).strip()
+
+        # <div class="container">
+        #    <h1>Oops! An Error Occurred</h1>
+        #    <h2>The server returned a "500 Internal Server Error".</h2>
+        #    <p>
+        #        Something is broken. Please let us know what you were doing when this error occurred.
+        #        We will fix it as soon as possible. Sorry for any inconvenience caused.
+        #    </p>
+        # </div>
+        if m := _HTML_CONTAINER_PATTERN.match(text):
+            text = m.group(1).strip()
+
+        text = text.replace("<h1>Oops! An Error Occurred</h1>", "").strip()
+
+        if m := _HTML_500_PATTERN.match(text):
+            text = m.group(1).strip()
+        elif m := _HTML_5XX_PATTERN.match(text):
+            text = m.group(1).strip()
+
+    return text
+
+
+def _raise_for_soft_error(response: "Response") -> None:
+    """Raise for 200 OK responses that are errors. This doesn't decode the body of other responses."""
+    body = response.content
+    if not body or not (m := _SOFT_ERROR_START_PATTERN.match(body)):
+        return None
 
-    # BigBuy may return soft errors (with a '200 OK' code)
-    if response.ok:
+    if m.group(1):
         # BigBuy may return soft errors (with a '200 OK' code)
+        if _SOFT_ERROR_MESSAGE.encode() not in body:
+            return None
+        content = json_or_none(response.text.strip())
         if isinstance(content, dict) and set(content) - {"error_detail", } == {"code", "message"}:
             code = content["code"]
             message = content["message"]
             if isinstance(code, int) and 400 <= code < 600 and \
-                    isinstance(message, str) and "Something went wrong" in message:
+                    isinstance(message, str) and _SOFT_ERROR_MESSAGE in message:
                 response.status_code = code
                 return raise_for_response(response)
-
-        # It may also return whole HTTP responses embedded in the body of a 200 OK response
-        # See test_raise_for_response_soft_error_headers_in_body for a real-world example.
-        if text.startswith("HTTP/1."):
-            if match := re.match(r"HTTP/1\.[01] (\d{3})", text):
-                response.status_code = int(match.group(1))
-                parts = text.split("\r\n\r\n", 1)
-                if len(parts) == 2:
-                    _headers, body = parts
-                    response.encoding = "utf-8"
-                    response._content = body.encode(response.encoding)
-                    return raise_for_response(response)
-
         return None
 
-    is_5xx = response.status_code // 100 == 5
-
-    if content is None:
-        if text == "You exceeded the rate limit":
-            error_class: Type[BBResponseError] = BBRateLimitError
-
-        elif (
-                "<h1>504 Gateway Time-out</h1>" in text
-                or "504 Gateway Time-out" in text
-                or "503 Service Unavailable" in text
-                or "No server is available to handle this request." in text
-                or "The server didn't respond in time." in text
-                or text.startswith('Idle timeout reached for')
-                # (yes, there is a double space)
-                or text.startswith('HTTP/2 503  returned for "https://www.bigbuy.eu/order/payment/')
-        ):
+    # It may also return whole HTTP responses embedded in the body of a 200 OK response
+    # See test_raise_for_response_soft_error_headers_in_body for a real-world example.
+    text = response.text.strip()
+    if match := _EMBEDDED_STATUS_PATTERN.match(text):
+        response.status_code = int(match.group(1))
+        parts = text.split("\r\n\r\n", 1)
+        if len(parts) == 2:
+            _headers, body_text = parts
+            response.encoding = "utf-8"
+            response._content = body_text.encode(response.encoding)
+            return raise_for_response(response)
+
+    return None
+
+
+def _raise_for_text_error(text: str, response: "Response", is_5xx: bool) -> NoReturn:
+    error_class = _TEXT_ERROR_CLASSES.get(text)
+    if error_class is None:
+        if _TIMEOUT_PATTERN.search(text) or text.startswith(_TIMEOUT_PREFIXES):
             error_class = BBTimeoutError
-        elif is_5xx or text == "Bad Gateway" or "Internal Server Error" in text:
+        elif is_5xx or "Internal Server Error" in text:
             error_class = BBServerError
         else:
             error_class = BBResponseError
 
-        # Trim what we can.
-        if text.startswith("<html>") or text.startswith("<!DOCTYPE html>"):
-            if m := re.match(r".+<body>(.+)</body>", text, re.DOTALL):
-                text = m.group(1).strip()
-
-                # <div class="container">
-                #    <h1>Oops! An Error Occurred</h1>
-                #    <h2>The server returned a "500 Internal Server Error".</h2>
-                #    <p>
-                #        Something is broken. Please let us know what you were doing when this error occurred.
-                #        We will fix it as soon as possible. Sorry for any inconvenience caused.
-                #    </p>
-                # </div>
-                if m := re.match(r'<div class="container">(.+)</div>', text, re.DOTALL):
-                    text = m.group(1).strip()
+    # Trim what we can.
+    if text.startswith(_HTML_PREFIXES):
+        text = _trim_html(text)
 
-                text = text.replace("<h1>Oops! An Error Occurred</h1>", "").strip()
+    raise error_class(text, response)
 
-                if m := re.match(r'<h2>The server returned a "500 Internal Server Error".</h2>\s*'
-                                 r'<p>(.+)</p>$', text, re.DOTALL):
-                    text = m.group(1).strip()
-                elif m := re.match(r'<h1>5.. .*?</h1>\s*(.+)', text, re.DOTALL):
-                    text = m.group(1).strip()
 
-        raise error_class(text, response)
-
-    content = cast(dict[str, Any], response.json())
-
-    bb_code = "unknown"
+def _raise_for_json_error(content: dict[str, Any], response: "Response", is_5xx: bool) -> NoReturn:
+    bb_code: Any = "unknown"
     message = str(content)
 
     # {"errors":[{"code":34,"message":"Sorry, that page does not exist"}]}
-    if "errors" in content and content["errors"]:
-        errors = content["errors"]
-
-        if errors:
-            if isinstance(errors, dict) and "code" in content and "message" in content:
-                # {"code":400,"message":"Validation Failed",
-                #  "errors":{"children":{"delivery":{"children":{"postcode":{"errors":["Invalid postcode format..."]}}},
-                #                        "products":{...}}}}
-                if "children" in errors:
-                    errors_message: Any = flat_children_errors(errors["children"])
-
-                    if content["message"].strip() == "Validation Failed" or "ERROR:" in content["message"]:
-                        raise BBValidationError(
-                            # {'delivery.postcode': [
-                            #     "Invalid postcode format. Valid format for the selected country is 'NNNNN'.",
-                            #     'This value is not valid.']}
-                            error_fields=errors_message,
-                            response=response,
-                            bb_code=bb_code,
-                        )
-                else:
-                    errors_message = str(errors)
-
-                bb_code = str(content["code"])
-                message = "%s: %s" % (content["message"], errors_message)
+    if errors := content.get("errors"):
+        if isinstance(errors, dict) and "code" in content and "message" in content:
+            # {"code":400,"message":"Validation Failed",
+            #  "errors":{"children":{"delivery":{"children":{"postcode":{"errors":["Invalid postcode format..."]}}},
+            #                        "products":{...}}}}
+            if "children" in errors:
+                errors_message: Any = flat_children_errors(errors["children"])
+
+                if content["message"].strip() == "Validation Failed" or "ERROR:" in content["message"]:
+                    raise BBValidationError(
+                        # {'delivery.postcode': [
+                        #     "Invalid postcode format. Valid format for the selected country is 'NNNNN'.",
+                        #     'This value is not valid.']}
+                        error_fields=errors_message,
+                        response=response,
+                        bb_code=bb_code,
+                    )
             else:
-                error = errors[0]
-                if "code" in error:
-                    bb_code = error["code"]
-                message = error.get("message", message)
+                errors_message = str(errors)
+
+            bb_code = str(content["code"])
+            message = "%s: %s" % (content["message"], errors_message)
+        else:
+            error = errors[0]
+            if "code" in error:
+                bb_code = error["code"]
+            message = error.get("message", message)
 
     # {"code": "ER003", "message": "..."}
     elif "code" in content and "message" in content:
@@ -382,16 +455,13 @@ def raise_for_response(response: Response) -> None:
         if isinstance(error_detail, dict) and "warehouses" in error_detail:
             raise BBWarehouseSplitError(message, response, bb_code=bb_code, warehouses=error_detail["warehouses"])
 
-    try:
-        if int(bb_code) // 100 == 5:
-            raise BBServerError(message, response, bb_code=bb_code)
-    except ValueError:
-        pass
+    if _is_5xx_code(bb_code):
+        raise BBServerError(message, response, bb_code=bb_code)
 
-    error_class = BBServerError if is_5xx else BBResponseError
+    error_class: Type[BBResponseError] = BBServerError if is_5xx else BBResponseError
 
     # Yes, nested JSON
-    message_content = json_or_none(message)
+    message_content = json_or_none(message) if isinstance(message, str) else None
     if message_content is None:
         raise error_class(message, response, bb_code=bb_code)
 
@@ -416,3 +486,24 @@ def raise_for_response(response: Response) -> None:
             raise BBProductError(text, response, bb_code, bb_data, skus=skus)
 
     raise error_class(text, response, bb_code=bb_code, bb_data=bb_data)
+
+
+def raise_for_response(response: "Response") -> None:
+    """
+    Equivalent of request.Response#raise_for_status() that raises an exception based on the response's status.
+    This may modify its argument to fix the status code if the response is a soft error.
+
+    Successful responses are not decoded unless their body may be a soft error. The body of error responses is
+    decoded at most once, and classified with the tables above.
+    """
+    if response.ok:
+        return _raise_for_soft_error(response)
+
+    text = response.text.strip()
+    is_5xx = response.status_code // 100 == 5
+
+    content = json_or_none(text)
+    if content is None:
+        _raise_for_text_error(text, response, is_5xx)
+
+    _raise_for_json_error(content, response, is_5xx)
@@ -0,0 +1,784 @@
+"""
+bigbuy.fake_server
+~~~~~~~~~~~~~~~~~~
+
+A local stand-in for the BigBuy API, for integration tests and benchmarks. It implements the catalog, shipping, order,
+tracking and user endpoints called by ``BigBuy`` with deterministic synthetic data, and it can simulate latency,
+rate-limits and the HTML 5xx error pages BigBuy returns during incidents.
+
+Usage::
+
+    with FakeBigBuyServer(catalog_size=10_000, latency=0.01) as server:
+        client = server.client()
+        products = client.get_products(pageSize=1000, page=0)
+
+This module is test tooling: it's not imported by the rest of the package, and it's not meant to run in production.
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Any, Union, Callable, TYPE_CHECKING
+from urllib.parse import urlsplit, parse_qs
+
+from .rate_limit import RATE_LIMIT_RESPONSE_TEXT
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['FakeBigBuyServer', 'ERROR_PAGES']
+
+# Real-world error bodies, as handled by ``bigbuy.exceptions.raise_for_response``.
+ERROR_PAGES: list[tuple[int, str]] = [
+    (500, '<html><body><div class="container"><h1>Oops! An Error Occurred</h1>\n'
+          '<h2>The server returned a "500 Internal Server Error".</h2>\n<p>\n'
+          '    Something is broken. Please let us know what you were doing when this error occurred.\n'
+          '    We will fix it as soon as possible. Sorry for any inconvenience caused.\n</p>\n'
+          '</div></body></html>'),
+    (502, 'Bad Gateway'),
+    (503, '<html><body><h1>503 Service Unavailable</h1>\n'
+          'No server is available to handle this request.\n</body></html>'),
+    (504, "<html><body><h1>504 Gateway Time-out</h1>\nThe server didn't respond in time.\n</body></html>"),
+]
+
+# Minimum size of the bodies compressed when compression is enabled
+COMPRESSION_MIN_SIZE = 1024
+
+# Maximum number of bulk responses kept in memory
+CACHE_SIZE = 128
+
+ORDER_STATUSES = [
+    (1, "Pending payment"), (2, "Payment accepted"), (3, "Processing in progress"), (4, "Shipped"),
+    (5, "Delivered"), (6, "Cancelled"), (7, "Refund"), (8, "Payment error"),
+]
+
+_WORDS = ("acme", "solar", "garden", "kitchen", "lamp", "table", "chair", "cable", "charger", "speaker", "mug",
+          "bottle", "backpack", "tent", "towel", "pillow", "watch", "glasses", "knife", "pan", "brush", "toy")
+
+
+class _Catalog:
+    """Deterministic synthetic catalog."""
+
+    def __init__(self, size: int, languages: tuple[str, ...], seed: int):
+        rnd = random.Random(seed)
+        self.languages = languages
+        self.taxonomies: list[dict[str, Any]] = []
+        self.attribute_groups: list[dict[str, Any]] = []
+        self.attributes: list[dict[str, Any]] = []
+        self.manufacturers: list[dict[str, Any]] = []
+        self.tags: list[dict[str, Any]] = []
+        self.products: list[dict[str, Any]] = []
+        self.variations: list[dict[str, Any]] = []
+        self.stocks: dict[int, list[dict[str, Any]]] = {}
+
+        for i in range(1, 51):
+            parent = 0 if i <= 5 else rnd.randint(1, i - 1)
+            self.taxonomies.append({"id": i, "parentTaxonomy": parent, "name": f"{rnd.choice(_WORDS)} {i}"})
+
+        for group_id in range(1, 11):
+            self.attribute_groups.append({"id": group_id, "name": f"group {group_id}"})
+            for j in range(10):
+                attribute_id = group_id * 100 + j
+                self.attributes.append({"id": attribute_id, "attributeGroup": group_id, "name": f"value {j}"})
+
+        for i in range(1, 101):
+            self.manufacturers.append({"id": i, "name": f"{rnd.choice(_WORDS).title()} {i}",
+                                       "urlImage": f"https://cdnbigbuy.com/images/M{i}.jpg", "reference": i})
+
+        for i in range(1, 201):
+            self.tags.append({"id": i, "name": f"{rnd.choice(_WORDS)}-{i}"})
+
+        variation_id = 1_000_000
+        for i in range(size):
+            product_id = 100_000 + i
+            wholesale_price = round(rnd.uniform(1, 300), 2)
+            product = {
+                "id": product_id,
+                "sku": f"S{product_id:07d}",
+                "active": 1,
+                "attributes": False,
+                "categories": True,
+                "category": rnd.randint(2000, 3000),
+                "condition": "NEW",
+                "dateUpd": "2026-01-01 00:00:00",
+                "depth": round(rnd.uniform(1, 50), 1),
+                "ean13": f"84{product_id:011d}",
+                "height": round(rnd.uniform(1, 50), 1),
+                "images": True,
+                "inShopsPrice": round(wholesale_price * 2, 2),
+                "intrastat": "85167100",
+                "logisticClass": rnd.choice("ABCDEF"),
+                "manufacturer": rnd.randint(1, 100),
+                "partNumber": None,
+                "priceLargeQuantities": [],
+                "retailPrice": round(wholesale_price * 1.6, 2),
+                "tags": True,
+                "taxId": 1,
+                "taxRate": 21,
+                "taxonomy": rnd.randint(6, 50),
+                "video": "0",
+                "weight": round(rnd.uniform(0.1, 20), 2),
+                "wholesalePrice": wholesale_price,
+                "width": round(rnd.uniform(1, 50), 1),
+                "_name": " ".join(rnd.choice(_WORDS) for _ in range(3)),
+                "_tags": rnd.sample(range(1, 201), 2),
+            }
+            self.products.append(product)
+            self.stocks[product_id] = [{"quantity": rnd.randint(0, 500), "minHandlingDays": 1, "maxHandlingDays": 2,
+                                        "warehouse": rnd.choice((1, 1, 1, 3))}]
+
+            if rnd.random() < 0.2:
+                product["attributes"] = True
+                group_id = rnd.randint(1, 10)
+                for j in range(rnd.randint(2, 4)):
+                    variation = {
+                        "id": variation_id,
+                        "sku": f"V{variation_id:07d}",
+                        "ean13": f"85{variation_id:011d}",
+                        "extraWeight": 0,
+                        "product": product_id,
+                        "wholesalePrice": wholesale_price,
+                        "retailPrice": product["retailPrice"],
+                        "inShopsPrice": product["inShopsPrice"],
+                        "width": product["width"],
+                        "height": product["height"],
+                        "depth": product["depth"],
+                        "priceLargeQuantities": [],
+                        "logisticClass": product["logisticClass"],
+                        "_attributes": [group_id * 100 + j],
+                    }
+                    self.variations.append(variation)
+                    self.stocks[variation_id] = [{"quantity": rnd.randint(0, 100), "minHandlingDays": 1,
+                                                  "maxHandlingDays": 2, "warehouse": 1}]
+                    variation_id += 1
+
+        self.products_by_id = {p["id"]: p for p in self.products}
+        self.variations_by_id = {v["id"]: v for v in self.variations}
+        self.by_sku: dict[str, dict[str, Any]] = {p["sku"]: p for p in self.products}
+        self.by_sku.update((v["sku"], v) for v in self.variations)
+
+    @staticmethod
+    def public(record: dict[str, Any]) -> dict[str, Any]:
+        return {k: v for k, v in record.items() if not k.startswith("_")}
+
+    def product_information(self, product: dict[str, Any], iso_code: str) -> dict[str, Any]:
+        name = f"{product['_name'].title()} ({iso_code})"
+        return {"id": product["id"], "sku": product["sku"], "name": name,
+                "description": f"<p>{name}. " + "Lorem ipsum dolor sit amet. " * 8 + "</p>",
+                "url": f"https://www.bigbuy.eu/{iso_code}/{product['_name'].replace(' ', '-')}.html",
+                "isoCode": iso_code, "dateUpdDescription": "2026-01-01 00:00:00"}
+
+    def product_images(self, product: dict[str, Any]) -> dict[str, Any]:
+        product_id = product["id"]
+        return {"id": product_id, "images": [
+            {"id": product_id * 10 + n, "isCover": n == 0, "name": f"{product['sku']}_{n}",
+             "url": f"https://cdnbigbuy.com/images/{product['sku']}_{n}.jpg"} for n in range(3)]}
+
+    def product_stock(self, product_id: int) -> dict[str, Any]:
+        record = self.products_by_id.get(product_id) or self.variations_by_id[product_id]
+        return {"id": product_id, "sku": record["sku"], "stocks": self.stocks[product_id]}
+
+    def product_tags(self, product: dict[str, Any], iso_code: str) -> list[dict[str, Any]]:
+        return [{"id": product["id"], "sku": product["sku"], "tag": self.tag(tag_id, iso_code)}
+                for tag_id in product["_tags"]]
+
+    def tag(self, tag_id: int, iso_code: str) -> dict[str, Any]:
+        name = self.tags[tag_id - 1]["name"]
+        return {"id": tag_id, "name": f"{name} {iso_code}", "linkRewrite": name, "language": iso_code}
+
+    def taxonomy(self, taxonomy: dict[str, Any], iso_code: str) -> dict[str, Any]:
+        return {"id": taxonomy["id"], "name": f"{taxonomy['name']} {iso_code}",
+                "url": f"{taxonomy['name'].replace(' ', '-')}-{iso_code}",
+                "parentTaxonomy": taxonomy["parentTaxonomy"], "dateAdd": "2021-10-20 12:00:00",
+                "dateUpd": "2023-10-20 12:00:00",
+                "urlImages": f"https://cdnbigbuy.com/images/T{taxonomy['id']}.jpg", "isoCode": iso_code}
+
+    @staticmethod
+    def localized(record: dict[str, Any], iso_code: str) -> dict[str, Any]:
+        return {**record, "name": f"{record['name']} {iso_code}", "isoCode": iso_code}
+
+
+class _FakeOrder:
+    def __init__(self, order_id: int, order: dict[str, Any], products: list[dict[str, Any]], total: float):
+        self.id = order_id
+        self.order = order
+        self.products = products
+        self.total = total
+        self.status = ORDER_STATUSES[1][1]
+        self.created = time.time()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_HTTPServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle's algorithm delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.fake.handle(self, "GET")
+
+    def do_POST(self) -> None:
+        self.server.fake.handle(self, "POST")
+
+    def send(self, status: int, body: Union[bytes, str], *, content_type: str = "application/json",
+             headers: Optional[dict[str, str]] = None) -> None:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if self.server.fake.compression and len(body) >= COMPRESSION_MIN_SIZE \
+                and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeBigBuyServer"
+
+
+Route = Callable[[dict[str, str], Optional[str], Any], Any]
+
+
+class FakeBigBuyServer:
+    """
+    Local fake BigBuy API server running in a background thread.
+
+    :param catalog_size: number of products in the synthetic catalog. About 20% of them have variations.
+    :param languages: ISO codes of the catalog languages
+    :param latency: simulated latency per request, in seconds. Use a ``(min, max)`` tuple for a random latency.
+    :param rate_limit: if set, maximum number of requests per ``rate_limit_window`` seconds. Requests above the limit
+      get a 429 response with a ``X-Ratelimit-Reset`` header, like the real API.
+    :param rate_limit_window: duration of the rate-limit window, in seconds
+    :param error_rate: fraction of requests that fail with one of the HTML 5xx ``ERROR_PAGES``
+    :param purse_amount: initial amount of money in the purse
+    :param compression: if ``True``, gzip the bodies of at least ``COMPRESSION_MIN_SIZE`` bytes when the client
+      accepts it
+    :param seed: random seed; the same seed always generates the same catalog
+    """
+
+    def __init__(self, *,
+                 catalog_size: int = 1000,
+                 languages: tuple[str, ...] = ("en", "es", "fr", "de"),
+                 latency: Union[float, tuple[float, float]] = 0,
+                 rate_limit: Optional[int] = None,
+                 rate_limit_window: float = 1,
+                 error_rate: float = 0,
+                 purse_amount: float = 100_000,
+                 compression: bool = False,
+                 seed: int = 0,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.catalog = _Catalog(catalog_size, languages, seed)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.error_rate = error_rate
+        self.purse_amount = purse_amount
+        self.compression = compression
+
+        self.request_count = 0
+        self.requests_by_path: dict[str, int] = {}
+        self.orders: dict[int, _FakeOrder] = {}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self._next_order_id = 1
+        # bulk responses by route and query, least recently used first
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+        self._get_routes: dict[str, Route] = self._make_get_routes()
+        self._post_routes: dict[str, Route] = {
+            "order/check": self._check_order,
+            "order/check/multishipping": self._check_multi_shipping_order,
+            "order/create": self._create_order,
+            "order/create/multishipping": self._create_multi_shipping_order,
+            "order/upload_invoice": lambda query, param, body: [True],
+            "shipping/orders": self._shipping_order,
+            "shipping/lowest-shipping-cost-by-country": self._lowest_shipping_cost,
+            "tracking/orders": self._tracking_orders,
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}/rest"
+
+    def start(self) -> "FakeBigBuyServer":
+        """Start serving in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05},
+                                            name="fake-bigbuy", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and close its socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeBigBuyServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def client(self, app_key: str = "fake-app-key", **kwargs: Any) -> "BigBuy":
+        """Return a ``BigBuy`` client that calls this server. Keyword arguments are passed to ``BigBuy``."""
+        from .api import BigBuy
+
+        client = BigBuy(app_key, **kwargs)
+        client.base_url = self.base_url
+        return client
+
+    # request handling
+
+    def handle(self, handler: _Handler, method: str) -> None:
+        url = urlsplit(handler.path)
+        path = url.path
+        if not path.startswith("/rest/") or not path.endswith(".json"):
+            handler.send(404, '{"code":404,"message":"Not Found"}')
+            return
+
+        path = path[len("/rest/"):-len(".json")]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        body: Any = None
+        if length := int(handler.headers.get("Content-Length") or 0):
+            body = json.loads(handler.rfile.read(length))
+
+        with self._lock:
+            self.request_count += 1
+            self.requests_by_path[path] = self.requests_by_path.get(path, 0) + 1
+            reset_time = self._consume_rate_limit()
+            error_page = self._random.choice(ERROR_PAGES) \
+                if self.error_rate and self._random.random() < self.error_rate else None
+            latency = self.latency if isinstance(self.latency, (int, float)) else self._random.uniform(*self.latency)
+
+        if latency:
+            time.sleep(latency)
+
+        if reset_time is not None:
+            handler.send(429, RATE_LIMIT_RESPONSE_TEXT, content_type="text/html",
+                         headers={"X-Ratelimit-Reset": str(reset_time)})
+            return
+
+        if error_page is not None:
+            status, page = error_page
+            handler.send(status, page, content_type="text/html")
+            return
+
+        routes = self._get_routes if method == "GET" else self._post_routes
+        route, param = self._route(routes, path)
+        if route is None:
+            handler.send(404, '{"code":404,"message":"Not Found"}')
+            return
+
+        try:
+            result = route(query, param, body)
+        except _FakeHTTPError as e:
+            handler.send(e.status, json.dumps(e.payload))
+            return
+
+        if isinstance(result, _FakeResponse):
+            handler.send(result.status, result.body, headers=result.headers)
+        elif isinstance(result, bytes):
+            handler.send(200, result)
+        else:
+            handler.send(200, json.dumps(result))
+
+    @staticmethod
+    def _route(routes: dict[str, Route], path: str) -> tuple[Optional[Route], Optional[str]]:
+        if route := routes.get(path):
+            return route, None
+        prefix, _, param = path.rpartition("/")
+        if route := routes.get(prefix + "/*"):
+            return route, param
+        return None, None
+
+    def _consume_rate_limit(self) -> Optional[int]:
+        """Count a request against the rate-limit. Return the reset timestamp if the request is rate-limited."""
+        if self.rate_limit is None:
+            return None
+
+        now = time.time()
+        if now - self._window_start >= self.rate_limit_window:
+            self._window_start = now
+            self._window_count = 0
+
+        self._window_count += 1
+        if self._window_count > self.rate_limit:
+            # BigBuy timestamps are in seconds; round up so clients never retry too early
+            return int(self._window_start + self.rate_limit_window) + 1
+        return None
+
+    # catalog
+
+    def _make_get_routes(self) -> dict[str, Route]:
+        c = self.catalog
+
+        def lang(query: dict[str, str]) -> str:
+            return query.get("isoCode") or c.languages[0]
+
+        def product(param: Optional[str]) -> dict[str, Any]:
+            try:
+                return c.products_by_id[int(param or "")]
+            except (ValueError, KeyError):
+                raise _FakeHTTPError(404, {"code": 404, "message": "Product not found"})
+
+        def bulk(name: str, build: Callable[[dict[str, str]], list[Any]]) -> Route:
+            def route(query: dict[str, str], param: Optional[str], body: Any) -> bytes:
+                key = f"{name}?{sorted(query.items())}"
+                with self._lock:
+                    if (cached := self._cache.get(key)) is not None:
+                        self._cache.move_to_end(key)
+                        return cached
+
+                records = build(query)
+                if "pageSize" in query:
+                    page_size = int(query["pageSize"])
+                    page = int(query.get("page", 0))
+                    records = records[page * page_size:(page + 1) * page_size]
+                cached = json.dumps(records).encode("utf-8")
+                with self._lock:
+                    self._cache[key] = cached
+                    if len(self._cache) > CACHE_SIZE:
+                        self._cache.popitem(last=False)
+                return cached
+
+            return route
+
+        return {
+            "catalog/attribute/*": lambda q, p, b: c.localized(c.attributes[_index(c.attributes, p)], lang(q)),
+            "catalog/attributealllanguages/*": lambda q, p, b: [
+                c.localized(c.attributes[_index(c.attributes, p)], iso) for iso in c.languages],
+            "catalog/attributegroup/*": lambda q, p, b: c.localized(
+                c.attribute_groups[_index(c.attribute_groups, p)], lang(q)),
+            "catalog/attributegroupalllanguages/*": lambda q, p, b: [
+                c.localized(c.attribute_groups[_index(c.attribute_groups, p)], iso) for iso in c.languages],
+            "catalog/attributegroups": bulk("attributegroups", lambda q: [
+                c.localized(g, lang(q)) for g in c.attribute_groups]),
+            "catalog/attributes": bulk("attributes", lambda q: [c.localized(a, lang(q)) for a in c.attributes]),
+            "catalog/languages": lambda q, p, b: [{"name": iso.upper(), "isoCode": iso} for iso in c.languages],
+            "catalog/manufacturer/*": lambda q, p, b: c.manufacturers[_index(c.manufacturers, p)],
+            "catalog/manufacturers": bulk("manufacturers", lambda q: c.manufacturers),
+            "catalog/product/*": lambda q, p, b: c.public(product(p)),
+            "catalog/productcategories/*": lambda q, p, b: [
+                {"id": product(p)["id"], "product": product(p)["id"], "category": product(p)["category"],
+                 "position": 1}],
+            "catalog/productcompliance/*": lambda q, p, b: {
+                "id": product(p)["id"], "sku": product(p)["sku"], "generalProductSafetyRegulations": [],
+                "productComplianceDocuments": []},
+            "catalog/productimages/*": lambda q, p, b: c.product_images(product(p)),
+            "catalog/productinformation/*": lambda q, p, b: c.product_information(product(p), lang(q)),
+            "catalog/productinformationalllanguages/*": lambda q, p, b: [
+                c.product_information(product(p), iso) for iso in c.languages],
+            "catalog/productinformationbysku/*": self._product_information_by_sku,
+            "catalog/products": bulk("products", lambda q: [c.public(p) for p in c.products]),
+            "catalog/new-products": bulk("new-products", lambda q: [c.public(p) for p in c.products[-50:]]),
+            "catalog/productscategories": bulk("productscategories", lambda q: [
+                {"id": p["id"], "product": p["id"], "category": p["category"], "position": 1} for p in c.products]),
+            "catalog/productsimages": bulk("productsimages", lambda q: [c.product_images(p) for p in c.products]),
+            "catalog/productsinformation": bulk("productsinformation", lambda q: [
+                c.product_information(p, lang(q)) for p in c.products]),
+            "catalog/productprices": bulk("productprices", lambda q: [
+                {k: p[k] for k in ("id", "sku", "wholesalePrice", "retailPrice", "inShopsPrice")}
+                for p in c.products]),
+            "catalog/productvariationprices": bulk("productvariationprices", lambda q: [
+                {k: v[k] for k in ("id", "sku", "wholesalePrice", "retailPrice", "inShopsPrice")}
+                for v in c.variations]),
+            "catalog/productsstockbyhandlingdays": bulk("productsstockbyhandlingdays", lambda q: [
+                c.product_stock(p["id"]) for p in c.products]),
+            "catalog/productstags": bulk("productstags", lambda q: [
+                tag for p in c.products for tag in c.product_tags(p, lang(q))]),
+            "catalog/productstockbyhandlingdays/*": lambda q, p, b: c.product_stock(product(p)["id"]),
+            "catalog/productsvariations": bulk("productsvariations", lambda q: [c.public(v) for v in c.variations]),
+            "catalog/productsvariationsstockbyhandlingdays": bulk("productsvariationsstockbyhandlingdays", lambda q: [
+                c.product_stock(v["id"]) for v in c.variations]),
+            "catalog/producttags/*": lambda q, p, b: [
+                c.tag(tag_id, lang(q)) for tag_id in product(p)["_tags"]],
+            "catalog/producttaxonomies/*": lambda q, p, b: [
+                {"id": product(p)["taxonomy"], "taxonomy": product(p)["taxonomy"], "product": product(p)["id"]}],
+            "catalog/productvariations/*": lambda q, p, b: [
+                c.public(v) for v in c.variations if v["product"] == product(p)["id"]],
+            "catalog/productvariationsstockbyhandlingdays/*": lambda q, p, b: [
+                c.product_stock(v["id"]) for v in c.variations if v["product"] == product(p)["id"]],
+            "catalog/productstaxonomies": bulk("productstaxonomies", lambda q: [
+                {"id": p["taxonomy"], "taxonomy": p["taxonomy"], "product": p["id"]} for p in c.products]),
+            "catalog/tag/*": lambda q, p, b: c.tag(_index(c.tags, p) + 1, lang(q)),
+            "catalog/tagalllanguages/*": lambda q, p, b: [c.tag(_index(c.tags, p) + 1, iso) for iso in c.languages],
+            "catalog/tags": bulk("tags", lambda q: [c.tag(t["id"], lang(q)) for t in c.tags]),
+            "catalog/taxonomies": bulk("taxonomies", lambda q: [c.taxonomy(t, lang(q)) for t in c.taxonomies]),
+            "catalog/taxonomyalllanguages/*": lambda q, p, b: [
+                c.taxonomy(c.taxonomies[_index(c.taxonomies, p)], iso) for iso in c.languages],
+            "catalog/variation/*": lambda q, p, b: self._variation(p),
+            "catalog/variations": bulk("variations", lambda q: [
+                {"id": v["id"], "attributes": [{"id": a} for a in v["_attributes"]]} for v in c.variations]),
+            # shipping
+            "shipping/carriers": lambda q, p, b: [
+                {"id": "1", "name": "Correos", "shippingServices": [
+                    {"id": "1", "delay": "2-3 days", "name": "Correos", "pod": False}]},
+                {"id": "43", "name": "Chrono", "shippingServices": [
+                    {"id": "43", "delay": "1-2 days", "name": "Chrono", "pod": True}]},
+            ],
+            "shipping/lowest-shipping-costs-by-country/*": bulk("lowest-shipping-costs", lambda q: [
+                {"reference": p["sku"], "cost": str(round(4 + p["weight"] * 0.5, 2)), "carrierId": "43",
+                 "carrierName": "Chrono"} for p in c.products]),
+            # orders
+            "order/*": self._get_order,
+            "order/orderstatuses": lambda q, p, b: [{"id": i, "name": name} for i, name in ORDER_STATUSES],
+            "order/reference/*": self._get_order_by_reference,
+            "order/delivery-notes/*": self._get_delivery_notes,
+            # tracking
+            "tracking/carriers": lambda q, p, b: [{"id": "1", "name": "Correos"}, {"id": "43", "name": "Chrono"}],
+            "tracking/order/*": lambda q, p, b: self._tracking(self._order(p)),
+            # user
+            "user/purse": lambda q, p, b: str(round(self.purse_amount, 2)).encode("utf-8"),
+            "user/auth/status": lambda q, p, b: b"",
+        }
+
+    def _product_information_by_sku(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        record = self.catalog.by_sku.get(param or "")
+        if record is None:
+            raise _FakeHTTPError(404, {"code": 404, "message": "Product not found"})
+        product = self.catalog.products_by_id[record.get("product", record["id"])]
+        iso_code = query.get("isoCode") or self.catalog.languages[0]
+        return {**self.catalog.product_information(product, iso_code), "sku": record["sku"]}
+
+    def _variation(self, param: Optional[str]) -> dict[str, Any]:
+        try:
+            variation = self.catalog.variations_by_id[int(param or "")]
+        except (ValueError, KeyError):
+            raise _FakeHTTPError(404, {"code": 404, "message": "Variation not found"})
+        return {"id": variation["id"], "attributes": [{"id": a} for a in variation["_attributes"]]}
+
+    # orders
+
+    def _order_lines(self, order: dict[str, Any]) -> list[tuple[dict[str, Any], int]]:
+        lines = []
+        missing = []
+        for line in order.get("products", []):
+            record = self.catalog.by_sku.get(line["reference"])
+            if record is None:
+                missing.append(line["reference"])
+            else:
+                lines.append((record, int(line["quantity"])))
+
+        if missing:
+            raise _FakeHTTPError(409, {"code": "ER001", "message": json.dumps(
+                {"info": "Product not found", "data": {"skus": missing}})})
+
+        if not order.get("shippingAddress", {}).get("postcode"):
+            raise _FakeHTTPError(409, {"code": "ER004", "message": json.dumps(
+                {"info": "Invalid zipcode format", "data": {"zipExample": "46005"}})})
+
+        out_of_stock = [record["sku"] for record, quantity in lines
+                        if sum(s["quantity"] for s in self.catalog.stocks[record["id"]]) < quantity]
+        if out_of_stock:
+            raise _FakeHTTPError(409, {"code": "ER003", "message": json.dumps(
+                {"info": "Not enough stock", "data": {"skus": out_of_stock}})})
+
+        return lines
+
+    def _warehouses(self, lines: list[tuple[dict[str, Any], int]]) -> dict[int, list[tuple[dict[str, Any], int]]]:
+        by_warehouse: dict[int, list[tuple[dict[str, Any], int]]] = {}
+        for record, quantity in lines:
+            warehouse = self.catalog.stocks[record["id"]][0]["warehouse"]
+            by_warehouse.setdefault(warehouse, []).append((record, quantity))
+        return by_warehouse
+
+    @staticmethod
+    def _totals(lines: list[tuple[dict[str, Any], int]]) -> dict[str, float]:
+        subtotal = round(sum(record["wholesalePrice"] * quantity for record, quantity in lines), 2)
+        shipping = 4.0
+        return {"totalWithoutTaxesAndWithoutShippingCost": subtotal,
+                "totalWithoutTaxes": round(subtotal + shipping, 2),
+                "total": round((subtotal + shipping) * 1.21, 2)}
+
+    def _split_error(self, by_warehouse: dict[int, list[tuple[dict[str, Any], int]]]) -> "_FakeHTTPError":
+        return _FakeHTTPError(409, {
+            "code": 409,
+            "message": "This cart contains products from different warehouses. You must send separate requests "
+                       "for each set of product references to obtain the shipping costs for each set of products.",
+            "error_detail": {"warehouses": [
+                {"id": warehouse, "references": [record["sku"] for record, _ in lines]}
+                for warehouse, lines in by_warehouse.items()]},
+        })
+
+    def _check_order(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        lines = self._order_lines(body["order"])
+        by_warehouse = self._warehouses(lines)
+        if len(by_warehouse) > 1:
+            raise self._split_error(by_warehouse)
+        return self._totals(lines)
+
+    def _check_multi_shipping_order(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        lines = self._order_lines(body["order"])
+        return {"orders": [{**self._totals(group), "warehouse": warehouse,
+                            "productReferences": [record["sku"] for record, _ in group]}
+                           for warehouse, group in self._warehouses(lines).items()],
+                "errors": []}
+
+    def _place_order(self, order: dict[str, Any], lines: list[tuple[dict[str, Any], int]], *,
+                     check_reference: bool = True) -> _FakeOrder:
+        total = self._totals(lines)["total"]
+        with self._lock:
+            if total > self.purse_amount:
+                raise _FakeHTTPError(409, {"code": "ER005", "message": json.dumps(
+                    {"info": "Not enough money in the purse",
+                     "data": {"moneyBoxAmount": self.purse_amount, "totalOrder": total}})})
+
+            reference = order.get("internalReference") if check_reference else None
+            for existing in self.orders.values():
+                if reference and existing.order.get("internalReference") == reference:
+                    raise _FakeHTTPError(409, {"code": "ER008", "message": json.dumps(
+                        {"info": "Order already exists", "data": {"orderId": existing.id}})})
+
+            self.purse_amount -= total
+            order_id = self._next_order_id
+            self._next_order_id += 1
+            fake_order = _FakeOrder(order_id, order, [record for record, _ in lines], total)
+            self.orders[order_id] = fake_order
+        return fake_order
+
+    def _create_order(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        lines = self._order_lines(body["order"])
+        by_warehouse = self._warehouses(lines)
+        if len(by_warehouse) > 1:
+            raise self._split_error(by_warehouse)
+
+        fake_order = self._place_order(body["order"], lines)
+        return _FakeResponse(201, b"", {"Location": f"/rest/order/{fake_order.id}"})
+
+    def _create_multi_shipping_order(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        lines = self._order_lines(body["order"])
+        orders = []
+        for i, (warehouse, group) in enumerate(self._warehouses(lines).items()):
+            # The orders of the different warehouses share the internal reference
+            fake_order = self._place_order(body["order"], group, check_reference=i == 0)
+            orders.append({"productReferences": [record["sku"] for record, _ in group], "id": str(fake_order.id),
+                           "warehouse": warehouse, "url": f"/rest/order/{fake_order.id}"})
+        return {"orders": orders, "errors": []}
+
+    def _order(self, param: Optional[str]) -> _FakeOrder:
+        try:
+            return self.orders[int(param or "")]
+        except (ValueError, KeyError):
+            raise _FakeHTTPError(404, {"code": 404, "message": "Order not found"})
+
+    @staticmethod
+    def _order_dict(fake_order: _FakeOrder) -> dict[str, Any]:
+        order = fake_order.order
+        quantities = {line["reference"]: int(line["quantity"]) for line in order.get("products", [])}
+        return {
+            "id": str(fake_order.id),
+            "internalReference": order.get("internalReference", ""),
+            "dateAdd": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(fake_order.created)),
+            "totalPaidTaxIncl": fake_order.total,
+            "totalPaidTaxExcl": round(fake_order.total / 1.21, 2),
+            "totalShippingTaxExcl": 4.0,
+            "totalShippingTaxIncl": 4.84,
+            "status": fake_order.status,
+            "carriers": [{"id": "43", "name": "Chrono", "price": 4.0}],
+            "shippingAddress": order.get("shippingAddress", {}),
+            "products": [{"id": str(record["id"]), "reference": record["sku"], "quantity": quantities[record["sku"]],
+                          "name": record["sku"], "priceTaxExcl": record["wholesalePrice"],
+                          "priceTaxIncl": round(record["wholesalePrice"] * 1.21, 2)}
+                         for record in fake_order.products],
+        }
+
+    def _get_order(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        return self._order_dict(self._order(param))
+
+    def _get_order_by_reference(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        for fake_order in self.orders.values():
+            if fake_order.order.get("internalReference") == param:
+                return {"id": str(fake_order.id), "totalPaidTaxIncl": str(fake_order.total)}
+        raise _FakeHTTPError(404, {"code": 404, "message": "Order not found"})
+
+    def _get_delivery_notes(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        fake_order = self._order(param)
+        order = self._order_dict(fake_order)
+        return [{"reference": f"DN{fake_order.id}", "order": order["id"], "status": "Shipped", "carrier": "Chrono",
+                 "numberOfPackages": 1,
+                 "products": [{"reference": p["reference"], "quantity": p["quantity"]} for p in order["products"]]}]
+
+    # shipping & tracking
+
+    def _shipping_order(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        order = body["order"]
+        references = [line["reference"] for line in order.get("products", [])]
+        weight = sum(self.catalog.by_sku[ref].get("weight", 1) for ref in references if ref in self.catalog.by_sku)
+        return {"shippingOptions": [
+            {"shippingService": {"id": 43, "name": "Chrono", "delay": "1-2 days"}, "cost": round(4 + weight * 0.5, 2),
+             "weight": round(weight, 2)}]}
+
+    def _lowest_shipping_cost(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        reference = body["product_country"]["reference"]
+        record = self.catalog.by_sku.get(reference)
+        if record is None:
+            return {"reference": reference}
+        return {"reference": reference, "cost": str(round(4 + record.get("weight", 1) * 0.5, 2)), "carrierId": "43",
+                "carrierName": "Chrono"}
+
+    @staticmethod
+    def _tracking(fake_order: _FakeOrder) -> list[dict[str, Any]]:
+        description = "Delivered" if fake_order.status == "Delivered" else "In transit"
+        return [{"id": fake_order.id, "reference": f"DN{fake_order.id}", "trackings": [
+            {"trackingNumber": f"TRK{fake_order.id:010d}", "statusDescription": description,
+             "statusDate": "2026-01-02 10:00:00", "carrier": {"id": "43"}, "descriptionTranslated": description}]}]
+
+    def _tracking_orders(self, query: dict[str, str], param: Optional[str], body: Any) -> Any:
+        trackings = []
+        for order in body["track"]["orders"]:
+            fake_order = self.orders.get(int(order["id"]))
+            if fake_order is not None:
+                trackings.extend(self._tracking(fake_order))
+        return trackings
+
+
+class _FakeResponse:
+    def __init__(self, status: int, body: bytes, headers: dict[str, str]):
+        self.status = status
+        self.body = body
+        self.headers = headers
+
+
+class _FakeHTTPError(Exception):
+    def __init__(self, status: int, payload: dict[str, Any]):
+        super().__init__(status)
+        self.status = status
+        self.payload = payload
+
+
+def _index(records: list[dict[str, Any]], param: Optional[str]) -> int:
+    """Return the index of the record with the given id, or raise a 404 error."""
+    try:
+        record_id = int(param or "")
+    except ValueError:
+        record_id = -1
+    for i, record in enumerate(records):
+        if record["id"] == record_id:
+            return i
+    raise _FakeHTTPError(404, {"code": 404, "message": "Not found"})
@@ -0,0 +1,240 @@
+"""
+bigbuy.hedging
+~~~~~~~~~~~~~~
+
+Hedged requests for latency-critical reads: if a ``GET`` on a hedged endpoint doesn't complete within a delay based on
+the recent latencies of the endpoint, the same request is sent a second time and the first response wins.
+
+Usage::
+
+    hedging = HedgingPolicy(percentile=90)
+    client = BigBuy(app_key, hedging=hedging, rate_limiter=RateLimiter(rate=5, burst=5))
+    ...
+    print(hedging.stats.as_dict())
+
+Hedged requests are only sent when the client's rate-limiter (if any) has a token available right now, and when the
+hedging budget allows it, so hedging never makes the client exceed its rate-limit nor doubles its traffic.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, as_completed
+from typing import Optional, Callable, Any, Iterable, TYPE_CHECKING
+
+from .resilience import RetryBudget
+
+if TYPE_CHECKING:
+    import requests
+
+__all__ = ['DEFAULT_HEDGED_ENDPOINTS', 'HedgingPolicy', 'HedgingStats', 'LatencyTracker']
+
+DEFAULT_HEDGED_ENDPOINTS = frozenset({
+    "catalog/productstockbyhandlingdays/{id}",
+    "order/{id}",
+})
+
+_default: Any = object()
+
+
+class HedgingStats:
+    """
+    Hedging metrics.
+
+    * ``requests``: number of calls on hedged endpoints
+    * ``hedged``: number of calls for which a hedged request was sent
+    * ``hedge_wins``: number of calls for which the hedged request responded first
+    * ``cancelled``: number of hedged requests cancelled before being sent
+    * ``latency_saved``: total number of seconds saved by hedge wins, i.e. the sum of the differences between the end
+      of the losing primary request and the end of the winning hedged request
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+        self.latency_saved = 0.0
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "cancelled": self.cancelled,
+                "latency_saved": self.latency_saved,
+                "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            }
+
+    def __repr__(self) -> str:
+        return f"<HedgingStats {self.as_dict()}>"
+
+
+class LatencyTracker:
+    """
+    Sliding window of the latest latencies of an endpoint.
+
+    :param window: number of latencies to keep
+    """
+
+    def __init__(self, window: int = 200):
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Return the given percentile (0-100) of the latencies, or ``None`` if there are none."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
+
+
+class HedgingPolicy:
+    """
+    Hedging policy of a ``BigBuy`` client.
+
+    :param endpoints: endpoint templates to hedge. Only ``GET`` requests are hedged.
+    :param percentile: send the hedged request after this percentile of the recent latencies of the endpoint
+    :param initial_delay: delay used until ``min_samples`` latencies have been recorded for the endpoint
+    :param min_delay: minimum delay before sending a hedged request
+    :param max_delay: maximum delay before sending a hedged request
+    :param min_samples: number of latencies needed before using the percentile
+    :param window: number of recent latencies to keep per endpoint
+    :param budget: budget of hedged requests. By default, at most 10% of the calls can be hedged. Use ``None`` to
+      disable it.
+    :param max_workers: maximum number of threads used to send requests
+    """
+
+    def __init__(self, *,
+                 endpoints: Iterable[str] = DEFAULT_HEDGED_ENDPOINTS,
+                 percentile: float = 95,
+                 initial_delay: float = 1,
+                 min_delay: float = 0.05,
+                 max_delay: float = 5,
+                 min_samples: int = 20,
+                 window: int = 200,
+                 budget: Optional[RetryBudget] = _default,
+                 max_workers: int = 16):
+        self.endpoints = frozenset(endpoints)
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.budget: Optional[RetryBudget] = RetryBudget(ratio=0.1, min_retries_per_second=0, max_tokens=10) \
+            if budget is _default else budget
+        self.max_workers = max_workers
+        self.stats = HedgingStats()
+        self.latencies: dict[str, LatencyTracker] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _tracker(self, endpoint: str) -> LatencyTracker:
+        tracker = self.latencies.get(endpoint)
+        if tracker is None:
+            with self._lock:
+                tracker = self.latencies.setdefault(endpoint, LatencyTracker(self.window))
+        return tracker
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="bigbuy-hedging")
+        return self._executor
+
+    def hedge_delay(self, endpoint: str) -> float:
+        """Return the number of seconds to wait before sending a hedged request for the given endpoint."""
+        tracker = self._tracker(endpoint)
+        if len(tracker) < self.min_samples:
+            return self.initial_delay
+        delay = tracker.percentile(self.percentile)
+        if delay is None:  # pragma: nocover
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def call(self, endpoint: str, send: Callable[[], "requests.Response"],
+             can_hedge: Callable[[], bool] = lambda: True) -> "requests.Response":
+        """
+        Call ``send``, and call it a second time if it takes longer than the hedge delay of the endpoint. Return the
+        first response.
+
+        :param endpoint: endpoint template
+        :param send: function that sends the request
+        :param can_hedge: function called before sending a hedged request; if it returns ``False``, no hedged request
+          is sent
+        """
+        executor = self._get_executor()
+        tracker = self._tracker(endpoint)
+        self.stats.increment("requests")
+        if self.budget is not None:
+            self.budget.record_request()
+
+        start = time.perf_counter()
+        primary = executor.submit(send)
+        primary.add_done_callback(lambda _: tracker.record(time.perf_counter() - start))
+
+        done, _ = wait([primary], timeout=self.hedge_delay(endpoint))
+        if done or (self.budget is not None and not self.budget.try_retry()):
+            return primary.result()
+        if not can_hedge():
+            if self.budget is not None:
+                self.budget.refund()
+            return primary.result()
+
+        self.stats.increment("hedged")
+        hedge = executor.submit(send)
+
+        winner: "Optional[Future[requests.Response]]" = None
+        error: Optional[BaseException] = None
+        for future in as_completed([primary, hedge]):
+            if (exception := future.exception()) is not None:
+                error = error or exception
+                continue
+            winner = future
+            break
+
+        if winner is None:
+            assert error is not None
+            raise error
+
+        end = time.perf_counter()
+        loser = hedge if winner is primary else primary
+        if winner is hedge:
+            self.stats.increment("hedge_wins")
+
+        if loser.cancel():
+            self.stats.increment("cancelled")
+        else:
+            loser.add_done_callback(lambda future: self._loser_done(future, end, hedge_won=winner is hedge))
+
+        return winner.result()
+
+    def _loser_done(self, future: "Future[requests.Response]", winner_end: float, hedge_won: bool) -> None:
+        if hedge_won:
+            self.stats.increment("latency_saved", max(0.0, time.perf_counter() - winner_end))
+        if future.exception() is None:
+            # Release the connection
+            future.result().close()
+
+    def shutdown(self) -> None:
+        """Shut down the threads used to send requests."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
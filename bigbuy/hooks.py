@@ -0,0 +1,81 @@
+"""
+bigbuy.hooks
+~~~~~~~~~~~~
+
+Request lifecycle hooks. Hooks are callables registered on a ``BigBuy`` client with ``add_hook`` and called with
+keyword arguments only. They all receive ``method`` and ``endpoint``, the latter being the endpoint template (e.g.
+``catalog/product/{id}``) rather than the raw path, so that it can safely be used as a metric label or a span name.
+
+* ``before_request``: called before each HTTP request.
+* ``after_response``: called after each HTTP response, with ``response`` and ``elapsed`` (seconds).
+* ``on_error``: called when a request fails, with ``error`` (the exception about to be raised).
+* ``on_rate_limit_wait``: called before waiting for a rate-limit to expire, with ``rate_limit`` and ``wait_seconds``.
+* ``on_retry``: called before a request is retried, with ``attempt`` (starting at 1) and ``reason``.
+"""
+from typing import Callable, Any
+
+__all__ = [
+    'BEFORE_REQUEST', 'AFTER_RESPONSE', 'ON_ERROR', 'ON_RATE_LIMIT_WAIT', 'ON_RETRY', 'HOOK_EVENTS',
+    'Hook', 'endpoint_template',
+]
+
+BEFORE_REQUEST = "before_request"
+AFTER_RESPONSE = "after_response"
+ON_ERROR = "on_error"
+ON_RATE_LIMIT_WAIT = "on_rate_limit_wait"
+ON_RETRY = "on_retry"
+
+HOOK_EVENTS = (BEFORE_REQUEST, AFTER_RESPONSE, ON_ERROR, ON_RATE_LIMIT_WAIT, ON_RETRY)
+
+Hook = Callable[..., Any]
+
+# Endpoints whose last path segment is a parameter, mapped to their template.
+_PARAMETRIZED_ENDPOINTS: dict[str, str] = {
+    prefix: f"{prefix}/{{{param}}}"
+    for prefix, param in (
+        ("catalog/attribute", "id"),
+        ("catalog/attributealllanguages", "id"),
+        ("catalog/attributegroup", "id"),
+        ("catalog/attributegroupalllanguages", "id"),
+        ("catalog/manufacturer", "id"),
+        ("catalog/product", "id"),
+        ("catalog/productcategories", "id"),
+        ("catalog/productcompliance", "id"),
+        ("catalog/productimages", "id"),
+        ("catalog/productinformation", "id"),
+        ("catalog/productinformationalllanguages", "id"),
+        ("catalog/productinformationbysku", "sku"),
+        ("catalog/productstockbyhandlingdays", "id"),
+        ("catalog/producttags", "id"),
+        ("catalog/producttaxonomies", "id"),
+        ("catalog/productvariations", "id"),
+        ("catalog/productvariationsstockbyhandlingdays", "id"),
+        ("catalog/tag", "id"),
+        ("catalog/tagalllanguages", "id"),
+        ("catalog/taxonomyalllanguages", "id"),
+        ("catalog/variation", "id"),
+        ("order", "id"),
+        ("order/delivery-notes", "id"),
+        ("order/reference", "reference"),
+        ("shipping/lowest-shipping-costs-by-country", "country"),
+        ("tracking/order", "id"),
+    )
+}
+
+# Fixed endpoints that would otherwise be mistaken for parametrized ones
+_FIXED_ENDPOINTS = frozenset({"order/check", "order/create", "order/orderstatuses", "order/upload_invoice"})
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Return the endpoint template for an API path. Paths that don't contain a parameter are returned as-is.
+
+        >>> endpoint_template("catalog/product/123")
+        'catalog/product/{id}'
+        >>> endpoint_template("catalog/products")
+        'catalog/products'
+    """
+    prefix, sep, _ = path.rpartition("/")
+    if sep and path not in _FIXED_ENDPOINTS and (template := _PARAMETRIZED_ENDPOINTS.get(prefix)):
+        return template
+    return path
@@ -0,0 +1,123 @@
+"""
+bigbuy.languages
+~~~~~~~~~~~~~~~~
+
+Fetch language-specific bulk endpoints in all languages at once, and merge the results into one record per id.
+
+Usage::
+
+    fetcher = MultiLanguageFetcher(client)  # all the languages of get_languages
+    products = fetcher.fetch("get_products_information")
+    products[123]
+    # {"id": 123, "sku": "S0123", "name": {"en": "Knife", "fr": "Couteau"}, "description": {...}, "url": {...}}
+
+The requests for the different languages are sent concurrently. They go through the client, so they share its
+rate-limiter: with a ``RateLimiter`` the fetch is as fast as the rate-limit allows, instead of one language after the
+other. Fields that have the same value in all languages, such as ``sku``, are stored once in the merged record; only
+the other fields are keyed by language.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Callable, Hashable, Iterable, Mapping, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['LANGUAGE_FIELDS', 'MultiLanguageFetcher', 'merge_languages']
+
+# Fields that hold the language of a record; they are removed from merged records
+LANGUAGE_FIELDS = frozenset({"isoCode", "language"})
+
+_missing: Any = object()
+
+
+def _id(record: Mapping[str, Any]) -> Hashable:
+    return record["id"]
+
+
+def merge_languages(records_by_language: Mapping[str, Iterable[Mapping[str, Any]]], *,
+                    key: Callable[[Mapping[str, Any]], Hashable] = _id,
+                    localized_fields: Optional[Iterable[str]] = None) -> dict[Hashable, dict[str, Any]]:
+    """
+    Merge the records of several languages into one record per key.
+
+    :param records_by_language: records of each language, by ISO code
+    :param key: function that returns the key of a record. Default to its ``id``.
+    :param localized_fields: fields whose values are keyed by language in merged records. By default, these are the
+      fields that have different values in different languages for at least one record. The other fields are stored
+      once, with their value in the first language that has the record.
+    :return: merged records, by key, in the order of their first language
+    """
+    records: dict[Hashable, dict[str, dict[str, Any]]] = {}
+    for iso_code, language_records in records_by_language.items():
+        for record in language_records:
+            records.setdefault(key(record), {})[iso_code] = {
+                field: value for field, value in record.items() if field not in LANGUAGE_FIELDS}
+
+    if localized_fields is None:
+        localized = set()
+        for translations in records.values():
+            first, *others = translations.values()
+            for other in others:
+                for field in first.keys() | other.keys():
+                    if field not in localized and first.get(field, _missing) != other.get(field, _missing):
+                        localized.add(field)
+    else:
+        localized = set(localized_fields)
+
+    merged: dict[Hashable, dict[str, Any]] = {}
+    for record_key, translations in records.items():
+        merged_record: dict[str, Any] = {}
+        for iso_code, translation in translations.items():
+            for field, value in translation.items():
+                if field in localized:
+                    merged_record.setdefault(field, {})[iso_code] = value
+                else:
+                    merged_record.setdefault(field, value)
+        merged[record_key] = merged_record
+    return merged
+
+
+class MultiLanguageFetcher:
+    """
+    Fetch bulk endpoints in several languages concurrently.
+
+    :param client: client. Its requests are sent from several threads.
+    :param languages: ISO codes of the languages. By default, all the languages of ``get_languages``.
+    :param max_workers: maximum number of concurrent requests. Default to the number of languages.
+    """
+
+    def __init__(self, client: "BigBuy", languages: Optional[Iterable[str]] = None,
+                 max_workers: Optional[int] = None):
+        self.client = client
+        if languages is None:
+            languages = [language["isoCode"] for language in client.get_languages()]
+        self.languages = list(languages)
+        self.max_workers = max_workers or len(self.languages) or 1
+
+    def fetch_all(self, method_name: str, **params: Any) -> dict[str, list[Any]]:
+        """
+        Call a method of the client once per language, concurrently, and return the records of each language.
+
+        :param method_name: name of a method of the client that takes an ``isoCode`` parameter, e.g.
+          ``"get_products_information"``
+        :param params: other parameters of the method
+        """
+        method = getattr(self.client, method_name)
+        with ThreadPoolExecutor(min(self.max_workers, len(self.languages) or 1),
+                                thread_name_prefix="bigbuy-languages") as executor:
+            futures = {iso_code: executor.submit(method, isoCode=iso_code, **params) for iso_code in self.languages}
+            # Raise the error of the first language that failed, if any
+            return {iso_code: future.result() or [] for iso_code, future in futures.items()}
+
+    def fetch(self, method_name: str, *,
+              key: Callable[[Mapping[str, Any]], Hashable] = _id,
+              localized_fields: Optional[Iterable[str]] = None,
+              **params: Any) -> dict[Hashable, dict[str, Any]]:
+        """
+        Call a method of the client in all languages and merge the results with ``merge_languages``.
+
+        Records that are not unique by id need another key, e.g. for product tags::
+
+            fetcher.fetch("get_products_tags", key=lambda record: (record["id"], record["tag"]["id"]))
+        """
+        return merge_languages(self.fetch_all(method_name, **params), key=key, localized_fields=localized_fields)
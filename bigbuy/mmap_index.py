@@ -0,0 +1,306 @@
+"""
+bigbuy.mmap_index
+~~~~~~~~~~~~~~~~~
+
+Read-only catalog index in a memory-mapped file, to share the catalog lookup tables between processes.
+
+Build (e.g. in a cron job)::
+
+    build_catalog_index(client, "/data/catalog.idx")
+
+Use (e.g. in each web worker)::
+
+    index = CatalogIndex("/data/catalog.idx")
+    record = index.by_sku("S0123456")
+    print(record.id, record.retail_price, record.stock)
+    ...
+    index.reload_if_changed()
+
+The file contains fixed-width records followed by three open-addressing hash tables that map the id, the SKU and the EAN
+of a product or variation to its record. Product and variation ids are separate sequences, so the id table is keyed on
+the id and the kind of record: use ``by_id`` for products and ``by_variation_id`` for variations. All processes that
+open the file share the same pages of the OS page cache: nothing is copied nor parsed when the file is opened, and each
+lookup reads a few slots and one record.
+
+A new version of the index is written to a temporary file and atomically renamed over the previous one. Processes that
+have the previous version open keep reading it until they call ``reload_if_changed``.
+"""
+import hashlib
+import mmap
+import operator
+import os
+import struct
+import time
+from typing import Optional, Any, Callable, Iterable, Iterator, NamedTuple, Union, TYPE_CHECKING
+
+from .sync import _atomic_write
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['IndexRecord', 'CatalogIndex', 'write_catalog_index', 'build_catalog_index']
+
+Path = Union[str, "os.PathLike[str]"]
+
+MAGIC = b"BBIDX02\n"
+SKU_SIZE = 24
+
+# magic, record count, table size (number of slots of each hash table), build time
+_HEADER = struct.Struct("<8sQQd")
+# id, parent product id (0 for products), EAN (0 if none), wholesale, retail and in-shops prices, stock, flags, SKU
+_RECORD = struct.Struct(f"<qqQdddiB3x{SKU_SIZE}s")
+_SLOT = struct.Struct("<I")
+
+FLAG_VARIATION = 1
+
+
+class IndexRecord(NamedTuple):
+    """Record of a product or a variation in the index."""
+    id: int
+    sku: str
+    ean: int
+    wholesale_price: float
+    retail_price: float
+    in_shops_price: float
+    stock: int
+    product_id: int = 0
+    is_variation: bool = False
+
+
+def _hash_bytes(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _hash_int(key: int) -> int:
+    return _hash_bytes(key.to_bytes(8, "little", signed=True))
+
+
+def _hash_id(record_id: int, is_variation: bool) -> int:
+    # Products and variations have separate id sequences
+    return _hash_bytes(record_id.to_bytes(8, "little", signed=True) + (b"v" if is_variation else b"p"))
+
+
+def _table_size(count: int) -> int:
+    """Number of slots of a hash table: a power of two, at least twice the number of records."""
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    return size
+
+
+def _parse_ean(ean: Any) -> int:
+    if isinstance(ean, str) and ean.isdigit():
+        return int(ean)
+    return 0
+
+
+def write_catalog_index(path: Path, records: Iterable[IndexRecord]) -> int:
+    """
+    Write an index file atomically. When several products (or several variations) have the same id, or several
+    records have the same SKU or EAN, lookups return the first one. A product and a variation can have the same id.
+
+    :return: the number of records written
+    """
+    records = list(records)
+    count = len(records)
+    size = _table_size(count)
+    mask = size - 1
+
+    data = bytearray(_HEADER.size + count * _RECORD.size + 3 * size * _SLOT.size)
+    _HEADER.pack_into(data, 0, MAGIC, count, size, time.time())
+
+    tables_offset = _HEADER.size + count * _RECORD.size
+    tables = [bytearray(size * _SLOT.size) for _ in range(3)]
+
+    def insert(table: bytearray, hash_value: int, position: int, keys: dict[Any, int], key: Any) -> None:
+        if key in keys:
+            return
+        keys[key] = position
+        slot = hash_value & mask
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        # Slots store positions + 1 so that 0 means empty
+        _SLOT.pack_into(table, slot * _SLOT.size, position + 1)
+
+    ids: dict[Any, int] = {}
+    skus: dict[Any, int] = {}
+    eans: dict[Any, int] = {}
+    for position, record in enumerate(records):
+        sku = record.sku.encode("utf-8")
+        if len(sku) > SKU_SIZE:
+            raise ValueError(f"SKU {record.sku!r} is longer than {SKU_SIZE} bytes")
+
+        _RECORD.pack_into(data, _HEADER.size + position * _RECORD.size,
+                          record.id, record.product_id, record.ean, record.wholesale_price, record.retail_price,
+                          record.in_shops_price, record.stock, FLAG_VARIATION if record.is_variation else 0, sku)
+
+        insert(tables[0], _hash_id(record.id, record.is_variation), position, ids,
+               (record.id, record.is_variation))
+        insert(tables[1], _hash_bytes(sku), position, skus, sku)
+        if record.ean:
+            insert(tables[2], _hash_int(record.ean), position, eans, record.ean)
+
+    for i, table in enumerate(tables):
+        offset = tables_offset + i * len(table)
+        data[offset:offset + len(table)] = table
+
+    _atomic_write(os.path.abspath(path), bytes(data))
+    return count
+
+
+def build_catalog_index(client: "BigBuy", path: Path, *, include_variations: bool = True) -> int:
+    """
+    Build an index file from the bulk catalog endpoints: products, their stock and, optionally, variations and their
+    stock.
+
+    :return: the number of records written
+    """
+
+    def stock_by_id(stocks: Optional[list[Any]]) -> dict[int, int]:
+        return {stock["id"]: sum(s["quantity"] for s in stock["stocks"]) for stock in stocks or ()}
+
+    product_stocks = stock_by_id(client.get_products_stock_by_handling_days())
+    records = [
+        IndexRecord(product["id"], product["sku"], _parse_ean(product.get("ean13")),
+                    product["wholesalePrice"], product["retailPrice"], product["inShopsPrice"],
+                    product_stocks.get(product["id"], 0))
+        for product in client.get_products() or ()
+    ]
+
+    if include_variations:
+        variation_stocks = stock_by_id(client.get_products_variations_stock_by_handling_days())
+        records.extend(
+            IndexRecord(variation["id"], variation["sku"], _parse_ean(variation.get("ean13")),
+                        variation["wholesalePrice"], variation["retailPrice"], variation["inShopsPrice"],
+                        variation_stocks.get(variation["id"], 0), variation["product"], True)
+            for variation in client.get_products_variations() or ()
+        )
+
+    return write_catalog_index(path, records)
+
+
+def _id_key(values: tuple[Any, ...]) -> tuple[int, bool]:
+    return values[0], bool(values[7] & FLAG_VARIATION)
+
+
+class _Mapping(NamedTuple):
+    """Mapped version of the index file. Lookups read it once, so that a reload can't mix two versions."""
+    mapped: mmap.mmap
+    records: int
+    mask: int
+    # offsets of the id, SKU and EAN tables
+    tables: tuple[int, int, int]
+
+
+class CatalogIndex:
+    """
+    Memory-mapped catalog index.
+
+    :param path: path of an index file written by ``write_catalog_index`` or ``build_catalog_index``
+    """
+
+    def __init__(self, path: Path):
+        self.path = os.fspath(path)
+        self._mapping: Optional[_Mapping] = None
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, size, built_at = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a catalog index file")
+
+        tables_offset = _HEADER.size + count * _RECORD.size
+        table_length = size * _SLOT.size
+        # The previous version is not closed: lookups in other threads may still be reading it. It's unmapped when
+        # the last of them drops it.
+        self._mapping = _Mapping(mapped, count, size - 1,
+                                 (tables_offset, tables_offset + table_length, tables_offset + 2 * table_length))
+        self._stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.count: int = count
+        self.built_at: float = built_at
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "CatalogIndex":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file. It must not be called while other threads use the index."""
+        if self._mapping is not None:
+            self._mapping.mapped.close()
+            self._mapping = None
+
+    def reload_if_changed(self) -> bool:
+        """
+        Map the file again if it was replaced by a new version. Return ``True`` if it was.
+
+        Lookups running in other threads finish with the previous version.
+        """
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._stat:
+            return False
+        self._open()
+        return True
+
+    @staticmethod
+    def _record(values: tuple[Any, ...]) -> IndexRecord:
+        record_id, product_id, ean, wholesale_price, retail_price, in_shops_price, stock, flags, sku = values
+        return IndexRecord(record_id, sku.rstrip(b"\0").decode("utf-8"), ean, wholesale_price, retail_price,
+                           in_shops_price, stock, product_id, bool(flags & FLAG_VARIATION))
+
+    def _get_mapping(self) -> _Mapping:
+        mapping = self._mapping
+        if mapping is None:
+            raise ValueError("The index is closed")
+        return mapping
+
+    def _lookup(self, table: int, hash_value: int, key_of: Callable[[tuple[Any, ...]], Any],
+                key: Any) -> Optional[IndexRecord]:
+        mapped, _, mask, tables = self._get_mapping()
+        table_offset = tables[table]
+
+        slot = hash_value & mask
+        while True:
+            position = _SLOT.unpack_from(mapped, table_offset + slot * _SLOT.size)[0]
+            if not position:
+                return None
+            values = _RECORD.unpack_from(mapped, _HEADER.size + (position - 1) * _RECORD.size)
+            if key_of(values) == key:
+                return self._record(values)
+            slot = (slot + 1) & mask
+
+    def by_id(self, product_id: int) -> Optional[IndexRecord]:
+        """Return the record of a product id, or ``None``."""
+        return self._lookup(0, _hash_id(product_id, False), _id_key, (product_id, False))
+
+    def by_variation_id(self, variation_id: int) -> Optional[IndexRecord]:
+        """Return the record of a variation id, or ``None``."""
+        return self._lookup(0, _hash_id(variation_id, True), _id_key, (variation_id, True))
+
+    def by_sku(self, sku: str) -> Optional[IndexRecord]:
+        """Return the record of a SKU, or ``None``."""
+        key = sku.encode("utf-8")
+        if len(key) > SKU_SIZE:
+            return None
+        return self._lookup(1, _hash_bytes(key), operator.itemgetter(8), key.ljust(SKU_SIZE, b"\0"))
+
+    def by_ean(self, ean: Union[int, str]) -> Optional[IndexRecord]:
+        """Return the record of an EAN, or ``None``."""
+        key = _parse_ean(ean) if isinstance(ean, str) else ean
+        if not key:
+            return None
+        return self._lookup(2, _hash_int(key), operator.itemgetter(2), key)
+
+    def __iter__(self) -> Iterator[IndexRecord]:
+        mapped, count, _, _ = self._get_mapping()
+        for position in range(count):
+            yield self._record(_RECORD.unpack_from(mapped, _HEADER.size + position * _RECORD.size))
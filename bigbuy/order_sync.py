@@ -0,0 +1,375 @@
+"""
+bigbuy.order_sync
+~~~~~~~~~~~~~~~~~
+
+Synchronization of the status of open orders.
+
+Usage::
+
+    engine = OrderSyncEngine.from_client(client)  # or OrderSyncEngine.load(client, "orders.json")
+    engine.track(order_id)
+    ...
+    # e.g. every minute:
+    for event in engine.run_cycle():
+        if event.type == STATUS_CHANGED:
+            update_order_status(event.order_id, event.new_status)
+        elif event.type == TRACKING_CHANGED:
+            update_tracking(event.order_id, event.data)
+    engine.save("orders.json")
+
+Instead of fetching every open order, its delivery notes and its tracking on every cycle, the engine keeps a local
+store of the open orders and schedules each one according to the state of its status, as mapped from
+``get_order_statuses``: orders waiting for payment or being processed are checked with ``get_order_by_id`` at the
+interval at which their status is expected to change, and the interval grows each time an order is checked without
+change. Shipped orders are checked with ``get_tracking_orders``, which fetches the trackings of many orders at once,
+and their status is only fetched when their tracking changes, or every few checks in case it isn't updated. Delivery
+notes are fetched once, when an order is shipped. Delivered and cancelled orders leave the store. Orders whose
+requests fail are reported with a ``CHECK_FAILED`` event and stay due, so that they are checked on the next cycle.
+
+Requests are sent concurrently through the client, so they share its rate-limiter and scheduler.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Callable, Iterable, Mapping, TypeVar, Union, TYPE_CHECKING
+
+import requests
+
+from .exceptions import BBError, BBResponseError
+from .sync import _atomic_write
+from .types import BBOrderStatusDict, BBTrackingOrderDict
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = [
+    'PENDING', 'PROCESSING', 'SHIPPED', 'CLOSED', 'DEFAULT_INTERVALS',
+    'STATUS_CHANGED', 'TRACKING_CHANGED', 'DELIVERY_NOTES', 'ORDER_CLOSED', 'ORDER_NOT_FOUND', 'CHECK_FAILED',
+    'OrderEvent', 'TrackedOrder', 'OrderSyncEngine', 'status_state',
+]
+
+# States of the statuses
+PENDING = "pending"
+PROCESSING = "processing"
+SHIPPED = "shipped"
+CLOSED = "closed"
+
+# Seconds between two checks of an order in each state, before backoff
+DEFAULT_INTERVALS: Mapping[str, float] = {
+    PENDING: 15 * 60,
+    PROCESSING: 60 * 60,
+    SHIPPED: 6 * 60 * 60,
+}
+
+# Orders checked first when the number of orders per cycle is limited. New orders have no state.
+_STATE_PRIORITIES = {None: 0, PROCESSING: 1, PENDING: 2, SHIPPED: 3}
+
+# Events
+STATUS_CHANGED = "status_changed"
+TRACKING_CHANGED = "tracking_changed"
+DELIVERY_NOTES = "delivery_notes"
+ORDER_CLOSED = "order_closed"
+ORDER_NOT_FOUND = "order_not_found"
+CHECK_FAILED = "check_failed"
+
+STORE_VERSION = 1
+
+_T = TypeVar("_T")
+
+
+def status_state(status: str) -> str:
+    """Return the state of an order status name, e.g. ``SHIPPED`` for ``"Shipped"``."""
+    status = status.lower()
+    if any(word in status for word in ("deliver", "cancel", "refund", "return")):
+        return CLOSED
+    if any(word in status for word in ("ship", "sent", "transit")):
+        return SHIPPED
+    if any(word in status for word in ("process", "prepar")):
+        return PROCESSING
+    return PENDING
+
+
+class OrderEvent:
+    """
+    Change of an order.
+
+    :param type: ``STATUS_CHANGED``, ``TRACKING_CHANGED``, ``DELIVERY_NOTES``, ``ORDER_CLOSED``, ``ORDER_NOT_FOUND``
+      or ``CHECK_FAILED``
+    :param order_id: id of the order
+    :param old_status: status before the change
+    :param new_status: status after the change
+    :param data: the order for ``STATUS_CHANGED`` and ``ORDER_CLOSED``, its tracking for ``TRACKING_CHANGED``, its
+      delivery notes for ``DELIVERY_NOTES``, the error for ``CHECK_FAILED``
+    """
+    __slots__ = ("type", "order_id", "old_status", "new_status", "data")
+
+    def __init__(self, type: str, order_id: str, old_status: Optional[str] = None, new_status: Optional[str] = None,
+                 data: Any = None):
+        self.type = type
+        self.order_id = order_id
+        self.old_status = old_status
+        self.new_status = new_status
+        self.data = data
+
+    def __repr__(self) -> str:
+        change = f" {self.old_status} -> {self.new_status}" if self.type == STATUS_CHANGED else ""
+        return f"<OrderEvent {self.type} {self.order_id}{change}>"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OrderEvent):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+class TrackedOrder:
+    """
+    Open order in the store.
+
+    :param id: id of the order
+    :param status: last known status, ``None`` until the order is fetched
+    :param state: state of the status
+    :param next_check: timestamp of the next check
+    :param unchanged_checks: number of checks since the last change
+    :param tracking: last known tracking numbers and their status
+    :param delivery_notes: ``True`` if the delivery notes were fetched
+    """
+    __slots__ = ("id", "status", "state", "next_check", "unchanged_checks", "tracking", "delivery_notes")
+
+    def __init__(self, id: str, status: Optional[str] = None, state: Optional[str] = None, next_check: float = 0,
+                 unchanged_checks: int = 0, tracking: Optional[list[list[str]]] = None, delivery_notes: bool = False):
+        self.id = id
+        self.status = status
+        self.state = state
+        self.next_check = next_check
+        self.unchanged_checks = unchanged_checks
+        self.tracking = tracking
+        self.delivery_notes = delivery_notes
+
+    def __repr__(self) -> str:
+        return f"<TrackedOrder {self.id} {self.status}>"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _attempt(function: Callable[[], _T]) -> tuple[Optional[_T], Optional[Exception]]:
+    """Call a function and return its result or the API error it raised."""
+    try:
+        return function(), None
+    except (BBError, requests.RequestException) as e:
+        return None, e
+
+
+def _tracking_signature(tracking: Optional[BBTrackingOrderDict]) -> list[list[str]]:
+    if not tracking:
+        return []
+    return [[t.get("trackingNumber", ""), t.get("statusDescription", "")] for t in tracking.get("trackings", [])]
+
+
+class OrderSyncEngine:
+    """
+    Keep the status of open orders up to date.
+
+    :param client: client
+    :param statuses: order statuses, as returned by ``get_order_statuses``. Their state is given by ``states`` or
+      ``status_state``. Statuses that are not listed are mapped with ``status_state``.
+    :param states: state of some status names, overriding ``status_state``
+    :param intervals: seconds between two checks of an order in each state. Default to ``DEFAULT_INTERVALS``.
+    :param backoff: factor applied to the interval of an order each time it's checked without change
+    :param max_backoff: maximum factor applied to the intervals
+    :param max_workers: maximum number of concurrent requests
+    :param tracking_batch_size: maximum number of orders per ``get_tracking_orders`` request
+    :param status_every: fetch the status of shipped orders whose tracking doesn't change every this number of checks
+    :param clock: clock, in seconds since the epoch. It must be persistent if the store is saved.
+    """
+
+    def __init__(self, client: "BigBuy", statuses: Iterable[BBOrderStatusDict] = (), *,
+                 states: Optional[Mapping[str, str]] = None,
+                 intervals: Optional[Mapping[str, float]] = None,
+                 backoff: float = 2,
+                 max_backoff: float = 8,
+                 max_workers: int = 8,
+                 tracking_batch_size: int = 100,
+                 status_every: int = 4,
+                 clock: Callable[[], float] = time.time):
+        self.client = client
+        self.states: dict[str, str] = {status["name"]: status_state(status["name"]) for status in statuses}
+        if states:
+            self.states.update(states)
+        self.intervals = DEFAULT_INTERVALS if intervals is None else intervals
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.tracking_batch_size = tracking_batch_size
+        self.status_every = status_every
+        self.clock = clock
+        self.orders: dict[str, TrackedOrder] = {}
+
+    @classmethod
+    def from_client(cls, client: "BigBuy", **kwargs: Any) -> "OrderSyncEngine":
+        """Create an engine with the statuses of ``get_order_statuses``."""
+        return cls(client, client.get_order_statuses(), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def state(self, status: str) -> str:
+        """Return the state of a status."""
+        state = self.states.get(status)
+        if state is None:
+            state = self.states[status] = status_state(status)
+        return state
+
+    def track(self, order_id: Union[str, int], status: Optional[str] = None) -> TrackedOrder:
+        """
+        Add an order to the store. Orders without a status are fetched on the next cycle.
+
+        :param order_id: id of the order
+        :param status: its current status, if known
+        """
+        order_id = str(order_id)
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.orders[order_id] = TrackedOrder(order_id)
+            if status is not None:
+                order.status = status
+                order.state = self.state(status)
+                self._schedule(order, self.clock())
+        return order
+
+    def untrack(self, order_id: Union[str, int]) -> None:
+        """Remove an order from the store."""
+        self.orders.pop(str(order_id), None)
+
+    def _schedule(self, order: TrackedOrder, now: float) -> None:
+        interval = self.intervals.get(order.state or PENDING, DEFAULT_INTERVALS[PENDING])
+        order.next_check = now + interval * min(self.backoff ** order.unchanged_checks, self.max_backoff)
+
+    def due(self, now: Optional[float] = None) -> list[TrackedOrder]:
+        """Return the orders to check, new and processing orders first, then the most overdue ones."""
+        if now is None:
+            now = self.clock()
+        due = [order for order in self.orders.values() if order.next_check <= now]
+        due.sort(key=lambda order: (_STATE_PRIORITIES.get(order.state, 2), order.next_check))
+        return due
+
+    def run_cycle(self, max_orders: Optional[int] = None,
+                  on_event: Optional[Callable[[OrderEvent], None]] = None) -> list[OrderEvent]:
+        """
+        Check the orders that are due.
+
+        :param max_orders: maximum number of orders to check, by priority. The others stay due.
+        :param on_event: function called with each event, in addition to returning them
+        :return: the events
+        """
+        now = self.clock()
+        due = self.due(now)
+        if max_orders is not None:
+            due = due[:max_orders]
+
+        events: list[OrderEvent] = []
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="bigbuy-orders") as executor:
+            shipped = [order for order in due if order.state == SHIPPED]
+            # new tracking of the shipped orders whose tracking changed, applied once their status is fetched
+            trackings: dict[str, tuple[list[list[str]], BBTrackingOrderDict]] = {}
+            to_fetch = [order for order in due if order.state != SHIPPED]
+
+            # Shipped orders: fetch their status only if their tracking changed
+            batches = [shipped[i:i + self.tracking_batch_size]
+                       for i in range(0, len(shipped), self.tracking_batch_size)]
+            for batch, (batch_trackings, error) in zip(batches, executor.map(
+                    _attempt, [lambda batch=batch: self.client.get_tracking_orders([o.id for o in batch])
+                               for batch in batches])):
+                if error is not None:
+                    # The orders stay due
+                    events.extend(OrderEvent(CHECK_FAILED, order.id, order.status, order.status, error)
+                                  for order in batch)
+                    continue
+                for order, tracking in zip(batch, batch_trackings or []):
+                    if tracking and (signature := _tracking_signature(tracking)) != order.tracking:
+                        trackings[order.id] = (signature, tracking)
+                        to_fetch.append(order)
+                    elif (order.unchanged_checks + 1) % self.status_every == 0:
+                        # In case the tracking is missing or isn't updated
+                        to_fetch.append(order)
+                    else:
+                        order.unchanged_checks += 1
+                        self._schedule(order, now)
+
+            newly_shipped: list[TrackedOrder] = []
+            for order, (result, error) in zip(to_fetch, executor.map(
+                    _attempt, [lambda order=order: self._fetch_order(order) for order in to_fetch])):
+                if error is not None:
+                    # The order stays due, and its tracking is unchanged so that the change is reported again
+                    events.append(OrderEvent(CHECK_FAILED, order.id, order.status, order.status, error))
+                    continue
+                changed = order.id in trackings
+                if changed:
+                    order.tracking, tracking = trackings[order.id]
+                    events.append(OrderEvent(TRACKING_CHANGED, order.id, order.status, order.status, tracking))
+                events.extend(self._update(order, result, now, changed))
+                if order.state == SHIPPED and not order.delivery_notes:
+                    newly_shipped.append(order)
+
+            for order, (notes, error) in zip(newly_shipped, executor.map(
+                    _attempt, [lambda order=order: self.client.get_order_delivery_notes(order.id)
+                               for order in newly_shipped])):
+                if error is not None:
+                    # Check the order again on the next cycle
+                    order.next_check = now
+                    events.append(OrderEvent(CHECK_FAILED, order.id, order.status, order.status, error))
+                    continue
+                order.delivery_notes = True
+                events.append(OrderEvent(DELIVERY_NOTES, order.id, order.status, order.status, notes))
+
+        if on_event is not None:
+            for event in events:
+                on_event(event)
+        return events
+
+    def _fetch_order(self, order: TrackedOrder) -> Optional[Mapping[str, Any]]:
+        try:
+            return self.client.get_order_by_id(order.id)
+        except BBResponseError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    def _update(self, order: TrackedOrder, result: Optional[Mapping[str, Any]], now: float,
+                changed: bool = False) -> list[OrderEvent]:
+        if result is None:
+            del self.orders[order.id]
+            return [OrderEvent(ORDER_NOT_FOUND, order.id, order.status)]
+
+        events = []
+        status = result["status"]
+        if status != order.status:
+            events.append(OrderEvent(STATUS_CHANGED, order.id, order.status, status, result))
+            order.status = status
+            order.state = self.state(status)
+            changed = True
+        order.unchanged_checks = 0 if changed else order.unchanged_checks + 1
+
+        if order.state == CLOSED:
+            del self.orders[order.id]
+            events.append(OrderEvent(ORDER_CLOSED, order.id, status, status, result))
+        else:
+            self._schedule(order, now)
+        return events
+
+    def save(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        """Save the store to a file."""
+        data = {"version": STORE_VERSION, "orders": [order.as_dict() for order in self.orders.values()]}
+        _atomic_write(os.path.abspath(path), json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def load(cls, client: "BigBuy", path: Union[str, "os.PathLike[str]"], **kwargs: Any) -> "OrderSyncEngine":
+        """Create an engine with the statuses of ``get_order_statuses`` and the store saved with ``save``."""
+        engine = cls.from_client(client, **kwargs)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported order store version: {data.get('version')!r}")
+        engine.orders = {order["id"]: TrackedOrder(**order) for order in data["orders"]}
+        return engine
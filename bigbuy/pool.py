@@ -0,0 +1,258 @@
+"""
+bigbuy.pool
+~~~~~~~~~~~
+
+Pool of ``BigBuy`` clients using different keys, to spread read-only catalog traffic over several accounts.
+
+Usage::
+
+    pool = BigBuyPool.from_keys({"main": main_key, "sync": sync_key}, rate=5, burst=5)
+    products = pool.get_products()              # sent with the key that has the most remaining budget
+    pool.for_account("main").create_order(...)  # writes are pinned to an account
+
+Each client keeps its own rate-limit tracking. Catalog calls are routed to the client with the most tokens left in its
+rate-limiter; when a client is rate-limited by the API, it's set aside until the rate-limit expires and the call is
+sent again with another client. Catalog data is the same for all accounts, but orders, shipping and the purse are not:
+the methods that use them are not available on the pool and must be called on ``for_account(...)``.
+"""
+import threading
+import time
+from typing import Optional, Callable, Any, Mapping, Iterator
+
+from .api import BigBuy
+from .exceptions import BBRateLimitError
+from .rate_limit import RateLimiter
+
+__all__ = ['POOLED_METHODS', 'BigBuyPool']
+
+# Read-only methods that call catalog endpoints, which return the same data for all accounts.
+POOLED_METHODS = frozenset({
+    "get_attribute",
+    "get_attribute_all_languages",
+    "get_attribute_group",
+    "get_attribute_group_all_languages",
+    "get_attribute_groups",
+    "get_attributes",
+    "get_languages",
+    "get_manufacturer",
+    "get_manufacturers",
+    "get_new_products",
+    "get_product",
+    "get_product_categories",
+    "get_product_compliance",
+    "get_product_images",
+    "get_product_information",
+    "get_product_information_all_languages",
+    "get_product_information_by_sku",
+    "get_product_stock_by_handling_days",
+    "get_product_tags",
+    "get_product_taxonomies",
+    "get_product_variations",
+    "get_product_variations_prices",
+    "get_product_variations_stock_by_handling_days",
+    "get_products",
+    "get_products_categories",
+    "get_products_images",
+    "get_products_information",
+    "get_products_prices",
+    "get_products_stock_by_handling_days",
+    "get_products_tags",
+    "get_products_taxonomies",
+    "get_products_variations",
+    "get_products_variations_stock_by_handling_days",
+    "get_tag",
+    "get_tag_all_languages",
+    "get_tags",
+    "get_taxonomies",
+    "get_taxonomy_all_languages",
+    "get_variation",
+    "get_variations",
+})
+
+
+class BigBuyPool:
+    """
+    Pool of ``BigBuy`` clients. The clients should not retry on rate-limits themselves (``retry_on_rate_limit=False``,
+    the default), so that the pool can send the call with another client instead.
+
+    :param clients: clients by account name
+    :param throttle_cooldown: number of seconds a client is set aside after a rate-limit error that doesn't tell when
+      the rate-limit expires
+    :param wait_when_throttled: if ``True`` (default), wait for the first rate-limit to expire when all clients are
+      rate-limited. Otherwise, raise the last ``BBRateLimitError``.
+    :param max_attempts: maximum number of times a call is sent. By default, it's the number of clients plus one.
+    """
+
+    def __init__(self, clients: Mapping[str, BigBuy], *,
+                 throttle_cooldown: float = 1,
+                 wait_when_throttled: bool = True,
+                 max_attempts: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep_function: Callable[[float], None] = time.sleep):
+        if not clients:
+            raise ValueError("The pool needs at least one client")
+
+        self.clients = dict(clients)
+        self.throttle_cooldown = throttle_cooldown
+        self.wait_when_throttled = wait_when_throttled
+        self.max_attempts = max_attempts if max_attempts is not None else len(self.clients) + 1
+        self.clock = clock
+        self.sleep_function = sleep_function
+
+        self.requests: dict[str, int] = {name: 0 for name in self.clients}
+        self.rate_limited: dict[str, int] = {name: 0 for name in self.clients}
+        self.failovers = 0
+
+        self._throttled_until: dict[str, float] = {name: 0.0 for name in self.clients}
+        self._in_flight: dict[str, int] = {name: 0 for name in self.clients}
+        self._last_errors: dict[str, BBRateLimitError] = {}
+        # Order of the last use of each client, to spread calls between clients with the same budget
+        self._last_used: dict[str, int] = {name: 0 for name in self.clients}
+        self._uses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_keys(cls, app_keys: Mapping[str, str], *,
+                  rate: Optional[float] = None,
+                  burst: int = 1,
+                  pool_kwargs: Optional[Mapping[str, Any]] = None,
+                  **client_kwargs: Any) -> "BigBuyPool":
+        """
+        Create a pool with one client per key.
+
+        :param app_keys: keys by account name
+        :param rate: if set, give each client its own ``RateLimiter`` with this rate and ``burst``
+        :param burst: see ``rate``
+        :param pool_kwargs: keyword arguments passed to the pool
+        :param client_kwargs: keyword arguments passed to each client
+        """
+        clients = {}
+        for name, app_key in app_keys.items():
+            rate_limiter = RateLimiter(rate=rate, burst=burst) if rate is not None else None
+            clients[name] = BigBuy(app_key, rate_limiter=rate_limiter, **client_kwargs)
+        return cls(clients, **(pool_kwargs or {}))
+
+    def __repr__(self) -> str:
+        return f"<BigBuyPool accounts={', '.join(self.clients)}>"
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.clients)
+
+    def __enter__(self) -> "BigBuyPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close all clients."""
+        for client in self.clients.values():
+            client.close()
+
+    def for_account(self, name: str) -> BigBuy:
+        """Return the client of an account. Use it for writes and for calls on account-specific data."""
+        try:
+            return self.clients[name]
+        except KeyError:
+            raise KeyError(f"Unknown account {name!r}") from None
+
+    def _budget(self, name: str, now: float) -> tuple[float, float, int, int]:
+        """Return a sort key of the client budget: the lowest is the best client."""
+        wait = max(0.0, self._throttled_until[name] - now)
+        tokens = 0.0
+        rate_limiter = self.clients[name].rate_limiter
+        if rate_limiter is not None:
+            wait = max(wait, rate_limiter.time_until_available())
+            tokens = rate_limiter.available_tokens
+        return wait, -tokens, self._in_flight[name], self._last_used[name]
+
+    def _pick(self) -> tuple[str, float]:
+        """Return the name of the best client and the number of seconds to wait before it can be used."""
+        with self._lock:
+            now = self.clock()
+            name = min(self.clients, key=lambda n: self._budget(n, now))
+            wait = max(0.0, self._throttled_until[name] - now)
+            self._in_flight[name] += 1
+            self._uses += 1
+            self._last_used[name] = self._uses
+            self.requests[name] += 1
+        return name, wait
+
+    def _throttle(self, name: str, error: BBRateLimitError) -> None:
+        if error.rate_limit is not None:
+            cooldown = max(0.0, error.rate_limit.reset_timedelta().total_seconds())
+        else:
+            cooldown = self.throttle_cooldown
+        with self._lock:
+            self.rate_limited[name] += 1
+            self._last_errors[name] = error
+            self._throttled_until[name] = max(self._throttled_until[name], self.clock() + cooldown)
+
+    def throttled_accounts(self) -> list[str]:
+        """Return the names of the accounts that are currently set aside because of a rate-limit."""
+        now = self.clock()
+        return [name for name, until in self._throttled_until.items() if until > now]
+
+    def call(self, method_name: str, *args: Any, **kwargs: Any) -> Any:
+        """
+        Call a catalog method with the client that has the most remaining budget, and send the call again with
+        another client if it's rate-limited.
+
+        :param method_name: name of a method of ``BigBuy`` in ``POOLED_METHODS``
+        """
+        if method_name not in POOLED_METHODS:
+            raise ValueError(f"{method_name} is not a catalog method; use for_account(...).{method_name}(...)")
+
+        error: Optional[BBRateLimitError] = None
+        for attempt in range(self.max_attempts):
+            name, wait = self._pick()
+            if wait > 0 and not self.wait_when_throttled:
+                # The call is not sent
+                with self._lock:
+                    self._in_flight[name] -= 1
+                    self.requests[name] -= 1
+                raise error or self._last_errors[name]
+
+            try:
+                if wait > 0:
+                    self.sleep_function(wait)
+
+                if attempt:
+                    with self._lock:
+                        self.failovers += 1
+                return getattr(self.clients[name], method_name)(*args, **kwargs)
+            except BBRateLimitError as e:
+                error = e
+                self._throttle(name, e)
+            finally:
+                with self._lock:
+                    self._in_flight[name] -= 1
+
+        assert error is not None
+        raise error
+
+    def stats(self) -> dict[str, Any]:
+        """Return the number of calls and rate-limit errors of each account, and the number of failovers."""
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "rate_limited": dict(self.rate_limited),
+                "failovers": self.failovers,
+            }
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name in POOLED_METHODS:
+            def method(*args: Any, **kwargs: Any) -> Any:
+                return self.call(name, *args, **kwargs)
+
+            method.__name__ = name
+            method.__doc__ = getattr(BigBuy, name).__doc__
+            return method
+
+        if hasattr(BigBuy, name):
+            raise AttributeError(f"{name} is not available on the pool because it's not a catalog method;"
+                                 f" use for_account(...).{name}(...)")
+        raise AttributeError(name)
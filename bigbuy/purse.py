@@ -0,0 +1,211 @@
+"""
+bigbuy.purse
+~~~~~~~~~~~~
+
+Local accounting of the purse balance, shared by the workers that place orders.
+
+Usage::
+
+    purse = PurseTracker(client, reconcile_interval=300)
+
+    # In each worker:
+    order_id = purse.place_order(order)  # check_order, reserve the total, create_order, debit the total
+
+    # Or, step by step:
+    total = client.check_order(order)["total"]
+    with purse.reserve(total):  # raises BBInsufficientPurseError if the balance is too low
+        order_id = client.create_order_id(order)
+
+The tracker loads the balance with ``get_purse_amount`` once, then keeps it up to date locally: amounts are reserved
+before orders are submitted, so that concurrent workers can't spend the same money twice, and debited when the orders
+are created. It reconciles with the API when the balance is older than ``reconcile_interval``, when an error makes it
+uncertain (e.g. an order creation that may or may not have gone through), and before refusing an order, in case the
+purse was topped up. A ``BBMoneyBoxTooLowError`` updates the balance with the amount reported by the API.
+"""
+import threading
+import time
+from typing import Optional, Any, Callable, TYPE_CHECKING
+
+from .exceptions import BBInsufficientPurseError, BBMoneyBoxTooLowError
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['PurseTracker', 'Reservation']
+
+
+class Reservation:
+    """
+    Amount reserved on a purse for an order.
+
+    Used as a context manager, it's committed when the block exits normally and released when it raises.
+    """
+
+    def __init__(self, tracker: "PurseTracker", amount: float):
+        self.tracker = tracker
+        self.amount = amount
+        self.done = False
+
+    def __repr__(self) -> str:
+        return f"<Reservation {self.amount:.2f}{' done' if self.done else ''}>"
+
+    def commit(self, amount: Optional[float] = None) -> None:
+        """
+        Debit the purse: the order was created.
+
+        :param amount: amount actually paid, if it differs from the reserved amount
+        """
+        self.tracker._settle(self, self.amount if amount is None else amount)
+
+    def release(self) -> None:
+        """Cancel the reservation: the order was not created."""
+        self.tracker._settle(self, 0)
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.done:
+            return
+        if exc[1] is None:
+            self.commit()
+        else:
+            self.release()
+            self.tracker.on_error(exc[1])
+
+
+class PurseTracker:
+    """
+    Track the purse balance of an account locally.
+
+    :param client: client of the account
+    :param reconcile_interval: reconcile with the API when the balance is older than this number of seconds. If
+      ``None``, only reconcile after errors and before refusing an order.
+    :param margin: amount that is never reserved, to absorb differences between the checked and the actual totals
+    :param clock: monotonic clock, in seconds
+    """
+
+    def __init__(self, client: "BigBuy", *, reconcile_interval: Optional[float] = 300, margin: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self.margin = margin
+        self.clock = clock
+
+        # balance as of the last reconciliation, minus the debits since
+        self.balance: Optional[float] = None
+        self.reserved = 0.0
+        self.reconciled_at: Optional[float] = None
+        self.reconciliations = 0
+
+        # total debited since the creation of the tracker
+        self._debited = 0.0
+        self._stale = True
+        # number of errors that made the balance uncertain
+        self._errors = 0
+        self._lock = threading.Lock()
+        # only one thread fetches the balance at a time
+        self._reconcile_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<PurseTracker balance={self.balance} reserved={self.reserved:.2f}>"
+
+    @property
+    def available(self) -> float:
+        """Amount that can be reserved, not counting the reservations that are not settled yet."""
+        with self._lock:
+            return self._available()
+
+    def _available(self) -> float:
+        return (self.balance or 0) - self.reserved - self.margin
+
+    @property
+    def needs_reconcile(self) -> bool:
+        """``True`` if the balance is unknown, uncertain after an error, or older than ``reconcile_interval``."""
+        return self._stale or self.reconciled_at is None or (
+                self.reconcile_interval is not None and self.clock() - self.reconciled_at >= self.reconcile_interval)
+
+    def reconcile(self) -> float:
+        """Load the balance from the API and return it."""
+        with self._reconcile_lock:
+            return self._reconcile()
+
+    def _reconcile_once(self, reconciliations: int) -> None:
+        """Reconcile, unless another thread did since the number of reconciliations was ``reconciliations``."""
+        with self._reconcile_lock:
+            if self.reconciliations == reconciliations:
+                self._reconcile()
+
+    def _reconcile(self) -> float:
+        with self._lock:
+            debited_before = self._debited
+            errors_before = self._errors
+        amount = self.client.get_purse_amount()
+        with self._lock:
+            # Orders created during the request may or may not be included in the amount: assume they are not, so
+            # that they are not spent twice.
+            self.balance = amount - (self._debited - debited_before)
+            # An error during the request leaves the balance uncertain
+            self._stale = self._errors != errors_before
+            self.reconciled_at = self.clock()
+            self.reconciliations += 1
+            return self.balance
+
+    def reserve(self, amount: float) -> Reservation:
+        """
+        Reserve an amount for an order.
+
+        :raise BBInsufficientPurseError: if the available balance is too low, even after reconciling with the API
+        """
+        if self.needs_reconcile:
+            self._reconcile_once(self.reconciliations)
+
+        with self._lock:
+            if amount <= self._available():
+                self.reserved += amount
+                return Reservation(self, amount)
+            reconciliations = self.reconciliations
+
+        # The purse may have been topped up
+        self._reconcile_once(reconciliations)
+        with self._lock:
+            if amount > (available := self._available()):
+                raise BBInsufficientPurseError(amount, available)
+            self.reserved += amount
+            return Reservation(self, amount)
+
+    def _settle(self, reservation: Reservation, debit: float) -> None:
+        with self._lock:
+            if reservation.done:
+                raise ValueError(f"{reservation!r} is already settled")
+            reservation.done = True
+            self.reserved -= reservation.amount
+            if debit:
+                self._debited += debit
+                if self.balance is not None:
+                    self.balance -= debit
+
+    def on_error(self, error: BaseException) -> None:
+        """
+        Update the balance after an error. A ``BBMoneyBoxTooLowError`` gives the balance; other errors make it
+        uncertain, so the tracker reconciles before the next reservation.
+        """
+        with self._lock:
+            if isinstance(error, BBMoneyBoxTooLowError) and isinstance(error.bb_data, dict) \
+                    and isinstance(amount := error.bb_data.get("moneyBoxAmount"), (int, float)):
+                self.balance = float(amount)
+                self.reconciled_at = self.clock()
+            else:
+                self._stale = True
+                self._errors += 1
+
+    def place_order(self, order: dict[str, Any], **params: Any) -> str:
+        """
+        Check an order, reserve its total, create it and debit its total.
+
+        :return: the id of the order
+        :raise BBInsufficientPurseError: if the available balance is too low. The order is not created.
+        """
+        total = self.client.check_order(order, **params)["total"]
+        with self.reserve(total):
+            return self.client.create_order_id(order, **params)
@@ -1,9 +1,12 @@
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Callable
+from typing import Optional, Callable, TYPE_CHECKING
 
-from requests import Response
-from typing_extensions import Self
+from .responses import ResponseLike
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
 
 RATE_LIMIT_RESPONSE_TEXT = "You exceeded the rate limit"
 
@@ -17,7 +20,7 @@ class RateLimit:
         self.reset_time = reset_time
 
     @classmethod
-    def from_response(cls, response: Response) -> Optional[Self]:
+    def from_response(cls, response: ResponseLike) -> "Optional[Self]":
         if response.ok or response.text != RATE_LIMIT_RESPONSE_TEXT:
             return None
 
@@ -47,3 +50,101 @@ class RateLimit:
         wait_seconds = delta.total_seconds()
         if wait_seconds >= 0:
             wait_function(wait_seconds)
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket that limits the rate of requests sent by a client.
+
+    BigBuy doesn't document its rate-limits; use this to stay below the limits that apply to your key instead of
+    hitting 429 responses.
+
+    :param rate: number of requests allowed per second, on average
+    :param burst: maximum number of requests that can be sent at once after an idle period
+    """
+
+    def __init__(self, rate: float, burst: int = 1, *, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._last_refill = clock()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def _refill(self) -> float:
+        """Refill the bucket and return the current time. Must be called with the lock held."""
+        now = self.clock()
+        if now > self._last_refill:
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+        return now
+
+    def _wait_time(self, now: float, tokens: float) -> float:
+        """Return the number of seconds to wait before ``tokens`` tokens are available."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= tokens:
+            return 0
+        return (tokens - self._tokens) / self.rate
+
+    def _check_tokens(self, tokens: float) -> None:
+        if tokens > self.burst:
+            raise ValueError(f"Can't take {tokens} tokens at once from a bucket of {self.burst} tokens")
+
+    def time_until_available(self, tokens: float = 1) -> float:
+        """Return the number of seconds to wait before ``tokens`` tokens are available."""
+        self._check_tokens(tokens)
+        with self._condition:
+            return self._wait_time(self._refill(), tokens)
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens if they're available right now. Return ``True`` if they were taken."""
+        with self._condition:
+            now = self._refill()
+            if self._wait_time(now, tokens) > 0:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until tokens are available and take them.
+
+        :param tokens: number of tokens to take
+        :param timeout: maximum number of seconds to wait. By default, wait as long as necessary.
+        :return: ``True`` if the tokens were taken, ``False`` on timeout.
+        :raise ValueError: if ``tokens`` is greater than ``burst``: the bucket never holds that many tokens
+        """
+        self._check_tokens(tokens)
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._condition:
+            while True:
+                now = self._refill()
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._tokens -= tokens
+                    return True
+
+                if deadline is not None and now + wait > deadline:
+                    return False
+                self._condition.wait(wait)
+
+    def pause_until(self, timestamp: float) -> None:
+        """Don't give any token before the given time, as returned by the ``clock`` of this rate-limiter."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, timestamp)
+
+    def pause_for_rate_limit(self, rate_limit: RateLimit) -> None:
+        """Pause the rate-limiter until a rate-limit returned by the API expires."""
+        self.pause_until(self.clock() + max(0.0, rate_limit.reset_timedelta().total_seconds()))
+
+    @property
+    def available_tokens(self) -> float:
+        """Number of tokens available right now."""
+        with self._condition:
+            now = self._refill()
+            return 0 if now < self._paused_until else self._tokens
@@ -0,0 +1,302 @@
+"""
+bigbuy.replay
+~~~~~~~~~~~~~
+
+Transport adapters to record the traffic of a ``BigBuy`` client to a file and replay it later without network.
+
+Record::
+
+    client = BigBuy(app_key)
+    with RecordingAdapter("traffic.jsonl.gz") as recorder:
+        client.mount("https://", recorder)
+        ...
+
+Replay::
+
+    client = BigBuy(app_key)
+    client.mount("https://", ReplayAdapter("traffic.jsonl.gz", speed=10))
+    stats = replay_traffic(client, "traffic.jsonl.gz")
+
+Files are JSON Lines, one compact record per HTTP exchange. They are compressed according to their extension:
+``.gz``, ``.bz2``, ``.xz`` and ``.zst`` (the latter requires the ``zstandard`` package). Request headers are never
+recorded, so recordings don't contain the API key.
+
+Record keys: ``t`` (seconds since the first request), ``m`` (method), ``u`` (URL path and query), ``b`` (request
+body), ``s`` (status code), ``h`` (response headers), ``c`` (response body as text) or ``c64`` (binary response body,
+base64-encoded), ``e`` (elapsed seconds).
+"""
+import base64
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import timedelta
+from typing import Optional, Any, Union, IO, Iterator, Iterable, TYPE_CHECKING, cast
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['RecordingAdapter', 'ReplayAdapter', 'ReplayMissError', 'ReplayStats', 'iter_records', 'replay_traffic']
+
+Record = dict[str, Any]
+Path = Union[str, "os.PathLike[str]"]
+
+
+class ReplayMissError(LookupError):
+    """Raised by ``ReplayAdapter`` when a request has no matching recorded response."""
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    """Open a text file, compressed according to its extension."""
+    name = str(path)
+    if name.endswith(".gz"):
+        return cast(IO[str], gzip.open(path, mode + "t", encoding="utf-8"))
+    if name.endswith(".bz2"):
+        return cast(IO[str], bz2.open(path, mode + "t", encoding="utf-8"))
+    if name.endswith(".xz") or name.endswith(".lzma"):
+        return cast(IO[str], lzma.open(path, mode + "t", encoding="utf-8"))
+    if name.endswith(".zst"):
+        try:
+            import zstandard  # type: ignore[import-not-found]
+        except ImportError:
+            raise ImportError("zstandard is required to read or write .zst files: pip install zstandard")
+
+        return cast(IO[str], zstandard.open(path, mode + "t", encoding="utf-8"))
+
+    return open(path, mode, encoding="utf-8")
+
+
+def _url_key(url: Optional[str]) -> str:
+    """Return the part of a URL used to match requests: the path and the query string."""
+    parts = urlsplit(url or "")
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def _body_text(body: Union[bytes, str, None]) -> Optional[str]:
+    if body is None or isinstance(body, str):
+        return body
+    return body.decode("utf-8", errors="replace")
+
+
+def iter_records(path: Path) -> Iterator[Record]:
+    """Iterate over the records of a recording file."""
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    HTTP adapter that sends requests normally and appends each request and its response to a recording file.
+    It can be used as a context manager, which closes the file on exit.
+
+    :param path: path of the recording file. Its extension determines the compression.
+    :param adapter_kwargs: keyword arguments passed to ``HTTPAdapter``. Pass ``max_retries=client.max_retries`` to keep
+      the retry behavior of the client.
+    """
+
+    def __init__(self, path: Path, **adapter_kwargs: Any):
+        super().__init__(**adapter_kwargs)
+        self.path = path
+        self._file = _open(path, "w")
+        self._lock = threading.Lock()
+        self._start: Optional[float] = None
+
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:  # type: ignore[override]
+        now = time.monotonic()
+        with self._lock:
+            if self._start is None:
+                self._start = now
+            offset = now - self._start
+
+        response = super().send(request, *args, **kwargs)
+        # Reading the content here is fine: the client reads every response anyway
+        content = response.content
+
+        record: Record = {
+            "t": round(offset, 6),
+            "m": request.method,
+            "u": _url_key(request.url),
+            "b": _body_text(request.body),
+            "s": response.status_code,
+            "h": dict(response.headers),
+            "e": round(response.elapsed.total_seconds(), 6),
+        }
+        try:
+            record["c"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            record["c64"] = base64.b64encode(content).decode("ascii")
+
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+        return response
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "RecordingAdapter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that serves recorded responses instead of sending requests over the network.
+
+    Requests are matched on their method, path and query string; the host and the request body are ignored. Responses
+    recorded for the same request are served in their recorded order.
+
+    :param source: path of a recording file, or an iterable of records
+    :param speed: if set, simulate the recorded response times divided by ``speed``: ``1`` replays at the recorded
+      speed, ``10`` ten times faster. By default, responses are served immediately.
+    :param loop: if true, start over from the first matching response once all of them have been served. Otherwise,
+      raise ``ReplayMissError``.
+    """
+
+    def __init__(self, source: Union[Path, Iterable[Record]], *,
+                 speed: Optional[float] = None,
+                 loop: bool = False):
+        super().__init__()
+        self.speed = speed
+        self.loop = loop
+        self.served = 0
+
+        records = iter_records(source) if isinstance(source, (str, os.PathLike)) else source
+
+        self._records: dict[tuple[str, str], list[Record]] = {}
+        for record in records:
+            self._records.setdefault((record["m"], record["u"]), []).append(record)
+
+        self._queues = {key: deque(key_records) for key, key_records in self._records.items()}
+        self._lock = threading.Lock()
+
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:  # type: ignore[override]
+        key = (request.method or "GET", _url_key(request.url))
+
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                if not self.loop or key not in self._records:
+                    raise ReplayMissError(f"No recorded response for {key[0]} {key[1]}")
+                queue = self._queues[key] = deque(self._records[key])
+            record = queue.popleft()
+            self.served += 1
+
+        elapsed = record.get("e", 0)
+        if self.speed:
+            time.sleep(elapsed / self.speed)
+
+        return self._build_response(request, record, elapsed)
+
+    def _build_response(self, request: PreparedRequest, record: Record, elapsed: float) -> Response:
+        response = Response()
+        response.status_code = record["s"]
+        response.headers = CaseInsensitiveDict(record.get("h", {}))
+        response.encoding = "utf-8"
+        if "c64" in record:
+            response._content = base64.b64decode(record["c64"])
+        else:
+            response._content = record.get("c", "").encode("utf-8")
+        response.raw = io.BytesIO(response._content)
+        response.url = request.url or ""
+        response.request = request
+        response.elapsed = timedelta(seconds=elapsed)
+        response.connection = self  # type: ignore[assignment]
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class ReplayStats:
+    """Statistics of a ``replay_traffic`` run."""
+
+    def __init__(self, requests: int, errors: int, wall_time: float, cpu_time: float,
+                 peak_memory: Optional[int]):
+        self.requests = requests
+        self.errors = errors
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_memory = peak_memory
+
+    def __repr__(self) -> str:
+        return (f"<ReplayStats requests={self.requests} errors={self.errors} wall_time={self.wall_time:.3f}s"
+                f" cpu_time={self.cpu_time:.3f}s peak_memory={self.peak_memory}>")
+
+
+def replay_traffic(client: "BigBuy", path: Path, *,
+                   speed: Optional[float] = None,
+                   trace_memory: bool = False) -> ReplayStats:
+    """
+    Re-issue every request of a recording through a client, typically one on which a ``ReplayAdapter`` for the same
+    file is mounted. This exercises the whole client code path (including error parsing) without network, and
+    measures the CPU time and optionally the peak memory used by the client.
+
+    :param client: client to issue requests with
+    :param path: path of the recording file
+    :param speed: if set, issue requests following their recorded schedule divided by ``speed``. By default, requests
+      are issued one after the other as fast as possible.
+    :param trace_memory: if true, measure the peak memory allocated during the replay with ``tracemalloc``. This
+      slows down the replay.
+    """
+    from .exceptions import BBError
+
+    base_path = urlsplit(client.base_url).path
+    requests = errors = 0
+
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    try:
+        for record in iter_records(path):
+            if speed:
+                delay = record["t"] / speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            url_path, _, query = record["u"].partition("?")
+            api_path = url_path[len(base_path):] if url_path.startswith(base_path) else url_path
+            kwargs: dict[str, Any] = {}
+            if query:
+                kwargs["params"] = query
+            if record.get("b") is not None:
+                kwargs["data"] = record["b"].encode("utf-8")
+                kwargs["headers"] = {"Content-Type": "application/json"}
+
+            requests += 1
+            try:
+                client.request_api(record["m"], api_path.removesuffix(".json").lstrip("/"), bypass_read_only=True,
+                                   **kwargs)
+            except BBError:
+                errors += 1
+
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return ReplayStats(requests=requests, errors=errors,
+                       wall_time=time.perf_counter() - wall_start,
+                       cpu_time=time.process_time() - cpu_start,
+                       peak_memory=peak_memory)
@@ -0,0 +1,252 @@
+"""
+bigbuy.resilience
+~~~~~~~~~~~~~~~~~
+
+Retry policy for ``BigBuy`` clients: exponential backoff with jitter, a client-wide retry budget, per-endpoint circuit
+breakers and deadlines.
+
+Usage::
+
+    client = BigBuy(app_key, resilience=ResiliencePolicy(max_retries=4))
+    client.get_order_by_id(order_id, deadline=Deadline(5))
+
+Jitter spreads the retries of concurrent workers over time instead of having them all retry in lockstep, and the
+retry budget caps the share of retries in the traffic of the client, so that retries can't multiply the load on
+BigBuy during an incident. Once an endpoint keeps failing, its circuit breaker opens and calls fail immediately with
+``BBCircuitOpenError`` until the breaker lets a trial request through.
+"""
+import random
+import threading
+import time
+from typing import Optional, Callable, Union, Any
+
+__all__ = ['Backoff', 'RetryBudget', 'CircuitBreaker', 'Deadline', 'ResiliencePolicy']
+
+_default: Any = object()
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter.
+
+    :param base: delay before the first retry, in seconds, before jitter
+    :param factor: multiplier applied to the delay after each attempt
+    :param maximum: maximum delay, in seconds, before jitter
+    :param jitter: ``"full"`` (uniform between 0 and the delay), ``"equal"`` (uniform between half the delay and the
+      delay) or ``"none"``
+    :param random_function: function returning a random float in [0, 1)
+    """
+
+    def __init__(self, base: float = 0.5, factor: float = 2, maximum: float = 30, *,
+                 jitter: str = "full",
+                 random_function: Callable[[], float] = random.random):
+        if jitter not in ("full", "equal", "none"):
+            raise ValueError(f"Unknown jitter {jitter!r}")
+
+        self.base = base
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+        self.random_function = random_function
+
+    def delay(self, attempt: int) -> float:
+        """Return the delay in seconds before the given retry attempt, starting at 1."""
+        delay = min(self.maximum, self.base * self.factor ** (attempt - 1))
+        if self.jitter == "full":
+            return delay * self.random_function()
+        if self.jitter == "equal":
+            return delay / 2 * (1 + self.random_function())
+        return delay
+
+
+class RetryBudget:
+    """
+    Client-wide retry budget. Each request deposits ``ratio`` token and each retry withdraws one; a retry is only
+    allowed if there is a full token to withdraw. The budget is also refilled with ``min_retries_per_second`` tokens
+    per second so that low-traffic clients can still retry.
+
+    :param ratio: maximum ratio of retries to requests, e.g. ``0.2`` for at most one retry every five requests
+    :param min_retries_per_second: minimum number of retries per second allowed regardless of the traffic
+    :param max_tokens: maximum number of tokens the budget can hold
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1, max_tokens: float = 100, *,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self.clock = clock
+        self._tokens = max_tokens
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float) -> None:
+        now = self.clock()
+        tokens += (now - self._last_refill) * self.min_retries_per_second
+        self._last_refill = now
+        self._tokens = min(self.max_tokens, self._tokens + tokens)
+
+    def record_request(self) -> None:
+        """Record a (non-retry) request."""
+        with self._lock:
+            self._refill(self.ratio)
+
+    def try_retry(self) -> bool:
+        """Return ``True`` and withdraw a token if a retry is allowed, ``False`` otherwise."""
+        with self._lock:
+            self._refill(0)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def refund(self) -> None:
+        """Give back the token of a retry that was allowed but not sent."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + 1)
+
+    @property
+    def tokens(self) -> float:
+        """Number of tokens available."""
+        with self._lock:
+            self._refill(0)
+            return self._tokens
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single endpoint.
+
+    The breaker is *closed* by default. It *opens* after ``failure_threshold`` consecutive failures, and then rejects
+    all calls for ``reset_timeout`` seconds. After that it's *half-open*: it lets a single trial call through, and
+    closes again if that call succeeds or re-opens if it fails.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, *,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.clock() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Return ``True`` if a call is allowed."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_progress or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_in_progress = False
+
+    def release_trial(self) -> None:
+        """End a trial call whose outcome is neither a success nor a failure, so that another call can try."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def retry_after(self) -> float:
+        """Return the number of seconds before the breaker lets a trial call through."""
+        if self._opened_at is None:
+            return 0
+        return max(0.0, self._opened_at + self.reset_timeout - self.clock())
+
+
+class Deadline:
+    """
+    Absolute deadline for a call, including its retries.
+
+    :param seconds: number of seconds from now
+    """
+
+    def __init__(self, seconds: float, *, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    @classmethod
+    def coerce(cls, deadline: Union["Deadline", float]) -> "Deadline":
+        """Return a deadline from either a ``Deadline`` or a number of seconds from now."""
+        if isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self) -> float:
+        """Number of seconds before the deadline. This is negative if the deadline passed."""
+        return self.expires_at - self.clock()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class ResiliencePolicy:
+    """
+    Retry policy of a ``BigBuy`` client. Only requests that use a read method (e.g. ``GET``) are retried, on
+    ``BBServerError`` (which includes ``BBTimeoutError``) and on connection errors and timeouts. All methods go through
+    the circuit breakers.
+
+    :param max_retries: maximum number of retries per call
+    :param backoff: backoff between retries
+    :param budget: client-wide retry budget. By default, a ``RetryBudget`` with default parameters is used. Use
+      ``None`` to disable it.
+    :param failure_threshold: number of consecutive failures that open the circuit breaker of an endpoint. Use ``0``
+      to disable circuit breakers.
+    :param reset_timeout: number of seconds an open circuit breaker waits before letting a trial call through
+    :param rate_limit_jitter: maximum random delay, in seconds, added to the wait when retrying on a rate-limit, so that
+      rate-limited workers don't all retry at the exact reset time
+    """
+
+    def __init__(self, *,
+                 max_retries: int = 3,
+                 backoff: Optional[Backoff] = None,
+                 budget: Optional[RetryBudget] = _default,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30,
+                 rate_limit_jitter: float = 1):
+        self.max_retries = max_retries
+        self.backoff = backoff if backoff is not None else Backoff()
+        self.budget: Optional[RetryBudget] = RetryBudget() if budget is _default else budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rate_limit_jitter = rate_limit_jitter
+        self.circuit_breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def circuit_breaker(self, endpoint: str) -> Optional[CircuitBreaker]:
+        """Return the circuit breaker of an endpoint template, or ``None`` if circuit breakers are disabled."""
+        if self.failure_threshold <= 0:
+            return None
+
+        breaker = self.circuit_breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self.circuit_breakers.setdefault(
+                    endpoint, CircuitBreaker(self.failure_threshold, self.reset_timeout))
+        return breaker
@@ -0,0 +1,108 @@
+"""
+bigbuy.responses
+~~~~~~~~~~~~~~~~
+
+Lightweight views of HTTP responses.
+
+A ``requests.Response`` keeps references to its request (including its body), the urllib3 response, the redirect
+history and the connection adapter. Exceptions keep a ``ResponseView`` instead: only the status, a few headers and the
+raw body, decoded on access. ``release`` drops the body once it's not needed anymore, e.g. after the error has been
+logged, so that long-running workers that keep histories of errors don't keep whole responses in memory.
+"""
+import json
+from typing import Optional, Any, Iterable, Mapping, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from requests import Response
+
+__all__ = ['DEFAULT_VIEW_HEADERS', 'ResponseView', 'ResponseLike']
+
+# Headers read by the client or useful to debug errors
+DEFAULT_VIEW_HEADERS = ("Content-Type", "Location", "Retry-After", "X-Ratelimit-Reset")
+
+
+class ResponseView:
+    """
+    Read-only view of an HTTP response with the same attributes as ``requests.Response`` for the status, the headers
+    and the body.
+
+    :param status_code: HTTP status code
+    :param headers: headers to keep
+    :param content: raw body
+    :param encoding: encoding of the body, used to decode ``text``. If ``None``, it's detected from the body.
+    :param url: URL of the response
+    :param reason: HTTP reason phrase
+    """
+    __slots__ = ("status_code", "headers", "content", "encoding", "url", "reason")
+
+    def __init__(self, status_code: int, headers: Optional[Mapping[str, str]] = None, content: bytes = b"",
+                 encoding: Optional[str] = None, url: str = "", reason: str = ""):
+        # Imported here because requests is already loaded when there is a response
+        from requests.structures import CaseInsensitiveDict
+
+        self.status_code = status_code
+        self.headers: CaseInsensitiveDict[str] = CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.encoding = encoding
+        self.url = url
+        self.reason = reason
+
+    @classmethod
+    def from_response(cls, response: "ResponseLike", headers: Iterable[str] = DEFAULT_VIEW_HEADERS,
+                      content: bool = True) -> "ResponseView":
+        """
+        Create a view of a response. If it's already a view, return it as is.
+
+        :param response: response
+        :param headers: names of the headers to keep
+        :param content: if ``False``, don't keep the body
+        """
+        if isinstance(response, ResponseView):
+            return response
+
+        response_headers = response.headers
+        return cls(
+            response.status_code,
+            {name: response_headers[name] for name in headers if name in response_headers},
+            (response.content or b"") if content else b"",
+            # Not ``apparent_encoding``: the charset detection is deferred to ``text``
+            response.encoding,
+            response.url or "",
+            response.reason or "",
+        )
+
+    def __repr__(self) -> str:
+        return f"<ResponseView [{self.status_code}]>"
+
+    @property
+    def ok(self) -> bool:
+        """``True`` if the status code is less than 400, like ``requests.Response.ok``."""
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        """
+        Body of the response, decoded on each access. Like ``requests.Response.text``, the encoding is detected from
+        the body if the headers don't give it.
+        """
+        encoding = self.encoding
+        if encoding is None:
+            from requests.compat import chardet  # type: ignore[attr-defined]
+
+            encoding = chardet.detect(self.content)["encoding"] if chardet is not None else "utf-8"
+        try:
+            return str(self.content, encoding or "utf-8", errors="replace")
+        except LookupError:
+            # Unknown encoding
+            return str(self.content, errors="replace")
+
+    def json(self, **kwargs: Any) -> Any:
+        """Decode the JSON body of the response."""
+        return json.loads(self.content, **kwargs)
+
+    def release(self) -> None:
+        """Drop the body of the response. The status and headers are kept."""
+        self.content = b""
+
+
+ResponseLike = Union["Response", ResponseView]
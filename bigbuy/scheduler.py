@@ -0,0 +1,181 @@
+"""
+bigbuy.scheduler
+~~~~~~~~~~~~~~~~
+
+Priority-aware scheduling of the requests of one or more ``BigBuy`` clients that share a single rate-limit budget.
+
+Usage::
+
+    scheduler = PriorityScheduler(RateLimiter(rate=5, burst=5))
+    orders_client = BigBuy(app_key, scheduler=scheduler)
+    catalog_client = BigBuy(app_key, scheduler=scheduler)
+
+Requests are put in one queue per priority class and served with weighted fair queuing: when several classes are
+waiting, each one gets a share of the rate-limit proportional to its weight. With the default weights, critical
+requests (orders, tracking, purse) get 100 times the share of bulk catalog requests, and bulk requests are never sent
+when that would leave less than ``bulk_headroom`` tokens, so that critical requests find a token right away.
+
+By default, the priority class of a request is derived from its endpoint; use ``priority=...`` in ``request_api``
+calls to override it.
+"""
+import heapq
+import itertools
+import threading
+from typing import Optional, Mapping
+
+from .rate_limit import RateLimiter
+
+__all__ = ['PRIORITY_CRITICAL', 'PRIORITY_NORMAL', 'PRIORITY_BULK', 'DEFAULT_WEIGHTS', 'PriorityScheduler',
+           'endpoint_priority']
+
+PRIORITY_CRITICAL = "critical"
+PRIORITY_NORMAL = "normal"
+PRIORITY_BULK = "bulk"
+
+DEFAULT_WEIGHTS: Mapping[str, float] = {
+    PRIORITY_CRITICAL: 100,
+    PRIORITY_NORMAL: 10,
+    PRIORITY_BULK: 1,
+}
+
+
+def endpoint_priority(method: str, endpoint: str) -> str:
+    """
+    Return the default priority class of a request:
+
+    * orders, tracking, shipping and user endpoints are critical
+    * catalog endpoints on a single entity (e.g. ``catalog/product/{id}``) are normal
+    * other catalog endpoints, which return the whole catalog, are bulk
+    """
+    if not endpoint.startswith("catalog/"):
+        return PRIORITY_CRITICAL
+    if "{" in endpoint:
+        return PRIORITY_NORMAL
+    return PRIORITY_BULK
+
+
+class _Ticket:
+    __slots__ = ("priority", "tag", "granted")
+
+    def __init__(self, priority: str, tag: float):
+        self.priority = priority
+        self.tag = tag
+        self.granted = False
+
+
+class PriorityScheduler:
+    """
+    Weighted fair queuing scheduler in front of a rate-limiter.
+
+    :param rate_limiter: shared rate-limiter
+    :param weights: weight of each priority class. Unknown classes have a weight of 1.
+    :param bulk_headroom: number of tokens bulk requests must leave in the rate-limiter. It's capped so that bulk
+      requests never need more than the ``burst`` of the rate-limiter.
+    :param backpressure_threshold: estimated wait, in seconds, above which ``is_backpressured`` returns ``True``
+    """
+
+    def __init__(self, rate_limiter: RateLimiter, *,
+                 weights: Optional[Mapping[str, float]] = None,
+                 bulk_headroom: float = 1,
+                 backpressure_threshold: float = 10):
+        self.rate_limiter = rate_limiter
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.bulk_headroom = bulk_headroom
+        self.backpressure_threshold = backpressure_threshold
+
+        self._condition = threading.Condition()
+        self._heap: list[tuple[float, int, _Ticket]] = []
+        self._counter = itertools.count()
+        self._virtual_time = 0.0
+        self._last_tags: dict[str, float] = {}
+        self._pending: dict[str, int] = {}
+        self.dispatched: dict[str, int] = {}
+
+    def _can_dispatch(self, ticket: _Ticket) -> float:
+        """Return 0 if the ticket can be dispatched now, or the number of seconds to wait otherwise."""
+        tokens = 1 + (self.bulk_headroom if ticket.priority == PRIORITY_BULK else 0)
+        # The bucket never holds more than ``burst`` tokens: with a small burst, bulk requests leave less headroom
+        tokens = min(tokens, max(1, self.rate_limiter.burst))
+        return self.rate_limiter.time_until_available(tokens)
+
+    def acquire(self, priority: str = PRIORITY_NORMAL, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the turn of a request of the given priority class and take a token from the rate-limiter.
+
+        :param priority: priority class
+        :param timeout: maximum number of seconds to wait. By default, wait as long as necessary.
+        :return: ``True`` if the request can be sent, ``False`` on timeout.
+        """
+        clock = self.rate_limiter.clock
+        deadline = None if timeout is None else clock() + timeout
+
+        with self._condition:
+            weight = self.weights.get(priority, 1)
+            tag = max(self._virtual_time, self._last_tags.get(priority, 0.0)) + 1 / weight
+            self._last_tags[priority] = tag
+            ticket = _Ticket(priority, tag)
+            heapq.heappush(self._heap, (tag, next(self._counter), ticket))
+            self._pending[priority] = self._pending.get(priority, 0) + 1
+
+            try:
+                while True:
+                    head = self._heap[0][2]
+                    if head is ticket:
+                        wait = self._can_dispatch(ticket)
+                        if wait <= 0 and self.rate_limiter.try_acquire():
+                            heapq.heappop(self._heap)
+                            ticket.granted = True
+                            self._virtual_time = max(self._virtual_time, ticket.tag)
+                            self.dispatched[priority] = self.dispatched.get(priority, 0) + 1
+                            # Let the next request check its turn
+                            self._condition.notify_all()
+                            return True
+                        # The rate-limiter may be shared with other schedulers or clients
+                        wait = max(wait, 0.001)
+                    else:
+                        wait = None
+
+                    if deadline is not None:
+                        remaining = deadline - clock()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    self._condition.wait(wait)
+            finally:
+                self._pending[priority] -= 1
+                if not ticket.granted:
+                    # Timeout or interruption: leave the queue
+                    self._heap = [entry for entry in self._heap if entry[2] is not ticket]
+                    heapq.heapify(self._heap)
+                    self._condition.notify_all()
+
+    def pending(self, priority: Optional[str] = None) -> int:
+        """Number of requests waiting, either in total or for the given priority class."""
+        with self._condition:
+            if priority is None:
+                return sum(self._pending.values())
+            return self._pending.get(priority, 0)
+
+    def estimated_wait(self, priority: str = PRIORITY_NORMAL) -> float:
+        """
+        Estimate the number of seconds a new request of the given priority class would wait, assuming the current
+        queues are served at the rate of the rate-limiter.
+        """
+        with self._condition:
+            weight = self.weights.get(priority, 1)
+            # Under WFQ, a request waits for the requests of its own class plus the share of the other classes that
+            # are served in the meantime.
+            own = self._pending.get(priority, 0) + 1
+            ahead: float = own
+            for other, count in self._pending.items():
+                if other != priority and count:
+                    ahead += min(count, own * self.weights.get(other, 1) / weight)
+        return ahead / self.rate_limiter.rate + self.rate_limiter.time_until_available()
+
+    def is_backpressured(self, priority: str = PRIORITY_BULK) -> bool:
+        """
+        Return ``True`` if producers of requests of the given priority class should slow down, i.e. the estimated wait
+        exceeds ``backpressure_threshold``.
+        """
+        return self.estimated_wait(priority) > self.backpressure_threshold
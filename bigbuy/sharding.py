@@ -0,0 +1,553 @@
+"""
+bigbuy.sharding
+~~~~~~~~~~~~~~~
+
+Sharded catalog sync: the bulk catalog endpoints are split into shards (endpoint, language and range of pages) stored
+in a SQLite queue, and processed by several worker processes, possibly on several machines sharing the job directory.
+
+Usage::
+
+    sync = ShardedCatalogSync("/data/bigbuy-sync", ClientFactory(app_key), rate=5, burst=5)
+    sync.run(processes=4)
+    job = sync.merge()    # a completed CatalogSyncJob
+    for product in job.iter_records("products"):
+        ...
+
+Other machines can help by running ``run_worker`` on the same directory. Workers lease shards for ``lease_seconds``
+and renew their lease after each page; the shards of a worker that dies are handed to another worker when the lease
+expires. All workers share the same token bucket, stored in the queue database, so they respect a single rate-limit.
+
+The number of pages of an endpoint isn't known in advance: when the last page of a shard is full, the worker adds the
+next shard to the queue. ``merge`` then checks the pages and writes the state file of a ``CatalogSyncJob``, so the
+result is one snapshot that can be verified and read like the output of a single-process sync.
+
+SQLite locking requires the job directory to be on a local disk, e.g. a volume shared by containers of one host.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Optional, Any, Callable, Iterable, Iterator, TYPE_CHECKING
+
+from .rate_limit import RateLimiter
+from .sync import SyncTask, DEFAULT_SYNC_TASKS, CatalogSyncJob, SyncIntegrityError, Path, STATE_VERSION, \
+    _atomic_write
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['Shard', 'ShardQueue', 'SharedRateLimiter', 'ClientFactory', 'ShardedCatalogSync', 'run_worker']
+
+QUEUE_FILENAME = "queue.sqlite"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+@contextlib.contextmanager
+def _transaction(path: str) -> Iterator[sqlite3.Connection]:
+    """Open a connection and run a write transaction. Concurrent transactions wait for each other."""
+    connection = _connect(path)
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+
+
+class Shard:
+    """Range of pages ``[start_page, end_page)`` of a sync task."""
+
+    def __init__(self, shard_id: int, task: str, method: str, params: dict[str, Any], start_page: int, end_page: int,
+                 attempts: int = 0):
+        self.id = shard_id
+        self.task = task
+        self.method = method
+        self.params = params
+        self.start_page = start_page
+        self.end_page = end_page
+        self.attempts = attempts
+
+    def __repr__(self) -> str:
+        return f"<Shard {self.task} pages {self.start_page}-{self.end_page - 1}>"
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Shard":
+        return cls(row["id"], row["task"], row["method"], json.loads(row["params"]), row["start_page"],
+                   row["end_page"], row["attempts"])
+
+
+class ShardQueue:
+    """
+    Queue of shards with leases, stored in a SQLite database.
+
+    :param path: path of the database. It's created if it doesn't exist.
+    :param max_attempts: number of times a shard is tried before it's marked as failed
+    """
+
+    def __init__(self, path: Path, *, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        self.path = os.fspath(path)
+        self.max_attempts = max_attempts
+        self.clock = clock
+
+        connection = _connect(self.path)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS shards (
+                    id INTEGER PRIMARY KEY,
+                    task TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    start_page INTEGER NOT NULL,
+                    end_page INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_page INTEGER,
+                    error TEXT,
+                    UNIQUE (task, start_page)
+                );
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    tokens REAL NOT NULL,
+                    last_refill REAL NOT NULL,
+                    paused_until REAL NOT NULL
+                );
+            """)
+        finally:
+            connection.close()
+
+    def add(self, task: str, method: str, params: dict[str, Any], start_page: int, end_page: int) -> bool:
+        """Add a shard. Return ``False`` if the task already has a shard starting at this page."""
+        with _transaction(self.path) as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO shards (task, method, params, start_page, end_page) VALUES (?, ?, ?, ?, ?)",
+                (task, method, json.dumps(params, sort_keys=True), start_page, end_page))
+            return cursor.rowcount > 0
+
+    def lease(self, worker: str, lease_seconds: float) -> Optional[Shard]:
+        """Lease the next pending shard, or a shard whose lease expired. Return ``None`` if there is none."""
+        now = self.clock()
+        with _transaction(self.path) as connection:
+            row = connection.execute(
+                "SELECT * FROM shards WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                " ORDER BY task, start_page LIMIT 1",
+                (PENDING, LEASED, now)).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                "UPDATE shards SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (LEASED, worker, now + lease_seconds, row["id"]))
+            shard = Shard.from_row(row)
+            shard.attempts += 1
+            return shard
+
+    def renew(self, shard: Shard, worker: str, lease_seconds: float) -> bool:
+        """Extend the lease of a shard. Return ``False`` if the worker lost the lease."""
+        with _transaction(self.path) as connection:
+            cursor = connection.execute(
+                "UPDATE shards SET lease_expires = ? WHERE id = ? AND status = ? AND worker = ?",
+                (self.clock() + lease_seconds, shard.id, LEASED, worker))
+            return cursor.rowcount > 0
+
+    def complete(self, shard: Shard, worker: str, last_page: Optional[int]) -> bool:
+        """
+        Mark a shard as done.
+
+        :param last_page: last page of the task if it's in this shard, i.e. the first page that is not full
+        :return: ``False`` if the worker lost the lease
+        """
+        with _transaction(self.path) as connection:
+            cursor = connection.execute(
+                "UPDATE shards SET status = ?, last_page = ?, lease_expires = NULL"
+                " WHERE id = ? AND status = ? AND worker = ?",
+                (DONE, last_page, shard.id, LEASED, worker))
+            return cursor.rowcount > 0
+
+    def release(self, shard: Shard, worker: str, error: str) -> None:
+        """Give up a shard after an error. It's marked as failed after ``max_attempts`` attempts."""
+        status = FAILED if shard.attempts >= self.max_attempts else PENDING
+        with _transaction(self.path) as connection:
+            connection.execute(
+                "UPDATE shards SET status = ?, error = ?, lease_expires = NULL"
+                " WHERE id = ? AND status = ? AND worker = ?",
+                (status, error, shard.id, LEASED, worker))
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of shards by status."""
+        connection = _connect(self.path)
+        try:
+            rows = connection.execute("SELECT status, COUNT(*) AS count FROM shards GROUP BY status").fetchall()
+        finally:
+            connection.close()
+        return {row["status"]: row["count"] for row in rows}
+
+    def shards(self, status: Optional[str] = None) -> list[sqlite3.Row]:
+        """Return the rows of the shards, optionally filtered by status."""
+        connection = _connect(self.path)
+        try:
+            if status is None:
+                return connection.execute("SELECT * FROM shards ORDER BY task, start_page").fetchall()
+            return connection.execute("SELECT * FROM shards WHERE status = ? ORDER BY task, start_page",
+                                      (status,)).fetchall()
+        finally:
+            connection.close()
+
+    @property
+    def finished(self) -> bool:
+        """``True`` if no shard is pending or leased."""
+        counts = self.counts()
+        return not counts.get(PENDING) and not counts.get(LEASED)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Token bucket shared by all the processes that use the same SQLite database.
+
+    :param path: path of the database, e.g. the ``ShardQueue`` database
+    """
+
+    def __init__(self, path: Path, rate: float, burst: int = 1, *, clock: Callable[[], float] = time.time):
+        super().__init__(rate, burst, clock=clock)
+        self.path = os.fspath(path)
+
+    @contextlib.contextmanager
+    def _bucket(self) -> Iterator[dict[str, float]]:
+        """Refill the shared bucket and yield it; changes are saved at the end of the block."""
+        with _transaction(self.path) as connection:
+            now = self.clock()
+            row = connection.execute("SELECT * FROM rate_limit WHERE id = 1").fetchone()
+            if row is None:
+                bucket = {"tokens": float(self.burst), "last_refill": now, "paused_until": 0.0}
+            else:
+                bucket = dict(row)
+                if now > bucket["last_refill"]:
+                    bucket["tokens"] = min(self.burst, bucket["tokens"] + (now - bucket["last_refill"]) * self.rate)
+                    bucket["last_refill"] = now
+            bucket["now"] = now
+
+            yield bucket
+
+            connection.execute("INSERT OR REPLACE INTO rate_limit (id, tokens, last_refill, paused_until)"
+                               " VALUES (1, ?, ?, ?)",
+                               (bucket["tokens"], bucket["last_refill"], bucket["paused_until"]))
+
+    def _shared_wait_time(self, bucket: dict[str, float], tokens: float) -> float:
+        if bucket["now"] < bucket["paused_until"]:
+            return bucket["paused_until"] - bucket["now"]
+        if bucket["tokens"] >= tokens:
+            return 0
+        return (tokens - bucket["tokens"]) / self.rate
+
+    def time_until_available(self, tokens: float = 1) -> float:
+        self._check_tokens(tokens)
+        with self._bucket() as bucket:
+            return self._shared_wait_time(bucket, tokens)
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self._check_tokens(tokens)
+        with self._bucket() as bucket:
+            if self._shared_wait_time(bucket, tokens) > 0:
+                return False
+            bucket["tokens"] -= tokens
+            return True
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        self._check_tokens(tokens)
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            with self._bucket() as bucket:
+                wait_seconds = self._shared_wait_time(bucket, tokens)
+                if wait_seconds <= 0:
+                    bucket["tokens"] -= tokens
+                    return True
+                now = bucket["now"]
+
+            if deadline is not None and now + wait_seconds > deadline:
+                return False
+            time.sleep(wait_seconds)
+
+    def pause_until(self, timestamp: float) -> None:
+        with self._bucket() as bucket:
+            bucket["paused_until"] = max(bucket["paused_until"], timestamp)
+
+    @property
+    def available_tokens(self) -> float:
+        with self._bucket() as bucket:
+            return bucket["tokens"] if bucket["now"] >= bucket["paused_until"] else 0.0
+
+
+class ClientFactory:
+    """
+    Picklable factory of ``BigBuy`` clients for worker processes.
+
+    :param app_key: API key
+    :param base_url: if set, override the base URL of the clients
+    :param client_kwargs: keyword arguments passed to ``BigBuy``
+    """
+
+    def __init__(self, app_key: str, *, base_url: Optional[str] = None, **client_kwargs: Any):
+        self.app_key = app_key
+        self.base_url = base_url
+        self.client_kwargs = client_kwargs
+
+    def __call__(self, rate_limiter: Optional[RateLimiter]) -> "BigBuy":
+        from .api import BigBuy
+
+        client = BigBuy(self.app_key, rate_limiter=rate_limiter, **self.client_kwargs)
+        if self.base_url is not None:
+            client.base_url = self.base_url
+        return client
+
+
+def _page_path(directory: str, task: str, page: int) -> str:
+    return os.path.join(directory, task, f"{page:06d}.json")
+
+
+def run_worker(directory: Path, client_factory: Callable[[Optional[RateLimiter]], "BigBuy"], *,
+               rate: Optional[float] = None,
+               burst: int = 1,
+               page_size: int = 1000,
+               lease_seconds: float = 60,
+               poll_interval: float = 1,
+               max_attempts: int = 3,
+               worker_id: Optional[str] = None) -> int:
+    """
+    Process shards of the queue of a job directory until there are none left.
+
+    :param directory: job directory
+    :param client_factory: function that returns a client using the given rate-limiter
+    :param rate: rate of the shared rate-limiter. If ``None``, requests are not rate-limited.
+    :param burst: burst of the shared rate-limiter
+    :param page_size: number of records per page. It must be the same for all workers.
+    :param lease_seconds: duration of the lease of a shard. It's renewed after each page.
+    :param poll_interval: number of seconds to wait when all remaining shards are leased by other workers
+    :param max_attempts: number of times a shard is tried before it's marked as failed
+    :param worker_id: identifier of the worker. Default to the hostname and the process id.
+    :return: the number of shards processed by this worker
+    """
+    directory = os.fspath(directory)
+    queue_path = os.path.join(directory, QUEUE_FILENAME)
+    queue = ShardQueue(queue_path, max_attempts=max_attempts)
+    rate_limiter = SharedRateLimiter(queue_path, rate, burst) if rate is not None else None
+    client = client_factory(rate_limiter)
+    worker = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    processed = 0
+    while True:
+        shard = queue.lease(worker, lease_seconds)
+        if shard is None:
+            if queue.finished:
+                return processed
+            # Other workers hold the remaining shards; one of them may die
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            os.makedirs(os.path.join(directory, shard.task), exist_ok=True)
+            fetch = getattr(client, shard.method)
+            last_page: Optional[int] = None
+            for page in range(shard.start_page, shard.end_page):
+                records = fetch(pageSize=page_size, page=page, **shard.params) or []
+                _atomic_write(_page_path(directory, shard.task, page),
+                              json.dumps(records, separators=(",", ":")).encode("utf-8"))
+                if len(records) < page_size:
+                    last_page = page
+                    break
+                if not queue.renew(shard, worker, lease_seconds):
+                    # Another worker took the shard over
+                    break
+            else:
+                queue.add(shard.task, shard.method, shard.params, shard.end_page,
+                          2 * shard.end_page - shard.start_page)
+
+            if queue.complete(shard, worker, last_page):
+                processed += 1
+        except Exception as e:
+            queue.release(shard, worker, repr(e))
+
+
+class ShardedCatalogSync:
+    """
+    Coordinator of a sharded catalog sync.
+
+    :param directory: job directory. It's created if it doesn't exist.
+    :param client_factory: picklable function that returns a client using the given rate-limiter, e.g.
+      ``ClientFactory(app_key)``
+    :param tasks: endpoints to sync. Default to ``DEFAULT_SYNC_TASKS``.
+    :param languages: ISO codes of the languages used by per-language tasks. By default, all the languages returned by
+      ``get_languages``.
+    :param page_size: number of records per page
+    :param pages_per_shard: number of pages in a shard
+    :param initial_shards: number of shards created for each task before the sync starts. More shards are added as
+      needed, but creating enough of them upfront lets all workers start right away.
+    :param rate: rate of the rate-limiter shared by all workers. If ``None``, requests are not rate-limited.
+    :param burst: burst of the shared rate-limiter
+    :param lease_seconds: duration of the lease of a shard
+    :param max_attempts: number of times a shard is tried before it's marked as failed
+    """
+
+    def __init__(self, directory: Path, client_factory: Callable[[Optional[RateLimiter]], "BigBuy"], *,
+                 tasks: Iterable[SyncTask] = DEFAULT_SYNC_TASKS,
+                 languages: Optional[Iterable[str]] = None,
+                 page_size: int = 1000,
+                 pages_per_shard: int = 10,
+                 initial_shards: int = 1,
+                 rate: Optional[float] = None,
+                 burst: int = 1,
+                 lease_seconds: float = 60,
+                 max_attempts: int = 3):
+        self.directory = os.fspath(directory)
+        self.client_factory = client_factory
+        self.tasks = list(tasks)
+        self.languages = list(languages) if languages is not None else None
+        self.page_size = page_size
+        self.pages_per_shard = pages_per_shard
+        self.initial_shards = initial_shards
+        self.rate = rate
+        self.burst = burst
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.queue_path = os.path.join(self.directory, QUEUE_FILENAME)
+        self.queue = ShardQueue(self.queue_path, max_attempts=max_attempts)
+
+    def _subtasks(self) -> list[tuple[str, str, dict[str, Any]]]:
+        languages: list[str] = []
+        if any(task.per_language for task in self.tasks):
+            if self.languages is None:
+                rate_limiter = SharedRateLimiter(self.queue_path, self.rate, self.burst) \
+                    if self.rate is not None else None
+                client = self.client_factory(rate_limiter)
+                self.languages = [language["isoCode"] for language in client.get_languages()]
+            languages = self.languages
+        return [(name, task.method, params) for task in self.tasks for name, params in task.expand(languages)]
+
+    def plan(self) -> int:
+        """Add the initial shards of each task to the queue. Return the number of shards added."""
+        added = 0
+        for name, method, params in self._subtasks():
+            for i in range(self.initial_shards):
+                start = i * self.pages_per_shard
+                added += self.queue.add(name, method, params, start, start + self.pages_per_shard)
+        return added
+
+    def worker_kwargs(self) -> dict[str, Any]:
+        """Return the keyword arguments to pass to ``run_worker`` to process shards of this job."""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "page_size": self.page_size,
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+        }
+
+    def run(self, processes: int = 4, *, max_rounds: int = 3) -> CatalogSyncJob:
+        """
+        Plan the shards, process them with a pool of worker processes, and merge the result.
+
+        :param processes: number of worker processes
+        :param max_rounds: number of times the pool is restarted if workers die before the queue is finished
+        :return: the merged job
+        :raise Exception: the error of a worker, if all the workers of a round failed without processing any shard
+        """
+        self.plan()
+        errors: list[BaseException] = []
+        for _ in range(max_rounds):
+            settled = self._settled_shards()
+            with ProcessPoolExecutor(processes) as executor:
+                futures = [executor.submit(run_worker, self.directory, self.client_factory, **self.worker_kwargs())
+                           for _ in range(processes)]
+                wait(futures)
+            errors = [error for future in futures if (error := future.exception()) is not None]
+            if self.queue.finished:
+                break
+            if errors and self._settled_shards() == settled:
+                # Restarting the workers won't help, e.g. the client factory is broken
+                raise errors[0]
+
+        try:
+            return self.merge()
+        except SyncIntegrityError as e:
+            if errors:
+                raise e from errors[0]
+            raise
+
+    def _settled_shards(self) -> int:
+        """Return the number of shards that are done or failed."""
+        counts = self.queue.counts()
+        return counts.get(DONE, 0) + counts.get(FAILED, 0)
+
+    def merge(self) -> CatalogSyncJob:
+        """
+        Check that all shards were processed and write the state file of a ``CatalogSyncJob`` for the synced pages.
+        Pages fetched after the last page of a task are removed.
+
+        :raise SyncIntegrityError: if some shards are not done
+        """
+        problems = [f"{row['task']}: pages {row['start_page']}-{row['end_page'] - 1} are {row['status']}"
+                    + (f" ({row['error']})" if row["error"] else "")
+                    for row in self.queue.shards() if row["status"] != DONE]
+
+        last_pages: dict[str, int] = {}
+        for row in self.queue.shards(DONE):
+            if row["last_page"] is not None:
+                last_pages[row["task"]] = min(row["last_page"], last_pages.get(row["task"], row["last_page"]))
+
+        tasks_state: dict[str, Any] = {}
+        for name, method, params in self._subtasks():
+            if name not in last_pages:
+                problems.append(f"{name}: the last page was not fetched")
+                continue
+
+            pages = {}
+            for page in range(last_pages[name] + 1):
+                try:
+                    with open(_page_path(self.directory, name, page), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    problems.append(f"{name}: page {page} is missing")
+                    continue
+                pages[str(page)] = {"count": len(json.loads(data)), "sha256": hashlib.sha256(data).hexdigest()}
+
+            tasks_state[name] = {"method": method, "params": params, "next_page": last_pages[name] + 1,
+                                 "done": True, "pages": pages}
+
+        if problems:
+            raise SyncIntegrityError(problems)
+
+        for name, task_state in tasks_state.items():
+            task_directory = os.path.join(self.directory, name)
+            for filename in os.listdir(task_directory):
+                if filename.endswith(".json") and int(filename[:-5]) >= task_state["next_page"]:
+                    os.unlink(os.path.join(task_directory, filename))
+
+        state = {"version": STATE_VERSION, "page_size": self.page_size, "languages": self.languages,
+                 "tasks": tasks_state, "completed_at": time.time()}
+        job = CatalogSyncJob(self.client_factory(None), self.directory, tasks=self.tasks, languages=self.languages,
+                             page_size=self.page_size)
+        job.state = state
+        job._save_state()
+        return job
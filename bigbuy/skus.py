@@ -0,0 +1,176 @@
+"""
+bigbuy.skus
+~~~~~~~~~~~
+
+Bulk resolution of SKUs to product and variation ids.
+
+Usage::
+
+    resolver = SkuResolver.from_client(client)  # loads get_products and get_products_variations
+    matches = resolver.resolve_many(["S0123456", "V0001234", "UNKNOWN"])
+    matches["V0001234"]
+    # SkuMatch(sku="V0001234", id=1234, product_id=123456, is_variation=True, record={...})
+    matches["UNKNOWN"]
+    # None
+
+SKUs are first looked up in an index built from the bulk endpoints. Only the SKUs missing from the index are fetched
+with ``get_product_information_by_sku``, concurrently; the SKUs that are not found are remembered so that they don't
+cost a request again, until ``negative_ttl`` seconds have passed or the index is reloaded.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Iterable, Mapping, NamedTuple, TYPE_CHECKING
+
+from .exceptions import BBResponseError, BBProductNotFoundError, BBIncorrectRefError
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['SkuMatch', 'SkuResolver']
+
+
+class SkuMatch(NamedTuple):
+    """Product or variation of a SKU."""
+    sku: str
+    # id of the product or of the variation
+    id: int
+    product_id: int
+    # ``None`` if unknown, i.e. for SKUs fetched with ``get_product_information_by_sku``
+    is_variation: Optional[bool]
+    record: Mapping[str, Any]
+
+
+def _is_not_found(error: BBResponseError) -> bool:
+    return isinstance(error, (BBProductNotFoundError, BBIncorrectRefError)) or error.response.status_code == 404
+
+
+class SkuResolver:
+    """
+    Resolve SKUs of products and variations.
+
+    :param client: client used to fetch the SKUs that are not in the index. If ``None``, these SKUs are not found.
+    :param max_workers: maximum number of concurrent requests for SKUs that are not in the index
+    :param negative_ttl: number of seconds during which a SKU that was not found is not fetched again. If ``None``
+      (default), until the index is reloaded.
+    """
+
+    def __init__(self, client: Optional["BigBuy"] = None, *, max_workers: int = 8,
+                 negative_ttl: Optional[float] = None):
+        self.client = client
+        self.max_workers = max_workers
+        self.negative_ttl = negative_ttl
+        self.index: dict[str, SkuMatch] = {}
+        # SKUs not found, with the time they were fetched
+        self._not_found: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_client(cls, client: "BigBuy", **kwargs: Any) -> "SkuResolver":
+        """Create a resolver that uses a client, and load its index from the bulk endpoints."""
+        resolver = cls(client, **kwargs)
+        resolver.refresh()
+        return resolver
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku.strip() in self.index
+
+    def load(self, products: Iterable[Mapping[str, Any]], variations: Iterable[Mapping[str, Any]] = ()) -> None:
+        """
+        Replace the index, and forget the SKUs that were not found.
+
+        :param products: products, as returned by ``get_products``
+        :param variations: variations, as returned by ``get_products_variations``
+        """
+        index: dict[str, SkuMatch] = {}
+        for product in products:
+            index[product["sku"]] = SkuMatch(product["sku"], product["id"], product["id"], False, product)
+        for variation in variations:
+            index[variation["sku"]] = SkuMatch(variation["sku"], variation["id"], variation["product"], True,
+                                               variation)
+        with self._lock:
+            self.index = index
+            self._not_found.clear()
+
+    def refresh(self, **params: Any) -> None:
+        """Reload the index from ``get_products`` and ``get_products_variations`` with the given parameters."""
+        if self.client is None:
+            raise ValueError("This resolver has no client")
+        self.load(self.client.get_products(**params), self.client.get_products_variations(**params))
+
+    def forget(self, skus: Optional[Iterable[str]] = None) -> None:
+        """Forget that some SKUs (by default, all of them) were not found, so that they are fetched again."""
+        with self._lock:
+            if skus is None:
+                self._not_found.clear()
+            else:
+                for sku in skus:
+                    self._not_found.pop(sku.strip(), None)
+
+    def _known_not_found(self, sku: str, now: float) -> bool:
+        fetched_at = self._not_found.get(sku)
+        if fetched_at is None:
+            return False
+        return self.negative_ttl is None or now - fetched_at < self.negative_ttl
+
+    def _fetch(self, sku: str) -> Optional[SkuMatch]:
+        assert self.client is not None
+        try:
+            information = self.client.get_product_information_by_sku(sku)
+        except BBResponseError as e:
+            if _is_not_found(e):
+                return None
+            raise
+        return SkuMatch(sku, information["id"], information["id"], None, information)
+
+    def resolve(self, sku: str) -> Optional[SkuMatch]:
+        """Resolve a SKU. Return ``None`` if it's not found."""
+        return self.resolve_many([sku])[sku]
+
+    def resolve_many(self, skus: Iterable[str]) -> dict[str, Optional[SkuMatch]]:
+        """
+        Resolve SKUs, sending requests only for the SKUs that are neither in the index nor known to be missing.
+
+        :param skus: SKUs; leading and trailing whitespace is ignored
+        :return: the match of each SKU, or ``None`` for the SKUs that are not found, keyed by SKU as given
+        """
+        skus = list(skus)
+        now = time.monotonic()
+        matches: dict[str, Optional[SkuMatch]] = {}
+        to_fetch: set[str] = set()
+        with self._lock:
+            index = self.index
+            for sku in skus:
+                key = sku.strip()
+                match = index.get(key)
+                if match is None and self.client is not None and not self._known_not_found(key, now):
+                    to_fetch.add(key)
+                matches[sku] = match
+
+        if to_fetch:
+            fetched = self._fetch_all(sorted(to_fetch))
+            for sku in skus:
+                key = sku.strip()
+                if key in fetched:
+                    matches[sku] = fetched[key]
+        return matches
+
+    def _fetch_all(self, skus: list[str]) -> dict[str, Optional[SkuMatch]]:
+        with ThreadPoolExecutor(min(self.max_workers, len(skus)), thread_name_prefix="bigbuy-skus") as executor:
+            fetched = dict(zip(skus, executor.map(self._fetch, skus)))
+
+        now = time.monotonic()
+        with self._lock:
+            for sku, match in fetched.items():
+                if match is None:
+                    self._not_found[sku] = now
+                else:
+                    self.index[sku] = match
+        return fetched
+
+    def missing(self, skus: Iterable[str]) -> list[str]:
+        """Return the SKUs that are not found, in order."""
+        return [sku for sku, match in self.resolve_many(skus).items() if match is None]
@@ -0,0 +1,391 @@
+"""
+bigbuy.snapshots
+~~~~~~~~~~~~~~~~
+
+Versioned, compressed snapshots of catalog data, with random access by id.
+
+Usage::
+
+    store = SnapshotStore("/data/snapshots/products")
+    store.write("2026-10-19", client.get_products())
+    ...
+    product = store.get(123456, at="2026-10-01")   # the product as it was on October 1st
+    with store.open("2026-10-19") as snapshot:
+        for product in snapshot:
+            ...
+
+Records are sorted by id and stored in blocks of ``block_size`` records, each compressed independently (zlib by
+default, or ``lzma``, or ``zstd`` if the ``zstandard`` package is installed). The index of the blocks is stored at the
+end of the file, so reading a record only decompresses the block that contains it.
+
+Snapshots are stored as deltas against the last full snapshot: a delta contains only the records that were created
+or changed since the full snapshot, and the ids of the deleted records. A full snapshot is written every
+``full_every`` versions, or when a delta would be larger than ``max_delta_ratio`` of a full snapshot.
+"""
+import bisect
+import json
+import lzma
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Optional, Any, Iterable, Iterator, Callable, Union, Mapping
+
+from .sync import _atomic_write
+
+__all__ = ['SnapshotFile', 'Snapshot', 'SnapshotStore', 'write_snapshot_file']
+
+Path = Union[str, "os.PathLike[str]"]
+Record = dict[str, Any]
+Key = Union[int, str]
+
+MAGIC = b"BBSNAP1\n"
+EXTENSION = ".snap"
+_VERSION_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+_FOOTER_LENGTH = struct.Struct("<Q")
+
+
+def _codec(name: str) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """Return the compression and decompression functions of a codec."""
+    if name == "zlib":
+        return (lambda data: zlib.compress(data, 6)), zlib.decompress
+    if name == "lzma":
+        return lzma.compress, lzma.decompress
+    if name == "zstd":
+        try:
+            import zstandard  # type: ignore[import-not-found]
+        except ImportError:
+            raise ImportError("zstandard is required to use the zstd codec: pip install zstandard")
+
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f"Unknown codec {name!r}")
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_snapshot_file(path: str, records: Iterable[Record], *,
+                        key: str = "id",
+                        codec: str = "zlib",
+                        block_size: int = 1000,
+                        metadata: Optional[Mapping[str, Any]] = None) -> int:
+    """
+    Write records to a snapshot file. The records must be sorted by key.
+
+    :return: the number of records written
+    """
+    compress, _ = _codec(codec)
+    blocks: list[list[Any]] = []
+    parts = [MAGIC]
+    offset = len(MAGIC)
+    count = 0
+
+    def flush(block: list[Record]) -> None:
+        nonlocal offset
+        data = compress(_dumps(block))
+        blocks.append([block[0][key], block[-1][key], offset, len(data), len(block)])
+        parts.append(data)
+        offset += len(data)
+
+    block: list[Record] = []
+    for record in records:
+        block.append(record)
+        count += 1
+        if len(block) == block_size:
+            flush(block)
+            block = []
+    if block:
+        flush(block)
+
+    footer = _dumps({**(metadata or {}), "key": key, "codec": codec, "count": count, "blocks": blocks})
+    parts.append(footer)
+    parts.append(_FOOTER_LENGTH.pack(len(footer)))
+    _atomic_write(path, b"".join(parts))
+    return count
+
+
+def _canonical(record: Record) -> str:
+    return json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+
+class SnapshotFile:
+    """
+    Reader of a single snapshot file.
+
+    :param path: path of the file
+    """
+
+    def __init__(self, path: Path):
+        self.path = os.fspath(path)
+        self._file = open(self.path, "rb")
+        self._lock = threading.Lock()
+
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot file")
+
+            self._file.seek(-_FOOTER_LENGTH.size, os.SEEK_END)
+            footer_length, = _FOOTER_LENGTH.unpack(self._file.read(_FOOTER_LENGTH.size))
+            self._file.seek(-_FOOTER_LENGTH.size - footer_length, os.SEEK_END)
+            self.metadata: dict[str, Any] = json.loads(self._file.read(footer_length))
+
+            self.key: str = self.metadata["key"]
+            self.blocks: list[list[Any]] = self.metadata.pop("blocks")
+            self._last_keys = [block[1] for block in self.blocks]
+            _, self._decompress = _codec(self.metadata["codec"])
+        except BaseException:
+            self._file.close()
+            raise
+        # Last decompressed block, for sequential lookups
+        self._cached_block: tuple[int, list[Record], list[Key]] = (-1, [], [])
+
+    def __len__(self) -> int:
+        count: int = self.metadata["count"]
+        return count
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _read_block(self, index: int) -> tuple[list[Record], list[Key]]:
+        with self._lock:
+            cached_index, records, keys = self._cached_block
+            if cached_index == index:
+                return records, keys
+
+            _, _, offset, length, _ = self.blocks[index]
+            self._file.seek(offset)
+            records = json.loads(self._decompress(self._file.read(length)))
+            keys = [record[self.key] for record in records]
+            self._cached_block = (index, records, keys)
+            return records, keys
+
+    def get(self, key: Key) -> Optional[Record]:
+        """Return the record with the given key, or ``None``. Only the block that may contain it is decompressed."""
+        index = bisect.bisect_left(self._last_keys, key)
+        if index == len(self.blocks) or self.blocks[index][0] > key:
+            return None
+
+        records, keys = self._read_block(index)
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return records[position]
+        return None
+
+    def __iter__(self) -> Iterator[Record]:
+        for index in range(len(self.blocks)):
+            records, _ = self._read_block(index)
+            yield from records
+
+
+class Snapshot:
+    """
+    Version of the catalog data: either a full snapshot file, or a delta file applied to a full snapshot file.
+    """
+
+    def __init__(self, version: str, file: SnapshotFile, base: Optional[SnapshotFile] = None):
+        self.version = version
+        self.file = file
+        self.base = base
+        self.deleted = frozenset(file.metadata.get("deleted", ()))
+        self.key = file.key
+
+    def __repr__(self) -> str:
+        kind = f"delta of {self.file.metadata['base']}" if self.base is not None else "full"
+        return f"<Snapshot {self.version} ({kind})>"
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def is_delta(self) -> bool:
+        return self.base is not None
+
+    def __len__(self) -> int:
+        count: int = self.file.metadata["total"]
+        return count
+
+    def get(self, key: Key) -> Optional[Record]:
+        """Return the record with the given key in this version, or ``None``."""
+        record = self.file.get(key)
+        if record is not None or self.base is None or key in self.deleted:
+            return record
+        return self.base.get(key)
+
+    def __iter__(self) -> Iterator[Record]:
+        """Iterate over the records of this version, sorted by key."""
+        if self.base is None:
+            yield from self.file
+            return
+
+        key = self.key
+        changes = iter(self.file)
+        change = next(changes, None)
+        for record in self.base:
+            record_key = record[key]
+            while change is not None and change[key] < record_key:
+                yield change
+                change = next(changes, None)
+            if change is not None and change[key] == record_key:
+                yield change
+                change = next(changes, None)
+            elif record_key not in self.deleted:
+                yield record
+
+        while change is not None:
+            yield change
+            change = next(changes, None)
+
+    def close(self) -> None:
+        self.file.close()
+        if self.base is not None:
+            self.base.close()
+
+
+class SnapshotStore:
+    """
+    Directory of versioned snapshots of one kind of records, e.g. products.
+
+    :param directory: directory of the snapshot files. It's created if it doesn't exist.
+    :param key: field used as the record id. Its values must all be of the same type.
+    :param codec: ``"zlib"``, ``"lzma"`` or ``"zstd"``
+    :param block_size: number of records per compressed block
+    :param full_every: write a full snapshot every this number of versions. Use ``1`` to disable deltas.
+    :param max_delta_ratio: write a full snapshot instead of a delta if the delta would contain more than this ratio of
+      the records
+    """
+
+    def __init__(self, directory: Path, *,
+                 key: str = "id",
+                 codec: str = "zlib",
+                 block_size: int = 1000,
+                 full_every: int = 30,
+                 max_delta_ratio: float = 0.5):
+        _codec(codec)  # check it's available
+        self.directory = os.fspath(directory)
+        self.key = key
+        self.codec = codec
+        self.block_size = block_size
+        self.full_every = full_every
+        self.max_delta_ratio = max_delta_ratio
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.directory, version + EXTENSION)
+
+    def versions(self) -> list[str]:
+        """Return the versions in the store, sorted."""
+        return sorted(name[:-len(EXTENSION)] for name in os.listdir(self.directory) if name.endswith(EXTENSION))
+
+    def version_at(self, at: str) -> Optional[str]:
+        """Return the latest version that is lower or equal to ``at``, or ``None``."""
+        versions = self.versions()
+        index = bisect.bisect_right(versions, at)
+        return versions[index - 1] if index else None
+
+    def open(self, version: Optional[str] = None) -> Snapshot:
+        """Open a version, by default the latest one. Close it when you're done."""
+        if version is None:
+            versions = self.versions()
+            if not versions:
+                raise LookupError("The store is empty")
+            version = versions[-1]
+
+        file = SnapshotFile(self._path(version))
+        base_version = file.metadata.get("base")
+        try:
+            base = SnapshotFile(self._path(base_version)) if base_version is not None else None
+        except BaseException:
+            file.close()
+            raise
+        return Snapshot(version, file, base)
+
+    def get(self, key: Key, *, at: Optional[str] = None) -> Optional[Record]:
+        """
+        Return a record as it was in a version.
+
+        :param key: record id
+        :param at: version, or any string that sorts like versions (e.g. a date when versions are dates). The latest
+          version lower or equal to it is used. By default, use the latest version.
+        """
+        version = self.version_at(at) if at is not None else None
+        if at is not None and version is None:
+            return None
+        snapshot = self.open(version)
+        try:
+            return snapshot.get(key)
+        finally:
+            snapshot.close()
+
+    def write(self, version: str, records: Iterable[Record]) -> Snapshot:
+        """
+        Write a new version. Versions are sorted as strings and each new version must be greater than the previous
+        ones; ISO dates are a good choice.
+
+        :return: the new snapshot, opened
+        """
+        if not _VERSION_RE.match(version):
+            raise ValueError(f"Invalid version {version!r}: use letters, digits, '.', '_' and '-'")
+
+        versions = self.versions()
+        if versions and version <= versions[-1]:
+            raise ValueError(f"Version {version!r} must be greater than the latest version {versions[-1]!r}")
+
+        key = self.key
+        sorted_records = sorted(records, key=lambda record: record[key])
+        options: dict[str, Any] = {"key": key, "codec": self.codec, "block_size": self.block_size}
+
+        base_version = self._delta_base(versions)
+        if base_version is not None:
+            with SnapshotFile(self._path(base_version)) as base:
+                changes, deleted = _diff(base, sorted_records, key)
+            if len(changes) <= self.max_delta_ratio * len(sorted_records):
+                write_snapshot_file(self._path(version), changes, **options, metadata={
+                    "base": base_version, "deleted": deleted, "total": len(sorted_records),
+                })
+                return self.open(version)
+
+        write_snapshot_file(self._path(version), sorted_records, **options, metadata={
+            "base": None, "total": len(sorted_records),
+        })
+        return self.open(version)
+
+    def _delta_base(self, versions: list[str]) -> Optional[str]:
+        """Return the full snapshot the next version should be a delta of, or ``None`` to write a full one."""
+        for distance, version in enumerate(reversed(versions), 1):
+            if distance >= self.full_every:
+                return None
+            with SnapshotFile(self._path(version)) as file:
+                if file.metadata.get("base") is None:
+                    return version
+        return None
+
+
+def _diff(base: SnapshotFile, records: list[Record], key: str) -> tuple[list[Record], list[Key]]:
+    """Return the records that are new or changed compared to a sorted base, and the keys of deleted records."""
+    changes: list[Record] = []
+    deleted: list[Key] = []
+    position = 0
+    for base_record in base:
+        base_key = base_record[key]
+        while position < len(records) and records[position][key] < base_key:
+            changes.append(records[position])
+            position += 1
+        if position < len(records) and records[position][key] == base_key:
+            if _canonical(records[position]) != _canonical(base_record):
+                changes.append(records[position])
+            position += 1
+        else:
+            deleted.append(base_key)
+    changes.extend(records[position:])
+    return changes, deleted
@@ -0,0 +1,193 @@
+"""
+bigbuy.splitting
+~~~~~~~~~~~~~~~~
+
+Plan the warehouse split of orders before sending them.
+
+Usage::
+
+    planner = WarehouseSplitPlanner.from_client(client)
+    plan = planner.plan(order)
+    plan.groups
+    # {1: [{"reference": "S0123456", "quantity": 2}], 3: [{"reference": "S0234567", "quantity": 1}]}
+    plan.multi_shipping
+    # True
+
+    order_ids = planner.create(client, order)  # create_order or create_multi_shipping_order, chosen up front
+
+BigBuy ships the products of an order from the warehouses that have them in stock, and ``create_order`` and
+``check_order`` fail with a ``BBWarehouseSplitError`` when an order needs several warehouses. The planner groups the
+lines of orders by warehouse using the ``warehouse`` of the stocks by handling days, so that split orders go to the
+multi-shipping endpoints directly. Splits reported by the API are remembered and override the predictions for their
+references.
+"""
+from typing import Optional, Any, Iterable, Mapping, Union, TYPE_CHECKING
+
+from .exceptions import BBWarehouseSplitError
+from .types import BBProductStockByHandlingDaysDict, BBCheckOrderDict, BBMultiCheckOrderDict
+from .validation import predict_warehouses, stocks_by_warehouse
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['OrderPlan', 'WarehouseSplitPlanner']
+
+
+class OrderPlan:
+    """
+    Warehouse split of an order.
+
+    * ``groups``: lines of the order shipped from each warehouse
+    * ``unassigned``: lines whose references have no known stock
+    """
+
+    def __init__(self, order: Mapping[str, Any], groups: dict[int, list[dict[str, Any]]],
+                 unassigned: list[dict[str, Any]]):
+        self.order = order
+        self.groups = groups
+        self.unassigned = unassigned
+
+    def __repr__(self) -> str:
+        return f"<OrderPlan warehouses={list(self.groups)} unassigned={len(self.unassigned)}>"
+
+    @property
+    def multi_shipping(self) -> bool:
+        """``True`` if the order must be sent to the multi-shipping endpoints."""
+        return len(self.groups) > 1
+
+    @property
+    def references(self) -> dict[int, list[str]]:
+        """References shipped from each warehouse."""
+        return {warehouse: [line["reference"] for line in lines] for warehouse, lines in self.groups.items()}
+
+
+class WarehouseSplitPlanner:
+    """
+    Group the lines of orders by warehouse.
+
+    :param stocks: stock of each reference, by warehouse. See ``update_stocks``.
+    """
+
+    def __init__(self, stocks: Optional[dict[str, dict[int, int]]] = None):
+        self.stocks: dict[str, dict[int, int]] = stocks if stocks is not None else {}
+        # warehouse of references, as reported by BBWarehouseSplitError
+        self.known_warehouses: dict[str, int] = {}
+
+    @classmethod
+    def from_client(cls, client: "BigBuy") -> "WarehouseSplitPlanner":
+        """Create a planner and load the stocks of products and variations from the API."""
+        planner = cls()
+        planner.update_stocks(client.get_products_stock_by_handling_days())
+        planner.update_stocks(client.get_products_variations_stock_by_handling_days(), complete=False)
+        return planner
+
+    def update_stocks(self, records: Iterable[BBProductStockByHandlingDaysDict], *, complete: bool = True) -> None:
+        """
+        Update the stocks.
+
+        :param records: stocks, as returned by ``get_products_stock_by_handling_days``
+        :param complete: if ``True`` (default), replace all the stocks, and forget the warehouses learned from errors
+        """
+        stocks = stocks_by_warehouse(records)
+        if complete:
+            self.stocks = stocks
+            self.known_warehouses.clear()
+        else:
+            self.stocks.update(stocks)
+
+    def learn(self, error: BBWarehouseSplitError) -> None:
+        """Remember the warehouses of the references of a ``BBWarehouseSplitError``."""
+        for warehouse in error.warehouses:
+            for reference in warehouse.get("references", []):
+                self.known_warehouses[reference] = int(warehouse["id"])
+
+    def plan(self, order: Mapping[str, Any], stocks: Optional[Mapping[str, Mapping[int, int]]] = None) -> OrderPlan:
+        """
+        Plan the warehouse split of an order.
+
+        :param order: order, in the format of ``create_order``
+        :param stocks: stocks to use instead of the stocks of the planner
+        """
+        if stocks is None:
+            stocks = self.stocks
+
+        lines: list[dict[str, Any]] = list(order.get("products", []))
+        groups: dict[int, list[dict[str, Any]]] = {}
+        unassigned: list[dict[str, Any]] = []
+
+        known_warehouses = self.known_warehouses
+        predicted: dict[str, int] = {}
+        to_predict = [(line["reference"], line["quantity"]) for line in lines
+                      if line["reference"] not in known_warehouses and line["reference"] in stocks]
+        for predicted_warehouse, references in predict_warehouses(to_predict, stocks).items():
+            for reference in references:
+                predicted[reference] = predicted_warehouse
+
+        # Keep the order of the lines in each group
+        for line in lines:
+            reference = line["reference"]
+            if (warehouse := known_warehouses.get(reference, predicted.get(reference))) is None:
+                unassigned.append(line)
+            else:
+                groups.setdefault(warehouse, []).append(line)
+
+        return OrderPlan(order, groups, unassigned)
+
+    def plan_many(self, orders: Iterable[Mapping[str, Any]], *, reserve: bool = False) -> list[OrderPlan]:
+        """
+        Plan the warehouse split of a batch of orders.
+
+        :param orders: orders
+        :param reserve: if ``True``, the stock used by each order is not available to the next ones. The stocks of the
+          planner are not modified.
+        """
+        if not reserve:
+            return [self.plan(order) for order in orders]
+
+        stocks: dict[str, dict[int, int]] = {}
+        plans = []
+        for order in orders:
+            # Copy the stocks of the references of the order on first use
+            for line in order.get("products", []):
+                reference = line["reference"]
+                if reference not in stocks and reference in self.stocks:
+                    stocks[reference] = dict(self.stocks[reference])
+
+            plan = self.plan(order, stocks)
+            for warehouse, lines in plan.groups.items():
+                for line in lines:
+                    if (reference_stocks := stocks.get(line["reference"])) is not None:
+                        reference_stocks[warehouse] = max(0, reference_stocks.get(warehouse, 0) - line["quantity"])
+            plans.append(plan)
+        return plans
+
+    def check(self, client: "BigBuy", order: dict[str, Any],
+              **params: Any) -> Union[BBCheckOrderDict, BBMultiCheckOrderDict]:
+        """
+        Check an order with ``check_multi_shipping_order`` if it's split, with ``check_order`` otherwise. If
+        ``check_order`` fails with a ``BBWarehouseSplitError``, learn the split and retry with
+        ``check_multi_shipping_order``.
+        """
+        if self.plan(order).multi_shipping:
+            return client.check_multi_shipping_order(order, **params)
+        try:
+            return client.check_order(order, **params)
+        except BBWarehouseSplitError as e:
+            self.learn(e)
+            return client.check_multi_shipping_order(order, **params)
+
+    def create(self, client: "BigBuy", order: dict[str, Any], **params: Any) -> list[str]:
+        """
+        Create an order with ``create_multi_shipping_order`` if it's split, with ``create_order`` otherwise. If
+        ``create_order`` fails with a ``BBWarehouseSplitError``, learn the split and retry with
+        ``create_multi_shipping_order``.
+
+        :return: the ids of the created orders
+        """
+        if self.plan(order).multi_shipping:
+            return client.create_multi_shipping_order_ids(order, **params)
+        try:
+            return [client.create_order_id(order, **params)]
+        except BBWarehouseSplitError as e:
+            self.learn(e)
+            return client.create_multi_shipping_order_ids(order, **params)
@@ -0,0 +1,257 @@
+"""
+bigbuy.sync
+~~~~~~~~~~~
+
+Resumable full-catalog sync built on the paginated bulk catalog endpoints.
+
+Usage::
+
+    job = CatalogSyncJob(client, "/var/lib/bigbuy-sync")
+    job.run()       # if this crashes, run it again: it resumes after the last completed page
+    for product in job.iter_records("products"):
+        ...
+
+Each page is written to its own JSON file in the job directory, and the state file (``state.json``) records the pages
+completed for each task with their number of records and SHA-256 checksum. Both are written to a temporary file first
+and then atomically renamed, so a crash never leaves a half-written file behind. ``verify`` checks that each page file
+is still present and matches its checksum; ``run`` calls it before marking the job as completed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional, Any, Union, Iterable, Iterator, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['SyncTask', 'DEFAULT_SYNC_TASKS', 'CatalogSyncJob', 'SyncIntegrityError']
+
+Path = Union[str, "os.PathLike[str]"]
+
+STATE_FILENAME = "state.json"
+STATE_VERSION = 1
+
+
+class SyncIntegrityError(ValueError):
+    """Raised by ``CatalogSyncJob.verify`` when the synced data is incomplete or corrupted."""
+
+    def __init__(self, problems: list[str]):
+        self.problems = problems
+        super().__init__("; ".join(problems))
+
+
+class SyncTask:
+    """
+    Bulk catalog endpoint to sync.
+
+    :param method: name of a paginated method of ``BigBuy``, e.g. ``"get_products"``
+    :param per_language: if ``True``, sync the endpoint once per language, with the ``isoCode`` parameter
+    :param params: additional parameters passed to the method
+    :param name: name of the task. By default, it's the method name without the ``get_`` prefix.
+    """
+
+    def __init__(self, method: str, *, per_language: bool = False, params: Optional[dict[str, Any]] = None,
+                 name: Optional[str] = None):
+        self.method = method
+        self.per_language = per_language
+        self.params = params or {}
+        self.name = name or method.removeprefix("get_")
+
+    def __repr__(self) -> str:
+        return f"<SyncTask {self.name}>"
+
+    def expand(self, languages: Iterable[str]) -> list[tuple[str, dict[str, Any]]]:
+        """Return the name and parameters of each sub-task, i.e. one per language for per-language tasks."""
+        if not self.per_language:
+            return [(self.name, dict(self.params))]
+        return [(f"{self.name}.{iso_code}", {**self.params, "isoCode": iso_code}) for iso_code in languages]
+
+
+DEFAULT_SYNC_TASKS = (
+    SyncTask("get_products"),
+    SyncTask("get_products_information", per_language=True),
+    SyncTask("get_products_images"),
+    SyncTask("get_products_variations"),
+    SyncTask("get_variations"),
+)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CatalogSyncJob:
+    """
+    Resumable sync of bulk catalog endpoints to a local directory.
+
+    :param client: client used to call the API
+    :param directory: job directory. It's created if it doesn't exist.
+    :param tasks: endpoints to sync. Default to ``DEFAULT_SYNC_TASKS``.
+    :param languages: ISO codes of the languages used by per-language tasks. By default, all the languages returned by
+      ``get_languages`` when the job starts.
+    :param page_size: number of records per page. It can't be changed when resuming a job.
+    :param on_page: function called with the task name, the page number and the number of records after each page
+    """
+
+    def __init__(self, client: "BigBuy", directory: Path, *,
+                 tasks: Iterable[SyncTask] = DEFAULT_SYNC_TASKS,
+                 languages: Optional[Iterable[str]] = None,
+                 page_size: int = 1000,
+                 on_page: Optional[Callable[[str, int, int], None]] = None):
+        self.client = client
+        self.directory = os.fspath(directory)
+        self.tasks = list(tasks)
+        self.languages = list(languages) if languages is not None else None
+        self.page_size = page_size
+        self.on_page = on_page
+        self.state = self._load_state()
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.directory, STATE_FILENAME)
+
+    def _page_path(self, task_name: str, page: int) -> str:
+        return os.path.join(self.directory, task_name, f"{page:06d}.json")
+
+    def _load_state(self) -> dict[str, Any]:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return {"version": STATE_VERSION, "page_size": self.page_size, "languages": self.languages, "tasks": {}}
+
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported sync state version: {state.get('version')!r}")
+        if state["page_size"] != self.page_size:
+            raise ValueError(f"The job was started with page_size={state['page_size']}; use the same page size to"
+                             " resume it or call reset()")
+        return state
+
+    def _save_state(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        _atomic_write(self.state_path, json.dumps(self.state, indent=1, sort_keys=True).encode("utf-8"))
+
+    def reset(self) -> None:
+        """Forget the progress of the job. Page files are overwritten on the next run."""
+        self.state = {"version": STATE_VERSION, "page_size": self.page_size, "languages": self.languages, "tasks": {}}
+        self._save_state()
+
+    def _languages(self) -> list[str]:
+        if self.state["languages"] is None:
+            # Save the languages so that a resumed job uses the same ones
+            self.state["languages"] = [language["isoCode"] for language in self.client.get_languages()]
+            self._save_state()
+        languages: list[str] = self.state["languages"]
+        return languages
+
+    def subtasks(self) -> list[tuple[str, str, dict[str, Any]]]:
+        """Return the name, method and parameters of every sub-task of the job."""
+        languages = self._languages() if any(task.per_language for task in self.tasks) else []
+        return [(name, task.method, params)
+                for task in self.tasks
+                for name, params in task.expand(languages)]
+
+    @property
+    def completed(self) -> bool:
+        """``True`` if all tasks are completed."""
+        tasks = self.state["tasks"]
+        return all(tasks.get(name, {}).get("done") for name, _, _ in self.subtasks())
+
+    def run(self) -> dict[str, int]:
+        """
+        Run the job, or resume it where it stopped, and verify it.
+
+        :return: the number of records of each task
+        :raise SyncIntegrityError: if a page file is missing or doesn't match its checksum, e.g. a page of a previous
+          run was modified. Call ``reset()`` to sync everything again.
+        """
+        self.state.setdefault("started_at", time.time())
+
+        for name, method, params in self.subtasks():
+            task_state = self.state["tasks"].get(name)
+            if task_state is None or task_state["method"] != method or task_state["params"] != params:
+                task_state = {"method": method, "params": params, "next_page": 0, "done": False, "pages": {}}
+                self.state["tasks"][name] = task_state
+
+            if task_state["done"]:
+                continue
+
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+            fetch = getattr(self.client, method)
+            while not task_state["done"]:
+                page = task_state["next_page"]
+                records = fetch(pageSize=self.page_size, page=page, **params) or []
+
+                data = json.dumps(records, separators=(",", ":")).encode("utf-8")
+                _atomic_write(self._page_path(name, page), data)
+
+                task_state["pages"][str(page)] = {"count": len(records), "sha256": hashlib.sha256(data).hexdigest()}
+                task_state["next_page"] = page + 1
+                task_state["done"] = len(records) < self.page_size
+                self._save_state()
+
+                if self.on_page is not None:
+                    self.on_page(name, page, len(records))
+
+        counts = self.verify()
+        self.state["completed_at"] = time.time()
+        self._save_state()
+        return counts
+
+    def verify(self) -> dict[str, int]:
+        """
+        Check that all tasks are completed and that their page files match the checksums of the state file.
+
+        :return: the number of records of each task
+        :raise SyncIntegrityError: if a check fails
+        """
+        problems: list[str] = []
+        counts: dict[str, int] = {}
+
+        for name, _, _ in self.subtasks():
+            task_state = self.state["tasks"].get(name)
+            if task_state is None or not task_state["done"]:
+                problems.append(f"{name}: not completed")
+                continue
+
+            pages = task_state["pages"]
+            if sorted(map(int, pages)) != list(range(task_state["next_page"])):
+                problems.append(f"{name}: missing pages in the state file")
+
+            count = 0
+            for page, page_state in pages.items():
+                try:
+                    with open(self._page_path(name, int(page)), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    problems.append(f"{name}: page {page} is missing")
+                    continue
+
+                if hashlib.sha256(data).hexdigest() != page_state["sha256"]:
+                    problems.append(f"{name}: page {page} doesn't match its checksum")
+                    continue
+                count += page_state["count"]
+            counts[name] = count
+
+        if problems:
+            raise SyncIntegrityError(problems)
+        return counts
+
+    def iter_records(self, task_name: str) -> Iterator[Any]:
+        """Iterate over the records synced by a task, in order."""
+        task_state = self.state["tasks"][task_name]
+        for page in range(task_state["next_page"]):
+            with open(self._page_path(task_name, page), encoding="utf-8") as f:
+                yield from json.load(f)
@@ -0,0 +1,188 @@
+"""
+bigbuy.taxonomy
+~~~~~~~~~~~~~~~
+
+Index of the taxonomy tree, built once from the flat lists returned by ``get_taxonomies`` and
+``get_products_taxonomies``.
+
+Usage::
+
+    index = TaxonomyIndex.from_client(client, languages=["en", "fr"])
+    index.breadcrumb(taxonomy_id, "fr")       # ["Maison", "Cuisine", "Couteaux"]
+    index.is_ancestor(home_id, taxonomy_id)   # O(1)
+    index.products_under(home_id)             # ids of the products in the subtree
+
+The tree is numbered with an Euler tour: each taxonomy gets the position where a depth-first walk enters it and the
+position where it leaves its subtree, so the subtree of a taxonomy is a contiguous range of positions. Ancestry checks
+compare two pairs of integers, and product links sorted by the position of their taxonomy give the products of a
+subtree with two binary searches.
+"""
+import bisect
+from typing import Optional, Iterable, Mapping, TYPE_CHECKING
+
+from .types import BBTaxonomyDict, BBProductTaxonomyDict
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['TaxonomyIndex']
+
+
+class TaxonomyIndex:
+    """
+    Taxonomy tree with precomputed ancestry and subtree ranges.
+
+    :param taxonomies: taxonomies, in one or several languages. The tree is built from the ``parentTaxonomy`` of the
+      first record of each taxonomy; taxonomies whose parent is ``0`` or unknown are roots.
+    :param product_taxonomies: links between products and taxonomies
+    """
+
+    def __init__(self, taxonomies: Iterable[BBTaxonomyDict],
+                 product_taxonomies: Iterable[BBProductTaxonomyDict] = ()):
+        self.parents: dict[int, int] = {}
+        # taxonomy names by language and id
+        self.names: dict[str, dict[int, str]] = {}
+
+        for taxonomy in taxonomies:
+            taxonomy_id = taxonomy["id"]
+            self.parents.setdefault(taxonomy_id, taxonomy.get("parentTaxonomy") or 0)
+            iso_code = taxonomy.get("isoCode", "")
+            self.names.setdefault(iso_code, {})[taxonomy_id] = taxonomy["name"]
+
+        self._build_tree()
+
+        links = sorted((self._enter[link["taxonomy"]], link["product"])
+                       for link in product_taxonomies if link["taxonomy"] in self._enter)
+        self._link_positions = [position for position, _ in links]
+        self._link_products = [product_id for _, product_id in links]
+        self.product_taxonomies: dict[int, list[int]] = {}
+        for position, product_id in links:
+            self.product_taxonomies.setdefault(product_id, []).append(self._order[position])
+
+    @classmethod
+    def from_client(cls, client: "BigBuy", languages: Optional[Iterable[str]] = None,
+                    include_products: bool = True) -> "TaxonomyIndex":
+        """
+        Build an index from the API.
+
+        :param client: client
+        :param languages: ISO codes of the languages of the names. By default, all the languages of ``get_languages``.
+        :param include_products: if ``True`` (default), also load the links between products and taxonomies
+        """
+        if languages is None:
+            languages = [language["isoCode"] for language in client.get_languages()]
+
+        taxonomies: list[BBTaxonomyDict] = []
+        for iso_code in languages:
+            taxonomies.extend(client.get_taxonomies(isoCode=iso_code) or ())
+
+        product_taxonomies = (client.get_products_taxonomies() or []) if include_products else []
+        return cls(taxonomies, product_taxonomies)
+
+    def _build_tree(self) -> None:
+        children: dict[int, list[int]] = {}
+        roots = []
+        for taxonomy_id, parent_id in self.parents.items():
+            if parent_id in self.parents and parent_id != taxonomy_id:
+                children.setdefault(parent_id, []).append(taxonomy_id)
+            else:
+                roots.append(taxonomy_id)
+
+        self.children = children
+        self.roots = roots
+        # Position of each taxonomy in the walk, position after its subtree, and taxonomy at each position
+        self._enter: dict[int, int] = {}
+        self._exit: dict[int, int] = {}
+        self._order: list[int] = []
+        self._ancestors: dict[int, tuple[int, ...]] = {}
+
+        for root in roots:
+            self._walk(root)
+
+        # Taxonomies in a cycle are not reachable from a root; attach them as roots
+        for taxonomy_id in self.parents:
+            if taxonomy_id not in self._enter:
+                self.roots.append(taxonomy_id)
+                self._walk(taxonomy_id)
+
+    def _walk(self, root: int) -> None:
+        """Iterative depth-first walk from a root."""
+        self._ancestors[root] = ()
+        stack: list[tuple[int, bool]] = [(root, False)]
+        while stack:
+            taxonomy_id, leaving = stack.pop()
+            if leaving:
+                self._exit[taxonomy_id] = len(self._order)
+                continue
+            if taxonomy_id in self._enter:
+                continue
+
+            self._enter[taxonomy_id] = len(self._order)
+            self._order.append(taxonomy_id)
+            stack.append((taxonomy_id, True))
+
+            ancestors = self._ancestors[taxonomy_id] + (taxonomy_id,)
+            for child_id in reversed(self.children.get(taxonomy_id, ())):
+                if child_id not in self._enter:
+                    self._ancestors[child_id] = ancestors
+                    stack.append((child_id, False))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, taxonomy_id: object) -> bool:
+        return taxonomy_id in self._enter
+
+    @property
+    def languages(self) -> list[str]:
+        return list(self.names)
+
+    def ancestors(self, taxonomy_id: int) -> tuple[int, ...]:
+        """Return the ids of the ancestors of a taxonomy, from the root to its parent."""
+        return self._ancestors[taxonomy_id]
+
+    def path(self, taxonomy_id: int) -> tuple[int, ...]:
+        """Return the ids of the taxonomies from the root to the given taxonomy, included."""
+        return self._ancestors[taxonomy_id] + (taxonomy_id,)
+
+    def depth(self, taxonomy_id: int) -> int:
+        """Return the depth of a taxonomy; roots have a depth of 0."""
+        return len(self._ancestors[taxonomy_id])
+
+    def breadcrumb(self, taxonomy_id: int, iso_code: Optional[str] = None) -> list[str]:
+        """Return the names of the taxonomies from the root to the given taxonomy, in the given language."""
+        names = self._names(iso_code)
+        return [names.get(ancestor_id, "") for ancestor_id in self.path(taxonomy_id)]
+
+    def name(self, taxonomy_id: int, iso_code: Optional[str] = None) -> Optional[str]:
+        return self._names(iso_code).get(taxonomy_id)
+
+    def _names(self, iso_code: Optional[str]) -> Mapping[int, str]:
+        if iso_code is None:
+            iso_code = next(iter(self.names), "")
+        try:
+            return self.names[iso_code]
+        except KeyError:
+            raise KeyError(f"No taxonomy names in language {iso_code!r}") from None
+
+    def is_ancestor(self, ancestor_id: int, taxonomy_id: int) -> bool:
+        """Return ``True`` if ``ancestor_id`` is ``taxonomy_id`` or one of its ancestors."""
+        if ancestor_id not in self._enter or taxonomy_id not in self._enter:
+            return False
+        return self._enter[ancestor_id] <= self._enter[taxonomy_id] < self._exit[ancestor_id]
+
+    def descendants(self, taxonomy_id: int, include_self: bool = True) -> list[int]:
+        """Return the ids of the taxonomies in the subtree of a taxonomy, in depth-first order."""
+        start = self._enter[taxonomy_id] + (0 if include_self else 1)
+        return self._order[start:self._exit[taxonomy_id]]
+
+    def products_under(self, taxonomy_id: int) -> list[int]:
+        """Return the ids of the products linked to a taxonomy or to one of its descendants, without duplicates."""
+        start = bisect.bisect_left(self._link_positions, self._enter[taxonomy_id])
+        end = bisect.bisect_left(self._link_positions, self._exit[taxonomy_id])
+        return list(dict.fromkeys(self._link_products[start:end]))
+
+    def count_products_under(self, taxonomy_id: int) -> int:
+        """Return the number of product links in the subtree of a taxonomy, without fetching them."""
+        return (bisect.bisect_left(self._link_positions, self._exit[taxonomy_id])
+                - bisect.bisect_left(self._link_positions, self._enter[taxonomy_id]))
@@ -0,0 +1,321 @@
+"""
+bigbuy.validation
+~~~~~~~~~~~~~~~~~
+
+Local pre-validation of orders, before ``check_order``.
+
+Usage::
+
+    validator = OrderValidator.from_client(client, countries=["ES", "FR"])
+    validation = validator.validate(order)
+    if not validation.ok:
+        print(validation.errors)
+        # [OrderIssue(code="ER003", message="Not enough stock for S0123456: 2 < 5", references=("S0123456",),
+        #             blocking=True)]
+    validation.warehouses
+    # {1: ["S0123456", "V0001234"], 3: ["S0234567"]}
+
+    result = validator.check(order)  # raises BBOrderValidationError without any request if the order is invalid
+
+The validator uses data loaded once from the bulk endpoints: the SKUs of products and variations (see
+``bigbuy.skus``), their stock by warehouse, the carriers and the lowest shipping costs by country. It finds the
+problems ``check_order`` reports with the codes of the API (unknown references, missing stock, invalid postcodes,
+missing carriers), and predicts the warehouse split that makes ``check_order`` fail with a ``BBWarehouseSplitError``.
+Data that is not loaded is not checked. The data may be stale, so an order that passes may still fail ``check_order``.
+"""
+import re
+from typing import Optional, Any, Iterable, Mapping, NamedTuple, Union, TYPE_CHECKING
+
+from .exceptions import BBOrderValidationError
+from .skus import SkuResolver
+from .types import BBCarrierDict, BBLowestShippingCostDict, BBProductStockByHandlingDaysDict, BBCheckOrderDict, \
+    BBMultiCheckOrderDict
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = [
+    'POSTCODE_PATTERNS', 'PRODUCT_NOT_FOUND', 'STOCK', 'POSTCODE', 'NO_CARRIER', 'INVALID_QUANTITY',
+    'WAREHOUSE_SPLIT', 'OrderIssue', 'OrderValidation', 'OrderValidator', 'predict_warehouses', 'stocks_by_warehouse',
+]
+
+# Issue codes. They are the codes of the API errors of check_order where there is one.
+PRODUCT_NOT_FOUND = "ER001"
+STOCK = "ER003"
+POSTCODE = "ER004"
+NO_CARRIER = "ER010"
+INVALID_QUANTITY = "INVALID_QUANTITY"
+WAREHOUSE_SPLIT = "WAREHOUSE_SPLIT"
+
+# Postcode formats of the main destination countries
+POSTCODE_PATTERNS: dict[str, "re.Pattern[str]"] = {
+    country: re.compile(pattern) for country, pattern in {
+        "AT": r"\d{4}",
+        "BE": r"\d{4}",
+        "BG": r"\d{4}",
+        "CH": r"\d{4}",
+        "CY": r"\d{4}",
+        "CZ": r"\d{3} ?\d{2}",
+        "DE": r"\d{5}",
+        "DK": r"\d{4}",
+        "EE": r"\d{5}",
+        "ES": r"\d{5}",
+        "FI": r"\d{5}",
+        "FR": r"\d{5}",
+        "GB": r"[A-Z]{1,2}\d[A-Z\d]? ?\d[A-Z]{2}",
+        "GR": r"\d{3} ?\d{2}",
+        "HR": r"\d{5}",
+        "HU": r"\d{4}",
+        "IT": r"\d{5}",
+        "LT": r"(LT-)?\d{5}",
+        "LU": r"(L-)?\d{4}",
+        "LV": r"(LV-)?\d{4}",
+        "NL": r"\d{4} ?[A-Z]{2}",
+        "NO": r"\d{4}",
+        "PL": r"\d{2}-\d{3}",
+        "PT": r"\d{4}-\d{3}",
+        "RO": r"\d{6}",
+        "SE": r"\d{3} ?\d{2}",
+        "SI": r"\d{4}",
+        "SK": r"\d{3} ?\d{2}",
+    }.items()
+}
+
+
+class OrderIssue(NamedTuple):
+    """Problem found in an order."""
+    code: str
+    message: str
+    references: tuple[str, ...] = ()
+    # False for issues that don't make check_order fail if the order is sent with the right method
+    blocking: bool = True
+
+
+class OrderValidation:
+    """
+    Result of the validation of an order.
+
+    * ``issues``: problems found in the order
+    * ``warehouses``: predicted references shipped from each warehouse. References with no known stock are not
+      included.
+    """
+
+    def __init__(self, issues: list[OrderIssue], warehouses: dict[int, list[str]]):
+        self.issues = issues
+        self.warehouses = warehouses
+
+    def __repr__(self) -> str:
+        return f"<OrderValidation ok={self.ok} issues={len(self.issues)} warehouses={list(self.warehouses)}>"
+
+    @property
+    def errors(self) -> list[OrderIssue]:
+        """Issues that make ``check_order`` fail."""
+        return [issue for issue in self.issues if issue.blocking]
+
+    @property
+    def ok(self) -> bool:
+        """``True`` if the order is likely to pass ``check_order``, or ``check_multi_shipping_order`` if ``split``."""
+        return not self.errors
+
+    @property
+    def split(self) -> bool:
+        """``True`` if the order is predicted to be shipped from several warehouses."""
+        return len(self.warehouses) > 1
+
+
+def stocks_by_warehouse(records: Iterable[BBProductStockByHandlingDaysDict]) -> dict[str, dict[int, int]]:
+    """
+    Sum the stocks of each reference by warehouse.
+
+    :param records: stocks, as returned by ``get_products_stock_by_handling_days``
+    :return: the stock of each reference, by warehouse
+    """
+    stocks: dict[str, dict[int, int]] = {}
+    for record in records:
+        reference_stocks = stocks[record["sku"]] = {}
+        for stock in record["stocks"]:
+            warehouse = stock["warehouse"]
+            reference_stocks[warehouse] = reference_stocks.get(warehouse, 0) + stock["quantity"]
+    return stocks
+
+
+def predict_warehouses(lines: Iterable[tuple[str, int]],
+                       stocks: Mapping[str, Mapping[int, int]]) -> dict[int, list[str]]:
+    """
+    Predict the warehouse that ships each line of an order.
+
+    Each line is shipped from a warehouse that has enough stock for it. When several warehouses do, it's shipped from
+    the one that can ship the most lines of the order, to minimize the split.
+
+    :param lines: references and quantities
+    :param stocks: stock of each reference, by warehouse
+    :return: the references shipped from each warehouse
+    """
+    candidates: list[tuple[str, list[int]]] = []
+    for reference, quantity in lines:
+        reference_stocks = stocks.get(reference)
+        if not reference_stocks:
+            continue
+        warehouses = [warehouse for warehouse, stock in reference_stocks.items() if stock >= quantity]
+        # Without enough stock anywhere, assume it's shipped from the warehouse with the most stock
+        candidates.append((reference, warehouses or [max(reference_stocks, key=reference_stocks.__getitem__)]))
+
+    counts: dict[int, int] = {}
+    for _, warehouses in candidates:
+        for warehouse in warehouses:
+            counts[warehouse] = counts.get(warehouse, 0) + 1
+
+    by_warehouse: dict[int, list[str]] = {}
+    for reference, warehouses in candidates:
+        warehouse = min(warehouses, key=lambda w: (-counts[w], w))
+        by_warehouse.setdefault(warehouse, []).append(reference)
+    return by_warehouse
+
+
+class OrderValidator:
+    """
+    Validate orders locally.
+
+    :param skus: resolver of the references of the orders
+    :param postcode_patterns: postcode format of each country. Default to ``POSTCODE_PATTERNS``. Postcodes of other
+      countries are only checked to be non-empty.
+    """
+
+    def __init__(self, skus: SkuResolver, *, postcode_patterns: Optional[Mapping[str, "re.Pattern[str]"]] = None):
+        self.skus = skus
+        self.postcode_patterns = POSTCODE_PATTERNS if postcode_patterns is None else postcode_patterns
+        # stock of each reference, by warehouse; None until loaded
+        self.stocks: Optional[dict[str, dict[int, int]]] = None
+        # lowercase names of the carriers and their shipping services; None until loaded
+        self.carriers: Optional[set[str]] = None
+        # lowest shipping cost of each reference, by country; None if the reference can't be shipped there
+        self.shipping_costs: dict[str, dict[str, Optional[str]]] = {}
+
+    @classmethod
+    def from_client(cls, client: "BigBuy", countries: Iterable[str] = (), **kwargs: Any) -> "OrderValidator":
+        """
+        Create a validator and load its data from the API.
+
+        :param countries: ISO codes of the countries whose lowest shipping costs are loaded
+        """
+        validator = cls(SkuResolver.from_client(client), **kwargs)
+        validator.update_stocks(client.get_products_stock_by_handling_days())
+        validator.update_stocks(client.get_products_variations_stock_by_handling_days(), complete=False)
+        validator.update_carriers(client.get_carriers())
+        for country in countries:
+            validator.update_shipping_costs(country, client.get_lowest_shipping_costs_by_country(country))
+        return validator
+
+    def update_stocks(self, records: Iterable[BBProductStockByHandlingDaysDict], *, complete: bool = True) -> None:
+        """
+        Update the stocks.
+
+        :param records: stocks, as returned by ``get_products_stock_by_handling_days``
+        :param complete: if ``True`` (default), replace all the stocks; references without a record have no stock
+        """
+        stocks = stocks_by_warehouse(records)
+        if complete or self.stocks is None:
+            self.stocks = stocks
+        else:
+            self.stocks.update(stocks)
+
+    def update_carriers(self, carriers: Iterable[BBCarrierDict]) -> None:
+        """Replace the carriers with the ones returned by ``get_carriers``."""
+        names = set()
+        for carrier in carriers:
+            names.add(carrier["name"].lower())
+            names.update(service["name"].lower() for service in carrier.get("shippingServices", []))
+        self.carriers = names
+
+    def update_shipping_costs(self, country: str, records: Iterable[BBLowestShippingCostDict]) -> None:
+        """Replace the lowest shipping costs of a country with the ones of ``get_lowest_shipping_costs_by_country``."""
+        self.shipping_costs[country.upper()] = {record["reference"]: record.get("cost") for record in records}
+
+    def validate(self, order: Mapping[str, Any]) -> OrderValidation:
+        """
+        Validate an order, in the format of ``check_order``. No request is sent, except to resolve the references that
+        are not in the index of the SKU resolver.
+        """
+        issues: list[OrderIssue] = []
+        lines: dict[str, int] = {}
+        for product in order.get("products", []):
+            reference = product.get("reference", "")
+            quantity = product.get("quantity")
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+                issues.append(OrderIssue(INVALID_QUANTITY, f"Invalid quantity for {reference}: {quantity!r}",
+                                         (reference,)))
+                continue
+            lines[reference] = lines.get(reference, 0) + quantity
+
+        # Resolves missing references with the API if the resolver has a client
+        if unknown := tuple(self.skus.missing(lines)):
+            issues.append(OrderIssue(PRODUCT_NOT_FOUND, f"Product not found: {', '.join(unknown)}", unknown))
+            for reference in unknown:
+                del lines[reference]
+
+        warehouses: dict[int, list[str]] = {}
+        if self.stocks is not None:
+            stocks = self.stocks
+            for reference, quantity in lines.items():
+                if (stock := sum(stocks.get(reference, {}).values())) < quantity:
+                    issues.append(OrderIssue(STOCK, f"Not enough stock for {reference}: {stock} < {quantity}",
+                                             (reference,)))
+
+            warehouses = predict_warehouses(lines.items(), stocks)
+            if len(warehouses) > 1:
+                issues.append(OrderIssue(
+                    WAREHOUSE_SPLIT,
+                    "Products from different warehouses: %s; use check_multi_shipping_order" % "; ".join(
+                        f"{warehouse}: {', '.join(references)}" for warehouse, references in warehouses.items()),
+                    tuple(lines),
+                    blocking=False,
+                ))
+
+        address = order.get("shippingAddress") or {}
+        country = str(address.get("country") or "").upper()
+        issues.extend(self._validate_postcode(country, str(address.get("postcode") or "").strip()))
+
+        if self.carriers is not None:
+            for carrier in order.get("carriers") or []:
+                if (name := str(carrier.get("name", ""))).lower() not in self.carriers:
+                    issues.append(OrderIssue(NO_CARRIER, f"Unknown carrier: {name}"))
+
+        if (costs := self.shipping_costs.get(country)) is not None:
+            # References that are not listed are not checked
+            if no_shipping := tuple(reference for reference in lines
+                                    if reference in costs and costs[reference] is None):
+                issues.append(OrderIssue(NO_CARRIER, f"No carrier to {country} for {', '.join(no_shipping)}",
+                                         no_shipping))
+
+        return OrderValidation(issues, warehouses)
+
+    def _validate_postcode(self, country: str, postcode: str) -> list[OrderIssue]:
+        if not postcode:
+            return [OrderIssue(POSTCODE, "Missing postcode")]
+        pattern = self.postcode_patterns.get(country)
+        if pattern is not None and not pattern.fullmatch(postcode.upper()):
+            return [OrderIssue(POSTCODE, f"Invalid postcode format for {country}: {postcode}")]
+        return []
+
+    def check(self, order: dict[str, Any], client: Optional["BigBuy"] = None,
+              **params: Any) -> Union[BBCheckOrderDict, BBMultiCheckOrderDict]:
+        """
+        Validate an order, and check it with the API only if it's valid: with ``check_multi_shipping_order`` if it's
+        predicted to be split between warehouses, with ``check_order`` otherwise.
+
+        :param order: order
+        :param client: client. Default to the client of the SKU resolver.
+        :raise BBOrderValidationError: if the order is invalid. No request is sent.
+        """
+        validation = self.validate(order)
+        if not validation.ok:
+            raise BBOrderValidationError(validation)
+
+        if client is None:
+            client = self.skus.client
+            if client is None:
+                raise ValueError("This validator has no client")
+
+        if validation.split:
+            return client.check_multi_shipping_order(order, **params)
+        return client.check_order(order, **params)
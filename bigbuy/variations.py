@@ -0,0 +1,217 @@
+"""
+bigbuy.variations
+~~~~~~~~~~~~~~~~~
+
+Resolution of variations to their named attributes, e.g. ``{"Color": "Red", "Size": "XL"}``.
+
+Usage::
+
+    resolver = VariationResolver.from_client(client, languages=["en", "fr"])
+    resolver.resolve(variation_id, "fr")                  # {"Couleur": "Rouge", "Taille": "XL"}
+    resolver.resolve_many(variation_ids, "en")
+    ...
+    changed_variation_ids = resolver.refresh(client)
+
+The resolver loads ``get_variations``, ``get_attributes`` and ``get_attribute_groups`` once (the latter two once per
+language) into maps keyed by integer ids, and caches resolved variations. ``refresh`` loads the endpoints again and
+only invalidates the cached variations whose attributes, attribute names or group names changed.
+"""
+from typing import Optional, Iterable, Mapping, TYPE_CHECKING
+
+from .types import BBVariationDict, BBAttributeDict, BBAttributeGroupDict
+
+if TYPE_CHECKING:
+    from .api import BigBuy
+
+__all__ = ['VariationResolver']
+
+
+class VariationResolver:
+    """
+    Resolve variations to their named attributes.
+
+    :param languages: ISO codes of the languages of the names
+    """
+
+    def __init__(self, languages: Iterable[str]):
+        self.languages = list(languages)
+        # attribute ids of each variation
+        self.variation_attributes: dict[int, tuple[int, ...]] = {}
+        # group of each attribute
+        self.attribute_groups: dict[int, int] = {}
+        # names by language and id
+        self.attribute_names: dict[str, dict[int, str]] = {iso_code: {} for iso_code in self.languages}
+        self.group_names: dict[str, dict[int, str]] = {iso_code: {} for iso_code in self.languages}
+
+        # variations that use each attribute, to invalidate the cache
+        self._attribute_variations: dict[int, set[int]] = {}
+        self._cache: dict[str, dict[int, dict[str, str]]] = {iso_code: {} for iso_code in self.languages}
+
+    @classmethod
+    def from_client(cls, client: "BigBuy", languages: Optional[Iterable[str]] = None) -> "VariationResolver":
+        """
+        Create a resolver and load it from the API.
+
+        :param languages: ISO codes of the languages of the names. By default, all the languages of ``get_languages``.
+        """
+        if languages is None:
+            languages = [language["isoCode"] for language in client.get_languages()]
+        resolver = cls(languages)
+        resolver.refresh(client)
+        return resolver
+
+    def __len__(self) -> int:
+        return len(self.variation_attributes)
+
+    def _invalidate(self, variation_ids: Iterable[int]) -> None:
+        for cache in self._cache.values():
+            for variation_id in variation_ids:
+                cache.pop(variation_id, None)
+
+    def update_variations(self, variations: Iterable[BBVariationDict], *, complete: bool = True) -> set[int]:
+        """
+        Update the attributes of variations.
+
+        :param variations: variations, as returned by ``get_variations`` or ``get_variation``
+        :param complete: if ``True`` (default), these are all the variations: the others are removed
+        :return: the ids of the variations that were added, changed or removed
+        """
+        changed: set[int] = set()
+        seen: set[int] = set()
+        for variation in variations:
+            variation_id = variation["id"]
+            seen.add(variation_id)
+            attribute_ids = tuple(attribute["id"] for attribute in variation["attributes"])
+            old_attribute_ids = self.variation_attributes.get(variation_id)
+            if old_attribute_ids == attribute_ids:
+                continue
+
+            for attribute_id in old_attribute_ids or ():
+                self._attribute_variations.get(attribute_id, set()).discard(variation_id)
+            for attribute_id in attribute_ids:
+                self._attribute_variations.setdefault(attribute_id, set()).add(variation_id)
+            self.variation_attributes[variation_id] = attribute_ids
+            changed.add(variation_id)
+
+        if complete:
+            for variation_id in self.variation_attributes.keys() - seen:
+                for attribute_id in self.variation_attributes.pop(variation_id):
+                    self._attribute_variations.get(attribute_id, set()).discard(variation_id)
+                changed.add(variation_id)
+
+        self._invalidate(changed)
+        return changed
+
+    def update_attributes(self, attributes: Iterable[BBAttributeDict], iso_code: str, *,
+                          complete: bool = False) -> set[int]:
+        """
+        Update the attributes of a language, as returned by ``get_attributes``.
+
+        :param complete: if ``True``, these are all the attributes of the language: the others are removed
+        :return: the ids of the variations whose resolution changed
+        """
+        old_names = self.attribute_names.get(iso_code, {})
+        names = {} if complete else dict(old_names)
+        changed_attributes: set[int] = set()
+        for attribute in attributes:
+            attribute_id = attribute["id"]
+            names[attribute_id] = attribute["name"]
+            if old_names.get(attribute_id) != attribute["name"] \
+                    or self.attribute_groups.get(attribute_id) != attribute["attributeGroup"]:
+                self.attribute_groups[attribute_id] = attribute["attributeGroup"]
+                changed_attributes.add(attribute_id)
+
+        removed = old_names.keys() - names.keys()
+        changed_attributes |= removed
+        self.attribute_names[iso_code] = names
+        for attribute_id in removed:
+            if not any(attribute_id in other_names for other_names in self.attribute_names.values()):
+                self.attribute_groups.pop(attribute_id, None)
+
+        changed = {variation_id
+                   for attribute_id in changed_attributes
+                   for variation_id in self._attribute_variations.get(attribute_id, ())}
+        self._invalidate(changed)
+        return changed
+
+    def update_attribute_groups(self, attribute_groups: Iterable[BBAttributeGroupDict], iso_code: str, *,
+                                complete: bool = False) -> set[int]:
+        """
+        Update the attribute groups of a language, as returned by ``get_attribute_groups``.
+
+        :param complete: if ``True``, these are all the groups of the language: the others are removed
+        :return: the ids of the variations whose resolution changed
+        """
+        old_names = self.group_names.get(iso_code, {})
+        names = {} if complete else dict(old_names)
+        for group in attribute_groups:
+            names[group["id"]] = group["name"]
+
+        changed_groups = {group_id for group_id in old_names.keys() | names.keys()
+                          if old_names.get(group_id) != names.get(group_id)}
+        self.group_names[iso_code] = names
+        if not changed_groups:
+            return set()
+
+        changed = {variation_id
+                   for attribute_id, group_id in self.attribute_groups.items() if group_id in changed_groups
+                   for variation_id in self._attribute_variations.get(attribute_id, ())}
+        self._invalidate(changed)
+        return changed
+
+    def refresh(self, client: "BigBuy") -> set[int]:
+        """
+        Load the bulk endpoints from the API and replace the data of the resolver. Variations, attributes and groups
+        that were deleted are removed.
+
+        :return: the ids of the variations whose resolution changed
+        """
+        changed = self.update_variations(client.get_variations() or ())
+        for iso_code in self.languages:
+            changed |= self.update_attributes(client.get_attributes(isoCode=iso_code) or (), iso_code, complete=True)
+            changed |= self.update_attribute_groups(client.get_attribute_groups(isoCode=iso_code) or (), iso_code,
+                                                    complete=True)
+        return changed
+
+    def resolve(self, variation_id: int, iso_code: Optional[str] = None) -> Optional[dict[str, str]]:
+        """
+        Return the attributes of a variation as a new dict of group names to attribute names, or ``None`` if the
+        variation is unknown. Attributes or groups without a name in the language are skipped.
+
+        :param variation_id: variation id
+        :param iso_code: language. Default to the first language of the resolver.
+        """
+        if iso_code is None:
+            iso_code = self.languages[0]
+
+        cache = self._cache.setdefault(iso_code, {})
+        resolved = cache.get(variation_id)
+        if resolved is not None:
+            # A copy, so that callers can't modify the cache
+            return dict(resolved)
+
+        attribute_ids = self.variation_attributes.get(variation_id)
+        if attribute_ids is None:
+            return None
+
+        attribute_names = self.attribute_names.get(iso_code, {})
+        group_names = self.group_names.get(iso_code, {})
+        resolved = {}
+        for attribute_id in attribute_ids:
+            attribute_name = attribute_names.get(attribute_id)
+            group_name = group_names.get(self.attribute_groups.get(attribute_id, 0))
+            if attribute_name is not None and group_name is not None:
+                resolved[group_name] = attribute_name
+
+        cache[variation_id] = resolved
+        return dict(resolved)
+
+    def resolve_many(self, variation_ids: Iterable[int],
+                     iso_code: Optional[str] = None) -> Mapping[int, dict[str, str]]:
+        """Resolve several variations. Unknown variations are not in the returned dict."""
+        result = {}
+        for variation_id in variation_ids:
+            resolved = self.resolve(variation_id, iso_code)
+            if resolved is not None:
+                result[variation_id] = resolved
+        return result
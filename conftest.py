@@ -11,3 +11,18 @@ def utcnow() -> datetime:
 @pytest.fixture
 def app_key() -> str:
     return "top_secret_app_key"
+
+
+class FakeClock:
+    """Clock for the ``clock`` parameter of rate-limiters, circuit breakers, etc. Tests move it by setting ``now``."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
@@ -0,0 +1,75 @@
+from bigbuy.changes import ChangeDetector, ChangeEvent, CREATED, DELETED, PRICE_CHANGED, STOCK_CHANGED, \
+    DESCRIPTION_CHANGED, UPDATED, record_key
+
+
+def product(product_id, **kwargs):
+    record = {"id": product_id, "sku": f"S{product_id}", "retailPrice": 10.0, "wholesalePrice": 5.0,
+              "dateUpd": "2026-01-01 00:00:00", "category": 1}
+    record.update(kwargs)
+    return record
+
+
+def test_record_key():
+    assert record_key({"id": 1}) == "1"
+    assert record_key({"id": 1, "isoCode": "fr"}) == "1/fr"
+
+
+def test_detect():
+    detector = ChangeDetector()
+    events = list(detector.detect([product(1), product(2)]))
+    assert [(e.type, e.key) for e in events] == [(CREATED, "1"), (CREATED, "2")]
+    assert events[0].values == product(1)
+    assert len(detector) == 2
+
+    # no change; dateUpd is ignored
+    assert list(detector.detect([product(1, dateUpd="2026-02-01 00:00:00"), product(2)])) == []
+
+    events = list(detector.detect([product(1, retailPrice=12.0, category=2), product(3)]))
+    assert events == [
+        ChangeEvent(PRICE_CHANGED, "products", "1", ("retailPrice",), {"retailPrice": 12.0}),
+        ChangeEvent(UPDATED, "products", "1", ("category",), {"category": 2}),
+        ChangeEvent(CREATED, "products", "3", (), product(3)),
+        ChangeEvent(DELETED, "products", "2"),
+    ]
+    assert events[-1].as_dict() == {"type": DELETED, "source": "products", "key": "2", "fields": [], "values": {}}
+
+
+def test_detect_sources():
+    detector = ChangeDetector()
+    stock = [{"id": 1, "sku": "S1", "stocks": [{"quantity": 3, "warehouse": 1}]}]
+    information = [{"id": 1, "sku": "S1", "name": "Foo", "description": "", "url": "foo", "isoCode": "en"}]
+    list(detector.detect(stock, source="stock"))
+    list(detector.detect(information, source="information"))
+
+    stock[0]["stocks"][0]["quantity"] = 2
+    information[0]["name"] = "Bar"
+    assert [(e.type, e.key) for e in detector.detect(stock, source="stock")] == [(STOCK_CHANGED, "1")]
+    assert [(e.type, e.key) for e in detector.detect(information, source="information")] == \
+           [(DESCRIPTION_CHANGED, "1/en")]
+
+
+def test_detect_removed_field():
+    detector = ChangeDetector()
+    list(detector.detect([product(1)]))
+    record = product(1)
+    del record["retailPrice"]
+    assert list(detector.detect([record])) == [
+        ChangeEvent(PRICE_CHANGED, "products", "1", ("retailPrice",), {"retailPrice": None}),
+    ]
+
+
+def test_detect_partial():
+    detector = ChangeDetector()
+    list(detector.detect([product(1), product(2)]))
+    assert [e.type for e in detector.detect([product(2, retailPrice=1.0)], complete=False)] == [PRICE_CHANGED]
+    assert len(detector) == 2
+
+
+def test_save_load(tmp_path):
+    detector = ChangeDetector()
+    list(detector.detect([product(1), product(2)]))
+    detector.save(tmp_path / "fingerprints.json")
+
+    detector = ChangeDetector.load(tmp_path / "fingerprints.json")
+    assert [(e.type, e.key) for e in detector.detect([product(1, wholesalePrice=4.0)])] == \
+           [(PRICE_CHANGED, "1"), (DELETED, "2")]
@@ -0,0 +1,63 @@
+import pytest
+
+from bigbuy.compression import CompressionPolicy, CompressionStats, available_encodings
+from bigbuy.fake_server import FakeBigBuyServer
+
+
+def test_available_encodings():
+    encodings = available_encodings()
+    assert "gzip" in encodings
+    assert "deflate" in encodings
+    assert encodings.index("gzip") < encodings.index("deflate")
+
+
+def test_policy():
+    policy = CompressionPolicy(["gzip"])
+    assert policy.accept_encoding == "gzip"
+    assert CompressionPolicy([]).accept_encoding == "identity"
+    assert CompressionPolicy().accept_encoding == ", ".join(available_encodings())
+
+    with pytest.raises(ValueError):
+        CompressionPolicy(["gzip", "lzma"])
+
+
+def test_stats_empty():
+    stats = CompressionStats()
+    assert stats.as_dict() == {}
+    assert stats.total().ratio == 1
+
+
+def test_compressed_responses():
+    with FakeBigBuyServer(catalog_size=200, compression=True) as server:
+        policy = CompressionPolicy(["gzip"])
+        client = server.client(compression=policy)
+        products = client.get_products()
+        assert len(products) == 200
+        client.get_purse_amount()
+
+        stats = policy.stats.as_dict()
+        products_stats = stats["catalog/products"]
+        assert products_stats["responses"] == 1
+        assert products_stats["compressed"] == 1
+        assert products_stats["wire_bytes"] < products_stats["decoded_bytes"]
+        assert products_stats["ratio"] < 0.5
+
+        # Small bodies are not compressed
+        purse_stats = stats["user/purse"]
+        assert purse_stats["compressed"] == 0
+        assert purse_stats["wire_bytes"] == purse_stats["decoded_bytes"]
+
+        total = policy.stats.total()
+        assert total.responses == 2
+        assert total.decoded_bytes == products_stats["decoded_bytes"] + purse_stats["decoded_bytes"]
+
+
+def test_identity():
+    with FakeBigBuyServer(catalog_size=200, compression=True) as server:
+        policy = CompressionPolicy([])
+        client = server.client(compression=policy)
+        client.get_products()
+
+        products_stats = policy.stats.as_dict()["catalog/products"]
+        assert products_stats["compressed"] == 0
+        assert products_stats["wire_bytes"] == products_stats["decoded_bytes"]
@@ -0,0 +1,67 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+from bigbuy.connections import ConnectionPolicy, ConnectionStats, PooledHTTPAdapter
+from bigbuy.fake_server import FakeBigBuyServer
+
+
+def test_stats():
+    stats = ConnectionStats()
+    assert stats.reuse_rate == 0
+    stats.increment("opened")
+    stats.increment("reused", 3)
+    assert stats.as_dict() == {"opened": 1, "reused": 3, "idle_closed": 0, "discarded": 0, "reuse_rate": 0.75}
+
+
+def test_for_threads():
+    policy = ConnectionPolicy.for_threads(32, idle_timeout=50)
+    assert policy.pool_maxsize == 32
+    assert policy.block
+    assert policy.warm_up == 32
+
+    adapter = policy.adapter(max_retries=2)
+    assert adapter.stats is policy.stats
+    assert adapter.max_retries.total == 2
+
+    adapter = pickle.loads(pickle.dumps(adapter))
+    assert isinstance(adapter, PooledHTTPAdapter)
+    assert adapter.idle_timeout == 50
+
+
+def test_connection_reuse():
+    with FakeBigBuyServer(catalog_size=5) as server:
+        policy = ConnectionPolicy()
+        client = server.client(connections=policy)
+        for _ in range(10):
+            client.get_languages()
+
+        assert policy.stats.opened == 1
+        assert policy.stats.reused == 9
+        assert policy.stats.reuse_rate == 0.9
+
+
+def test_idle_timeout():
+    with FakeBigBuyServer(catalog_size=5) as server:
+        policy = ConnectionPolicy(idle_timeout=0)
+        client = server.client(connections=policy)
+        for _ in range(3):
+            client.get_languages()
+
+        assert policy.stats.opened == 3
+        assert policy.stats.idle_closed == 2
+
+
+def test_threads_and_warm_up():
+    with FakeBigBuyServer(catalog_size=5, latency=0.01) as server:
+        policy = ConnectionPolicy.for_threads(4)
+        client = server.client(connections=policy)
+        assert client.warm_up() == 4
+        assert client.warm_up() == 0
+        assert policy.stats.opened == 4
+
+        with ThreadPoolExecutor(8) as executor:
+            assert all(executor.map(lambda _: client.get_languages(), range(40)))
+
+        assert policy.stats.opened == 4
+        assert policy.stats.discarded == 0
+        assert policy.stats.reused >= 40
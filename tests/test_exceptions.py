@@ -234,4 +234,43 @@ def test_raise_for_response_500_html_body_container_div():
     """.encode("utf-8")
 
     with pytest.raises(ex.BBServerError, match=r"^Something is broken\."):
-        ex.raise_for_response(response)
\ No newline at end of file
+        ex.raise_for_response(response)
+
+
+def test_raise_for_response_ok_is_not_decoded(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the body should not be decoded")
+
+    monkeypatch.setattr(ex, "json_or_none", fail)
+
+    response = Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response._content = json.dumps([{"id": i, "name": "Something went wrong"} for i in range(100)]).encode("utf-8")
+    ex.raise_for_response(response)
+
+    response._content = b'  {"id": 1, "name": "Knife"}'
+    ex.raise_for_response(response)
+
+
+@pytest.mark.parametrize("status,body,error_class", [
+    (429, "You exceeded the rate limit", ex.BBRateLimitError),
+    (400, "Bad Gateway", ex.BBServerError),
+    (400, "Idle timeout reached for https://api.bigbuy.eu/rest/order/create.json", ex.BBTimeoutError),
+    (502, "<html><body><h1>503 Service Unavailable</h1>\nNo server</body></html>", ex.BBTimeoutError),
+    (400, "Oops, Internal Server Error", ex.BBServerError),
+    (400, "Bad request", ex.BBResponseError),
+    (400, '{"code": "500", "message": "Oops"}', ex.BBServerError),
+    (400, '{"code": null, "message": "Oops"}', ex.BBResponseError),
+    (400, '{"code": 400, "message": 1234}', ex.BBResponseError),
+])
+def test_raise_for_response_classification(status, body, error_class):
+    response = Response()
+    response.status_code = status
+    response.encoding = "utf-8"
+    response._content = body.encode("utf-8")
+
+    with pytest.raises(ex.BBResponseError) as exc_info:
+        ex.raise_for_response(response)
+
+    assert type(exc_info.value) is error_class
@@ -0,0 +1,80 @@
+import pytest
+
+from bigbuy import BBRateLimitError, BBServerError, BBTimeoutError, BBProductNotFoundError
+from bigbuy.fake_server import FakeBigBuyServer, CACHE_SIZE
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeBigBuyServer(catalog_size=50) as fake_server:
+        yield fake_server
+
+
+def test_catalog(server):
+    client = server.client()
+
+    products = client.get_products()
+    assert len(products) == 50
+    assert not any(key.startswith("_") for key in products[0])
+
+    assert client.get_products(pageSize=20, page=2) == products[40:]
+    assert client.get_product(products[0]["id"]) == products[0]
+    assert [language["isoCode"] for language in client.get_languages()] == ["en", "es", "fr", "de"]
+
+    information = client.get_products_information(isoCode="fr")
+    assert len(information) == 50
+    assert information[0]["isoCode"] == "fr"
+
+    assert client.get_product_information_by_sku(products[0]["sku"])["id"] == products[0]["id"]
+    assert client.get_purse_amount() == server.purse_amount
+    assert client.get_user_auth_status() is None
+
+
+def test_bulk_cache_is_bounded(server):
+    client = server.client()
+    for page in range(CACHE_SIZE + 10):
+        client.get_products(pageSize=1, page=page)
+    assert len(server._cache) == CACHE_SIZE
+
+
+def test_order_flow(server):
+    client = server.client()
+    product = next(p for p in client.get_products() if server.catalog.stocks[p["id"]][0]["warehouse"] == 1)
+    order = {
+        "internalReference": "test-order-flow",
+        "shippingAddress": {"country": "ES", "postcode": "46005"},
+        "products": [{"reference": product["sku"], "quantity": 1}],
+    }
+
+    check = client.check_order(order)
+    assert check["totalWithoutTaxesAndWithoutShippingCost"] == product["wholesalePrice"]
+
+    order_id = client.create_order_id(order)
+    assert client.get_order_by_id(order_id)["internalReference"] == "test-order-flow"
+    assert client.get_tracking_orders([order_id, 999_999]) == [client.get_tracking_order(order_id)[0], None]
+
+    with pytest.raises(BBProductNotFoundError):
+        client.check_order({**order, "products": [{"reference": "UNKNOWN", "quantity": 1}]})
+
+
+def test_rate_limit():
+    with FakeBigBuyServer(catalog_size=1, rate_limit=1, rate_limit_window=60) as server:
+        client = server.client()
+        client.get_languages()
+        with pytest.raises(BBRateLimitError) as exc_info:
+            client.get_languages()
+
+        assert exc_info.value.rate_limit is not None
+
+
+def test_error_pages():
+    with FakeBigBuyServer(catalog_size=1, error_rate=1) as server:
+        client = server.client(max_retries=0)
+        errors = []
+        for _ in range(10):
+            with pytest.raises(BBServerError) as exc_info:
+                client.get_languages()
+            errors.append(exc_info.value)
+
+        assert any(isinstance(error, BBTimeoutError) for error in errors)
+        assert all("<html>" not in error.text for error in errors)
@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from bigbuy import RateLimiter
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.hedging import HedgingPolicy, LatencyTracker
+from bigbuy.resilience import RetryBudget
+
+
+def make_response(status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b"{}"
+    return response
+
+
+class SlowThenFast:
+    """Send function whose first call is slow and the following ones are fast."""
+
+    def __init__(self, slow=0.5):
+        self.slow = slow
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.slow)
+        response = make_response()
+        response.reason = f"call {call}"
+        return response
+
+
+def test_latency_tracker():
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile(50) is None
+    for i in range(20):
+        tracker.record(i)
+    assert len(tracker) == 10
+    assert tracker.percentile(0) == 10
+    assert tracker.percentile(50) == 15
+    assert tracker.percentile(100) == 19
+
+
+def test_hedge_delay():
+    hedging = HedgingPolicy(initial_delay=1, min_delay=0.1, max_delay=2, min_samples=3)
+    assert hedging.hedge_delay("order/{id}") == 1
+
+    for latency in (0.01, 0.02, 0.03):
+        hedging.latencies["order/{id}"].record(latency)
+    assert hedging.hedge_delay("order/{id}") == 0.1
+
+    hedging.latencies["order/{id}"].record(10)
+    assert hedging.hedge_delay("order/{id}") == 2
+
+
+def test_call_not_hedged():
+    hedging = HedgingPolicy(initial_delay=1)
+    send = SlowThenFast(slow=0)
+
+    assert hedging.call("order/{id}", send).reason == "call 1"
+    assert send.calls == 1
+    assert hedging.stats.as_dict()["hedged"] == 0
+
+
+def test_call_hedged():
+    hedging = HedgingPolicy(initial_delay=0.05)
+    send = SlowThenFast(slow=0.3)
+
+    assert hedging.call("order/{id}", send).reason == "call 2"
+    assert send.calls == 2
+
+    stats = hedging.stats.as_dict()
+    assert stats["requests"] == 1
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+
+    hedging.shutdown()
+    time.sleep(0.4)
+    assert hedging.stats.latency_saved > 0
+
+
+def test_call_hedge_denied():
+    hedging = HedgingPolicy(initial_delay=0.05)
+    send = SlowThenFast(slow=0.1)
+
+    assert hedging.call("order/{id}", send, can_hedge=lambda: False).reason == "call 1"
+    assert send.calls == 1
+
+
+def test_call_hedge_denied_keeps_budget():
+    budget = RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1)
+    hedging = HedgingPolicy(initial_delay=0.01, budget=budget)
+
+    assert hedging.call("order/{id}", SlowThenFast(slow=0.05), can_hedge=lambda: False).reason == "call 1"
+    # the budget token was given back
+    send = SlowThenFast(slow=0.5)
+    assert hedging.call("order/{id}", send).reason == "call 2"
+    assert send.calls == 2
+
+
+def test_call_hedge_budget():
+    hedging = HedgingPolicy(initial_delay=0.01)
+    assert hedging.budget is not None
+    hedging.budget.max_tokens = 0
+    send = SlowThenFast(slow=0.05)
+
+    assert hedging.call("order/{id}", send).reason == "call 1"
+    assert send.calls == 1
+
+
+def test_call_first_error():
+    hedging = HedgingPolicy(initial_delay=0.05)
+    calls = []
+
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.1)
+            raise requests.ConnectionError("reset")
+        time.sleep(0.2)
+        return make_response()
+
+    assert hedging.call("order/{id}", send).status_code == 200
+
+    def always_fail():
+        time.sleep(0.1)
+        raise requests.ConnectionError("reset")
+
+    with pytest.raises(requests.ConnectionError):
+        hedging.call("order/{id}", always_fail)
+
+
+def test_client_hedging():
+    hedging = HedgingPolicy(initial_delay=0.01, min_delay=0.01)
+    with FakeBigBuyServer(catalog_size=5, latency=(0, 0.05)) as server:
+        client = server.client(hedging=hedging, rate_limiter=RateLimiter(rate=1000, burst=100))
+        product_id = server.catalog.products[0]["id"]
+        for _ in range(10):
+            assert client.get_product_stock_by_handling_days(product_id)["id"] == product_id
+        client.get_products()
+
+    assert hedging.stats.requests == 10
+    assert set(hedging.latencies) == {"catalog/productstockbyhandlingdays/{id}"}
+    hedging.shutdown()
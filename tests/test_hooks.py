@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+import requests
+import responses
+from responses.registries import OrderedRegistry
+
+from bigbuy import BigBuy, BBRateLimitError, BBServerError
+from bigbuy.hooks import endpoint_template
+from bigbuy.rate_limit import RATE_LIMIT_RESPONSE_TEXT
+
+
+def test_endpoint_template():
+    assert endpoint_template("catalog/product/123") == "catalog/product/{id}"
+    assert endpoint_template("catalog/productinformationbysku/S123") == "catalog/productinformationbysku/{sku}"
+    assert endpoint_template("order/123") == "order/{id}"
+    assert endpoint_template("order/reference/REF-1") == "order/reference/{reference}"
+    assert endpoint_template("catalog/products") == "catalog/products"
+    assert endpoint_template("order/check") == "order/check"
+    assert endpoint_template("order/check/multishipping") == "order/check/multishipping"
+    assert endpoint_template("order/orderstatuses") == "order/orderstatuses"
+
+
+def test_add_hook_unknown_event(app_key):
+    bb = BigBuy(app_key)
+    with pytest.raises(ValueError):
+        bb.add_hook("before_everything", lambda **kwargs: None)
+
+
+def test_remove_hook(app_key):
+    bb = BigBuy(app_key)
+
+    def hook(**kwargs):
+        pass
+
+    bb.add_hook("before_request", hook)
+    assert bb.lifecycle_hooks
+    bb.remove_hook("before_request", hook)
+    assert not bb.lifecycle_hooks
+
+    with pytest.raises(ValueError):
+        bb.remove_hook("before_request", hook)
+
+
+@responses.activate()
+def test_hooks_success(app_key):
+    bb = BigBuy(app_key)
+    calls = []
+
+    bb.add_hook("before_request", lambda **kwargs: calls.append(("before_request", kwargs)))
+    bb.add_hook("after_response", lambda **kwargs: calls.append(("after_response", kwargs)))
+    bb.add_hook("on_error", lambda **kwargs: calls.append(("on_error", kwargs)))
+
+    responses.get(bb.base_url + "/catalog/product/42.json", json={"id": 42})
+
+    assert bb.get_product(42) == {"id": 42}
+    assert [event for event, _ in calls] == ["before_request", "after_response"]
+    assert calls[0][1] == {"method": "get", "endpoint": "catalog/product/{id}"}
+    assert calls[1][1]["response"].status_code == 200
+    assert calls[1][1]["elapsed"] >= 0
+
+
+@responses.activate()
+def test_hooks_error(app_key):
+    bb = BigBuy(app_key)
+    errors = []
+
+    bb.add_hook("on_error", lambda **kwargs: errors.append(kwargs))
+
+    responses.get(bb.base_url + "/order/123.json", body="Internal Server Error", status=500)
+
+    with pytest.raises(BBServerError):
+        bb.get_order_by_id(123)
+
+    assert len(errors) == 1
+    assert errors[0]["endpoint"] == "order/{id}"
+    assert isinstance(errors[0]["error"], BBServerError)
+
+
+@responses.activate()
+def test_hooks_request_exception(app_key):
+    bb = BigBuy(app_key)
+    errors = []
+
+    bb.add_hook("on_error", lambda **kwargs: errors.append(kwargs))
+
+    responses.get(bb.base_url + "/order/123.json", body=requests.TooManyRedirects("too many redirects"))
+
+    with pytest.raises(requests.TooManyRedirects):
+        bb.get_order_by_id(123)
+
+    assert len(errors) == 1
+    assert isinstance(errors[0]["error"], requests.TooManyRedirects)
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_hooks_rate_limit_retry(app_key):
+    bb = BigBuy(app_key, retry_on_rate_limit=True, max_retry_on_rate_limit=1)
+    waits = []
+    retries = []
+
+    bb.add_hook("on_rate_limit_wait", lambda **kwargs: waits.append(kwargs))
+    bb.add_hook("on_retry", lambda **kwargs: retries.append(kwargs))
+
+    for _ in range(2):
+        responses.get(bb.base_url + "/catalog/products.json", body=RATE_LIMIT_RESPONSE_TEXT, status=429,
+                      headers={"X-Ratelimit-Reset": str(int(datetime.utcnow().timestamp()))})
+
+    with pytest.raises(BBRateLimitError):
+        bb.get_products()
+
+    assert len(waits) == 1
+    assert waits[0]["endpoint"] == "catalog/products"
+    assert waits[0]["wait_seconds"] >= 0
+    assert retries == [{"method": "get", "endpoint": "catalog/products", "attempt": 1, "reason": "rate_limit"}]
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+import pytest
+
+import bigbuy
+
+HEAVY_MODULES = ("requests", "urllib3", "api_session", "bigbuy.api", "bigbuy.types")
+
+
+def _run(code):
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout.split()
+
+
+def test_import_is_lazy():
+    loaded = _run(f"import sys, bigbuy; print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    assert loaded == []
+
+    # Exceptions and rate-limiters don't need requests either
+    loaded = _run("import sys; from bigbuy import BBError, RateLimiter, ResiliencePolicy, PriorityScheduler; "
+                  f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    assert loaded == []
+
+
+def test_lazy_attributes():
+    from bigbuy.api import BigBuy
+    from bigbuy.types import BBProductDict
+
+    assert bigbuy.BigBuy is BigBuy
+    assert bigbuy.BBProductDict is BBProductDict
+    assert "BigBuy" in dir(bigbuy)
+    assert all(hasattr(bigbuy, name) for name in bigbuy.__all__)
+
+    with pytest.raises(AttributeError, match="no attribute 'Nope'"):
+        bigbuy.Nope
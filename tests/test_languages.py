@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.languages import MultiLanguageFetcher, merge_languages
+
+
+def test_merge_languages():
+    merged = merge_languages({
+        "en": [{"id": 1, "sku": "A", "name": "Knife", "isoCode": "en"},
+               {"id": 2, "sku": "B", "name": "Fork", "isoCode": "en"}],
+        "fr": [{"id": 1, "sku": "A", "name": "Couteau", "isoCode": "fr"},
+               {"id": 2, "sku": "B", "name": "Fork", "isoCode": "fr"},
+               {"id": 3, "sku": "C", "name": "Cuillère", "isoCode": "fr"}],
+    })
+    assert list(merged) == [1, 2, 3]
+    assert merged[1] == {"id": 1, "sku": "A", "name": {"en": "Knife", "fr": "Couteau"}}
+    # Localized fields are detected on the whole endpoint, so all records have the same shape
+    assert merged[2] == {"id": 2, "sku": "B", "name": {"en": "Fork", "fr": "Fork"}}
+    assert merged[3] == {"id": 3, "sku": "C", "name": {"fr": "Cuillère"}}
+
+    merged = merge_languages({"en": [{"id": 1, "sku": "A", "name": "Knife"}]}, localized_fields=["name"])
+    assert merged[1] == {"id": 1, "sku": "A", "name": {"en": "Knife"}}
+
+
+class _ConcurrentClient:
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def get_products_information(self, isoCode):
+        # Fails with BrokenBarrierError unless all languages are requested at the same time
+        self.barrier.wait()
+        return [{"id": 1, "name": f"Knife {isoCode}", "isoCode": isoCode}]
+
+    def get_tags(self, isoCode):
+        raise ValueError(isoCode)
+
+
+def test_fetch_concurrently():
+    fetcher = MultiLanguageFetcher(_ConcurrentClient(3), languages=["en", "fr", "de"])  # type: ignore[arg-type]
+    assert fetcher.fetch("get_products_information") == {
+        1: {"id": 1, "name": {"en": "Knife en", "fr": "Knife fr", "de": "Knife de"}}}
+
+    with pytest.raises(ValueError, match="en"):
+        fetcher.fetch("get_tags")
+
+
+def test_fetch_from_server():
+    with FakeBigBuyServer(catalog_size=10, languages=("en", "fr")) as server:
+        fetcher = MultiLanguageFetcher(server.client())
+        assert fetcher.languages == ["en", "fr"]
+        products = fetcher.fetch("get_products_information")
+        tags = fetcher.fetch("get_products_tags", key=lambda record: (record["id"], record["tag"]["id"]))
+
+    product = server.catalog.products[0]
+    record = products[product["id"]]
+    assert record["sku"] == product["sku"]
+    assert set(record["name"]) == {"en", "fr"}
+    assert set(record["description"]) == {"en", "fr"}
+    assert "isoCode" not in record
+    assert len(tags) == 2 * len(server.catalog.products)
+    assert set(tags[product["id"], product["_tags"][0]]["tag"]) == {"en", "fr"}
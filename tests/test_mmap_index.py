@@ -0,0 +1,120 @@
+import multiprocessing
+
+import pytest
+
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.mmap_index import CatalogIndex, IndexRecord, write_catalog_index, build_catalog_index
+
+RECORDS = [
+    IndexRecord(1, "S1", 8400000000001, 5.0, 10.0, 9.0, 3),
+    IndexRecord(2, "S2", 0, 6.0, 12.0, 11.0, 0),
+    IndexRecord(10, "V10", 8500000000010, 7.0, 14.0, 13.0, 1, product_id=1, is_variation=True),
+]
+
+
+def lookup_in_process(path, sku, queue):
+    with CatalogIndex(path) as index:
+        record = index.by_sku(sku)
+        queue.put(record.id if record else None)
+
+
+def test_write_and_lookup(tmp_path):
+    path = tmp_path / "catalog.idx"
+    assert write_catalog_index(path, RECORDS) == 3
+
+    with CatalogIndex(path) as index:
+        assert len(index) == 3
+        assert list(index) == RECORDS
+        assert index.by_id(1) == RECORDS[0]
+        assert index.by_variation_id(10) == RECORDS[2]
+        assert index.by_id(10) is None
+        assert index.by_variation_id(1) is None
+        assert index.by_sku("S2") == RECORDS[1]
+        assert index.by_ean(8400000000001) == RECORDS[0]
+        assert index.by_ean("8500000000010") == RECORDS[2]
+
+        assert index.by_id(3) is None
+        assert index.by_sku("S3") is None
+        assert index.by_sku("S" * 100) is None
+        assert index.by_ean(0) is None
+        assert index.by_ean("") is None
+
+
+def test_product_and_variation_with_the_same_id(tmp_path):
+    path = tmp_path / "catalog.idx"
+    product = IndexRecord(7, "S7", 0, 5.0, 10.0, 9.0, 3)
+    variation = IndexRecord(7, "V7", 0, 6.0, 12.0, 11.0, 1, product_id=1, is_variation=True)
+    write_catalog_index(path, [variation, product])
+
+    with CatalogIndex(path) as index:
+        assert index.by_id(7) == product
+        assert index.by_variation_id(7) == variation
+
+
+def test_write_errors(tmp_path):
+    with pytest.raises(ValueError):
+        write_catalog_index(tmp_path / "catalog.idx", [IndexRecord(1, "S" * 25, 0, 0, 0, 0, 0)])
+
+    (tmp_path / "bad.idx").write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        CatalogIndex(tmp_path / "bad.idx")
+
+
+def test_many_records(tmp_path):
+    records = [IndexRecord(i, f"S{i}", 8400000000000 + i, 1.0, 2.0, 2.0, i % 7) for i in range(1, 5001)]
+    write_catalog_index(tmp_path / "catalog.idx", records)
+    with CatalogIndex(tmp_path / "catalog.idx") as index:
+        assert all(index.by_sku(r.sku) == r for r in records[::7])
+        assert all(index.by_ean(r.ean) == r for r in records[::11])
+
+
+def test_reload(tmp_path):
+    path = tmp_path / "catalog.idx"
+    write_catalog_index(path, RECORDS[:1])
+    with CatalogIndex(path) as index:
+        assert not index.reload_if_changed()
+        write_catalog_index(path, RECORDS)
+        # the old version is still readable until it's reloaded
+        assert index.by_sku("S2") is None
+        assert index.reload_if_changed()
+        assert index.by_sku("S2") == RECORDS[1]
+
+
+def test_reload_while_reading(tmp_path):
+    path = tmp_path / "catalog.idx"
+    write_catalog_index(path, RECORDS[:2])
+    with CatalogIndex(path) as index:
+        records = iter(index)
+        assert next(records) == RECORDS[0]
+        write_catalog_index(path, RECORDS)
+        assert index.reload_if_changed()
+        # a reader that started before the reload finishes with the previous version
+        assert list(records) == RECORDS[1:2]
+        assert len(index) == 3
+
+
+def test_shared_between_processes(tmp_path):
+    path = str(tmp_path / "catalog.idx")
+    write_catalog_index(path, RECORDS)
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=lookup_in_process, args=(path, "V10", queue))
+    process.start()
+    process.join()
+    assert queue.get() == 10
+
+
+def test_build_catalog_index(tmp_path):
+    with FakeBigBuyServer(catalog_size=20) as server:
+        client = server.client()
+        assert build_catalog_index(client, tmp_path / "catalog.idx") > 20
+        product = client.get_products()[3]
+        stock = client.get_product_stock_by_handling_days(product["id"])
+
+    with CatalogIndex(tmp_path / "catalog.idx") as index:
+        record = index.by_sku(product["sku"])
+        assert record is not None
+        assert record.id == product["id"]
+        assert record.retail_price == product["retailPrice"]
+        assert record.stock == sum(s["quantity"] for s in stock["stocks"])
+        assert index.by_ean(product["ean13"]) == record
+        assert any(r.is_variation for r in index)
@@ -0,0 +1,169 @@
+import itertools
+
+from bigbuy.exceptions import BBServerError
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.responses import ResponseView
+from bigbuy.order_sync import OrderSyncEngine, OrderEvent, TrackedOrder, status_state, PENDING, PROCESSING, \
+    SHIPPED, CLOSED, STATUS_CHANGED, TRACKING_CHANGED, DELIVERY_NOTES, ORDER_CLOSED, ORDER_NOT_FOUND, \
+    CHECK_FAILED
+
+_references = itertools.count()
+
+
+def place_orders(server, client, count):
+    records = [record for record in server.catalog.products
+               if server.catalog.stocks[record["id"]][0]["quantity"] >= 1][:count]
+    return [client.create_order_id({
+        "internalReference": f"sync-{next(_references)}", "language": "es", "paymentMethod": "moneybox",
+        "carriers": [{"name": "chrono"}], "shippingAddress": {"country": "ES", "postcode": "46005"},
+        "products": [{"reference": record["sku"], "quantity": 1}]}) for record in records]
+
+
+def requests(server):
+    return dict(server.requests_by_path)
+
+
+def test_status_state():
+    assert status_state("Pending payment") == PENDING
+    assert status_state("Payment accepted") == PENDING
+    assert status_state("Processing in progress") == PROCESSING
+    assert status_state("Shipped") == SHIPPED
+    assert status_state("Delivered") == CLOSED
+    assert status_state("Cancelled") == CLOSED
+    assert status_state("Refund") == CLOSED
+
+
+def test_sync_cycles(clock):
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        engine = OrderSyncEngine.from_client(client, clock=clock)
+        assert engine.states["Processing in progress"] == PROCESSING
+
+        order_ids = place_orders(server, client, 3)
+        for order_id in order_ids:
+            engine.track(order_id)
+
+        events = engine.run_cycle()
+        assert [(e.type, e.order_id, e.old_status, e.new_status) for e in events] == [
+            (STATUS_CHANGED, order_id, None, "Payment accepted") for order_id in order_ids]
+
+        # Nothing is due
+        before = requests(server)
+        assert engine.run_cycle() == []
+        assert requests(server) == before
+
+        fake_orders = [server.orders[int(order_id)] for order_id in order_ids]
+        fake_orders[0].status = "Shipped"
+        fake_orders[1].status = "Processing in progress"
+        clock.now += 15 * 60
+        events = engine.run_cycle()
+        assert [(e.type, e.order_id) for e in events] == [
+            (STATUS_CHANGED, order_ids[0]), (STATUS_CHANGED, order_ids[1]), (DELIVERY_NOTES, order_ids[0])]
+        assert engine.orders[order_ids[0]].state == SHIPPED
+        assert engine.orders[order_ids[0]].delivery_notes
+        # Checked without change: the interval doubles
+        assert engine.orders[order_ids[2]].next_check == clock.now + 2 * 15 * 60
+
+        # The shipped order is checked with a tracking request
+        clock.now += 6 * 60 * 60
+        before = requests(server)
+        events = engine.run_cycle()
+        assert [(e.type, e.order_id) for e in events] == [(TRACKING_CHANGED, order_ids[0])]
+        after = requests(server)
+        assert after["tracking/orders"] == before.get("tracking/orders", 0) + 1
+        assert after[f"order/{order_ids[0]}"] == before[f"order/{order_ids[0]}"] + 1
+
+        fake_orders[0].status = "Delivered"
+        clock.now += 6 * 60 * 60
+        events = engine.run_cycle()
+        assert (TRACKING_CHANGED, order_ids[0]) in [(e.type, e.order_id) for e in events]
+        closed = [e for e in events if e.type == ORDER_CLOSED]
+        assert [e.order_id for e in closed] == [order_ids[0]]
+        assert order_ids[0] not in engine.orders
+        assert len(engine) == 2
+
+
+def test_shipped_without_tracking_change(clock):
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        engine = OrderSyncEngine.from_client(client, clock=clock, status_every=2)
+        order_id, = place_orders(server, client, 1)
+        server.orders[int(order_id)].status = "Shipped"
+        engine.track(order_id, "Shipped")
+        engine.orders[order_id].tracking = [[f"TRK{int(order_id):010d}", "In transit"]]
+
+        clock.now += 6 * 60 * 60
+        assert engine.run_cycle() == []
+        assert server.requests_by_path.get(f"order/{order_id}") is None
+        assert engine.orders[order_id].unchanged_checks == 1
+
+        # The status is fetched every 2 checks
+        clock.now += 2 * 6 * 60 * 60
+        events = engine.run_cycle()
+        assert server.requests_by_path[f"order/{order_id}"] == 1
+        assert [e.type for e in events] == [DELIVERY_NOTES]
+        assert engine.orders[order_id].unchanged_checks == 2
+
+
+def test_failed_check(clock):
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        engine = OrderSyncEngine.from_client(client, clock=clock)
+        order_ids = place_orders(server, client, 2)
+        for order_id in order_ids:
+            server.orders[int(order_id)].status = "Shipped"
+            order = engine.track(order_id, "Shipped")
+            order.tracking = [["TRK", "Old status"]]
+            order.delivery_notes = True
+
+        get_order_by_id = client.get_order_by_id
+        failing = {order_ids[1]}
+
+        def flaky_get_order_by_id(order_id, **kwargs):
+            if str(order_id) in failing:
+                raise BBServerError("Service Unavailable", ResponseView(503))
+            return get_order_by_id(order_id, **kwargs)
+
+        client.get_order_by_id = flaky_get_order_by_id  # type: ignore[method-assign]
+
+        clock.now += 6 * 60 * 60
+        events = engine.run_cycle()
+        assert [(e.type, e.order_id) for e in events] == [
+            (TRACKING_CHANGED, order_ids[0]), (CHECK_FAILED, order_ids[1])]
+        assert isinstance(events[1].data, BBServerError)
+        # The failed order is still due, with its old tracking
+        assert engine.orders[order_ids[1]].tracking == [["TRK", "Old status"]]
+        assert [order.id for order in engine.due()] == [order_ids[1]]
+
+        failing.clear()
+        events = engine.run_cycle()
+        assert [(e.type, e.order_id) for e in events] == [(TRACKING_CHANGED, order_ids[1])]
+        assert engine.due() == []
+
+
+def test_not_found_and_priorities(clock):
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        engine = OrderSyncEngine(client, clock=clock)
+        engine.track(999)
+        engine.track(1000, "Processing in progress").next_check = 0
+        engine.track(1001, "Payment accepted").next_check = 0
+
+        assert [order.id for order in engine.due()] == ["999", "1000", "1001"]
+        events = engine.run_cycle(max_orders=1)
+        assert events == [OrderEvent(ORDER_NOT_FOUND, "999")]
+        assert [order.id for order in engine.due()] == ["1000", "1001"]
+
+
+def test_save_load(tmp_path):
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        engine = OrderSyncEngine.from_client(client)
+        engine.track(1, "Shipped").tracking = [["TRK", "In transit"]]
+        engine.track(2)
+        engine.save(tmp_path / "orders.json")
+
+        loaded = OrderSyncEngine.load(client, tmp_path / "orders.json")
+        assert [order.as_dict() for order in loaded.orders.values()] == [
+            order.as_dict() for order in engine.orders.values()]
+        assert isinstance(loaded.orders["1"], TrackedOrder)
@@ -0,0 +1,124 @@
+import pytest
+import responses
+from responses.registries import OrderedRegistry
+
+from bigbuy import BigBuy, BigBuyPool, BBRateLimitError, RateLimiter
+from bigbuy.rate_limit import RATE_LIMIT_RESPONSE_TEXT
+
+BASE_URL = "https://api.bigbuy.eu/rest"
+
+
+def make_pool(**kwargs):
+    return BigBuyPool.from_keys({"a": "key-a", "b": "key-b"}, pool_kwargs=kwargs)
+
+
+def auth_matcher(app_key):
+    return responses.matchers.header_matcher({"Authorization": f"Bearer {app_key}"})
+
+
+def test_init():
+    pool = make_pool()
+    assert len(pool) == 2
+    assert list(pool) == ["a", "b"]
+    assert pool.for_account("b").app_key == "key-b"
+
+    with pytest.raises(KeyError):
+        pool.for_account("c")
+    with pytest.raises(ValueError):
+        BigBuyPool({})
+
+
+def test_from_keys_rate_limiters():
+    pool = BigBuyPool.from_keys({"a": "key-a", "b": "key-b"}, rate=5, burst=2)
+    limiters = [pool.for_account(name).rate_limiter for name in pool]
+    assert all(isinstance(limiter, RateLimiter) for limiter in limiters)
+    assert limiters[0] is not limiters[1]
+
+
+def test_write_methods_not_pooled():
+    pool = make_pool()
+    with pytest.raises(AttributeError, match="for_account"):
+        pool.create_order({})
+    with pytest.raises(ValueError):
+        pool.call("get_order_by_id", 1)
+    with pytest.raises(AttributeError):
+        pool.foo()
+
+
+@responses.activate
+def test_spread_calls():
+    pool = make_pool()
+    responses.get(BASE_URL + "/catalog/products.json", json=[])
+
+    for _ in range(4):
+        assert pool.get_products() == []
+
+    assert pool.requests == {"a": 2, "b": 2}
+
+
+@responses.activate
+def test_route_to_most_budget():
+    pool = BigBuyPool({
+        "a": BigBuy("key-a", rate_limiter=RateLimiter(rate=1, burst=5, clock=lambda: 0)),
+        "b": BigBuy("key-b", rate_limiter=RateLimiter(rate=1, burst=1, clock=lambda: 0)),
+    })
+    responses.get(BASE_URL + "/catalog/products.json", json=[])
+
+    for _ in range(5):
+        pool.get_products()
+
+    # "a" is used until it has as few tokens left as "b"
+    assert pool.requests == {"a": 4, "b": 1}
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_failover():
+    pool = make_pool(throttle_cooldown=60)
+    responses.get(BASE_URL + "/catalog/product/1.json", body=RATE_LIMIT_RESPONSE_TEXT, status=429,
+                  match=[auth_matcher("key-a")])
+    responses.get(BASE_URL + "/catalog/product/1.json", json={"id": 1}, match=[auth_matcher("key-b")])
+    responses.get(BASE_URL + "/catalog/product/2.json", json={"id": 2}, match=[auth_matcher("key-b")])
+
+    assert pool.get_product(1) == {"id": 1}
+    assert pool.throttled_accounts() == ["a"]
+    # "a" is set aside
+    assert pool.get_product(2) == {"id": 2}
+
+    assert pool.stats() == {"requests": {"a": 1, "b": 2}, "rate_limited": {"a": 1, "b": 0}, "failovers": 1}
+
+
+@responses.activate
+def test_all_throttled():
+    waits = []
+    pool = make_pool(throttle_cooldown=60, sleep_function=waits.append, max_attempts=3)
+    responses.get(BASE_URL + "/catalog/product/1.json", body=RATE_LIMIT_RESPONSE_TEXT, status=429)
+
+    with pytest.raises(BBRateLimitError):
+        pool.get_product(1)
+
+    assert len(responses.calls) == 3
+    assert len(waits) == 1 and waits[0] > 59
+
+    pool.wait_when_throttled = False
+    with pytest.raises(BBRateLimitError):
+        pool.get_product(1)
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_all_throttled_no_wait():
+    waits = []
+    pool = make_pool(throttle_cooldown=60, sleep_function=waits.append, wait_when_throttled=False)
+    responses.get(BASE_URL + "/catalog/product/1.json", body=RATE_LIMIT_RESPONSE_TEXT, status=429)
+
+    with pytest.raises(BBRateLimitError):
+        pool.get_product(1)
+    assert len(responses.calls) == 2
+    assert pool.stats() == {"requests": {"a": 1, "b": 1}, "rate_limited": {"a": 1, "b": 1}, "failovers": 1}
+
+    # Both accounts are throttled: the error is raised right away
+    with pytest.raises(BBRateLimitError):
+        pool.get_product(1)
+    assert len(responses.calls) == 2
+    assert waits == []
+    assert pool.stats() == {"requests": {"a": 1, "b": 1}, "rate_limited": {"a": 1, "b": 1}, "failovers": 1}
@@ -0,0 +1,163 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bigbuy.exceptions import BBInsufficientPurseError, BBMoneyBoxTooLowError, BBServerError
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.purse import PurseTracker
+from bigbuy.responses import ResponseView
+
+_references = itertools.count()
+
+
+class FakeClient:
+    def __init__(self, amount):
+        self.amount = amount
+        self.calls = 0
+        self.error = None
+
+    def get_purse_amount(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.amount
+
+
+def test_reserve_and_commit():
+    client = FakeClient(100)
+    purse = PurseTracker(client, reconcile_interval=None)  # type: ignore[arg-type]
+
+    with purse.reserve(30) as reservation:
+        assert purse.available == 70
+        assert reservation.amount == 30
+    assert reservation.done
+    assert purse.balance == 70
+    assert purse.reserved == 0
+
+    reservation = purse.reserve(20)
+    reservation.commit(25)
+    assert purse.balance == 45
+    with pytest.raises(ValueError):
+        reservation.release()
+
+    purse.reserve(40).release()
+    assert purse.available == 45
+    assert client.calls == 1
+
+
+def test_release_on_error():
+    client = FakeClient(100)
+    purse = PurseTracker(client, reconcile_interval=None)  # type: ignore[arg-type]
+    with pytest.raises(BBServerError):
+        with purse.reserve(30):
+            raise BBServerError("Internal Server Error", ResponseView(500))
+    assert purse.balance == 100
+    assert purse.reserved == 0
+    # The order may have been created
+    assert purse.needs_reconcile
+
+    client.amount = 70
+    purse.reserve(10).release()
+    assert purse.balance == 70
+    assert client.calls == 2
+
+
+def test_failed_reconcile():
+    client = FakeClient(100)
+    purse = PurseTracker(client, reconcile_interval=None)  # type: ignore[arg-type]
+    purse.reserve(10).commit()
+    purse.on_error(BBServerError("Internal Server Error", ResponseView(500)))
+
+    client.amount = 0
+    client.error = BBServerError("Internal Server Error", ResponseView(500))
+    with pytest.raises(BBServerError):
+        purse.reserve(50)
+    # The balance is still uncertain
+    assert purse.needs_reconcile
+    assert purse.reserved == 0
+
+    client.error = None
+    with pytest.raises(BBInsufficientPurseError):
+        purse.reserve(50)
+    assert not purse.needs_reconcile
+
+
+def test_money_box_too_low_error():
+    client = FakeClient(100)
+    purse = PurseTracker(client, reconcile_interval=None)  # type: ignore[arg-type]
+    with pytest.raises(BBMoneyBoxTooLowError):
+        with purse.reserve(30):
+            raise BBMoneyBoxTooLowError("Not enough money", ResponseView(409), "ER005",
+                                        {"moneyBoxAmount": 12.5, "totalOrder": 30})
+    assert purse.balance == 12.5
+    assert not purse.needs_reconcile
+
+
+def test_insufficient_purse():
+    client = FakeClient(100)
+    purse = PurseTracker(client, reconcile_interval=None, margin=10)  # type: ignore[arg-type]
+    purse.reserve(50)
+    with pytest.raises(BBInsufficientPurseError) as exc_info:
+        purse.reserve(50)
+    assert exc_info.value.available == 40
+    # It reconciled before refusing
+    assert client.calls == 2
+
+    # Topped up
+    client.amount = 200
+    purse.reserve(50)
+    assert purse.reserved == 100
+
+
+def test_reconcile_interval(clock):
+    client = FakeClient(100)
+    purse = PurseTracker(client, reconcile_interval=60, clock=clock)  # type: ignore[arg-type]
+    purse.reserve(10).commit()
+    clock.now += 30
+    purse.reserve(10).commit()
+    assert client.calls == 1
+    assert purse.balance == 80
+
+    clock.now += 30
+    purse.reserve(10).release()
+    assert client.calls == 2
+    assert purse.balance == 100
+
+
+def _place_orders(server, purse, count):
+    records = [record for record in server.catalog.products
+               if server.catalog.stocks[record["id"]][0]["quantity"] >= 5][:count]
+
+    def place(record):
+        order = {"internalReference": f"purse-{next(_references)}", "language": "es", "paymentMethod": "moneybox",
+                 "carriers": [{"name": "chrono"}], "shippingAddress": {"country": "ES", "postcode": "46005"},
+                 "products": [{"reference": record["sku"], "quantity": 1}]}
+        try:
+            return purse.place_order(order)
+        except BBInsufficientPurseError:
+            return None
+
+    with ThreadPoolExecutor(8) as executor:
+        return list(executor.map(place, records))
+
+
+def test_concurrent_orders():
+    with FakeBigBuyServer(catalog_size=100) as server:
+        purse = PurseTracker(server.client())
+        order_ids = _place_orders(server, purse, 40)
+        assert None not in order_ids
+        assert server.requests_by_path["user/purse"] == 1
+        assert purse.balance == pytest.approx(server.purse_amount)
+        assert purse.reserved == pytest.approx(0)
+
+
+def test_concurrent_orders_exhaust_purse():
+    with FakeBigBuyServer(catalog_size=100, purse_amount=1000) as server:
+        purse = PurseTracker(server.client())
+        # BBMoneyBoxTooLowError would be raised if the workers overspent the purse
+        order_ids = _place_orders(server, purse, 40)
+        assert None in order_ids
+        assert len(server.orders) == len([order_id for order_id in order_ids if order_id is not None])
+        assert purse.balance == pytest.approx(server.purse_amount)
+        assert purse.reserved == pytest.approx(0)
@@ -2,7 +2,9 @@ from datetime import datetime, timedelta
 from typing import Optional
 from unittest import mock
 
-from bigbuy.rate_limit import RATE_LIMIT_RESPONSE_TEXT, RateLimit
+import pytest
+
+from bigbuy.rate_limit import RATE_LIMIT_RESPONSE_TEXT, RateLimit, RateLimiter
 
 
 def mock_response(ok=True, headers=None, text="", status_code=None):
@@ -63,3 +65,54 @@ def test_wait_until_expiration(utcnow):
 
     assert _wait is not None
     assert 1 < _wait < 3  # add some margin
+
+
+def test_rate_limiter_try_acquire(clock):
+    limiter = RateLimiter(rate=2, burst=2, clock=clock)
+
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    clock.now += 0.5
+    assert limiter.available_tokens == 1
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+
+def test_rate_limiter_acquire_timeout(clock):
+    limiter = RateLimiter(rate=1, burst=1, clock=clock)
+
+    assert limiter.acquire()
+    assert not limiter.acquire(timeout=0.5)
+
+
+def test_rate_limiter_acquire_waits():
+    limiter = RateLimiter(rate=100, burst=1)
+    assert limiter.acquire()
+    assert limiter.acquire(timeout=1)
+
+
+def test_rate_limiter_more_than_burst():
+    limiter = RateLimiter(rate=100, burst=2)
+    assert limiter.acquire(2)
+    with pytest.raises(ValueError):
+        limiter.acquire(3)
+    with pytest.raises(ValueError):
+        limiter.time_until_available(3)
+
+
+def test_rate_limiter_pause(clock):
+    limiter = RateLimiter(rate=10, burst=10, clock=clock)
+
+    limiter.pause_until(clock.now + 5)
+    assert limiter.available_tokens == 0
+    assert not limiter.try_acquire()
+
+    clock.now += 5
+    assert limiter.try_acquire()
+
+
+def test_rate_limiter_invalid_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
@@ -0,0 +1,71 @@
+import pytest
+
+from bigbuy import BigBuy, BBProductNotFoundError
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.replay import RecordingAdapter, ReplayAdapter, ReplayMissError, iter_records, replay_traffic
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeBigBuyServer(catalog_size=10) as fake_server:
+        yield fake_server
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz", ".jsonl.bz2", ".jsonl.xz"])
+def test_record_and_replay(server, tmp_path, suffix):
+    path = tmp_path / f"traffic{suffix}"
+
+    client = server.client()
+    with RecordingAdapter(path) as recorder:
+        client.mount("http://", recorder)
+        products = client.get_products(isoCode="en")
+        purse = client.get_purse_amount()
+        with pytest.raises(BBProductNotFoundError):
+            client.check_order({"products": [{"reference": "UNKNOWN", "quantity": 1}]})
+
+    records = list(iter_records(path))
+    assert [(record["m"], record["s"]) for record in records] == [("GET", 200), ("GET", 200), ("POST", 409)]
+    assert records[0]["u"] == "/rest/catalog/products.json?isoCode=en"
+    assert "Authorization" not in str(records)
+
+    replay_client = BigBuy("another-key")
+    replay_client.mount("https://", ReplayAdapter(path))
+
+    assert replay_client.get_products(isoCode="en") == products
+    assert replay_client.get_purse_amount() == purse
+    with pytest.raises(BBProductNotFoundError):
+        replay_client.check_order({"products": [{"reference": "UNKNOWN", "quantity": 1}]})
+
+    with pytest.raises(ReplayMissError):
+        replay_client.get_products(isoCode="en")
+
+
+def test_replay_loop():
+    records = [{"t": 0, "m": "GET", "u": "/rest/user/purse.json", "s": 200, "h": {}, "c": "1.5", "e": 0.01}]
+    client = BigBuy()
+    adapter = ReplayAdapter(records, loop=True)
+    client.mount("https://", adapter)
+
+    assert client.get_purse_amount() == 1.5
+    assert client.get_purse_amount() == 1.5
+    assert adapter.served == 2
+
+
+def test_replay_traffic(server, tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+
+    client = server.client()
+    with RecordingAdapter(path) as recorder:
+        client.mount("http://", recorder)
+        client.get_languages()
+        client.get_products(pageSize=5, page=1)
+        with pytest.raises(BBProductNotFoundError):
+            client.check_order({"products": [{"reference": "UNKNOWN", "quantity": 1}]})
+
+    replay_client = BigBuy()
+    replay_client.mount("https://", ReplayAdapter(path))
+    stats = replay_traffic(replay_client, path, trace_memory=True)
+
+    assert stats.requests == 3
+    assert stats.errors == 1
+    assert stats.peak_memory is not None and stats.peak_memory > 0
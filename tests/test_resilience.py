@@ -0,0 +1,265 @@
+from datetime import datetime
+
+import pytest
+import requests
+import responses
+from responses.registries import OrderedRegistry
+
+from bigbuy import BigBuy, BBServerError, BBTimeoutError, BBCircuitOpenError, BBDeadlineExceededError, \
+    BBProductNotFoundError, BBRateLimitError
+from bigbuy.rate_limit import RATE_LIMIT_RESPONSE_TEXT
+from bigbuy.resilience import Backoff, RetryBudget, CircuitBreaker, Deadline, ResiliencePolicy
+
+
+def no_backoff():
+    return Backoff(base=0)
+
+
+def test_backoff():
+    backoff = Backoff(base=1, factor=2, maximum=5, jitter="none")
+    assert [backoff.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    assert Backoff(base=1, jitter="full", random_function=lambda: 0.5).delay(3) == 2
+    assert Backoff(base=1, jitter="equal", random_function=lambda: 0).delay(3) == 2
+
+    with pytest.raises(ValueError):
+        Backoff(jitter="random")
+
+
+def test_retry_budget(clock):
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0, max_tokens=2, clock=clock)
+
+    assert budget.try_retry()
+    assert budget.try_retry()
+    assert not budget.try_retry()
+
+    budget.record_request()
+    assert not budget.try_retry()
+    budget.record_request()
+    assert budget.try_retry()
+
+    budget.min_retries_per_second = 1
+    clock.now += 1
+    assert budget.try_retry()
+    assert not budget.try_retry()
+
+
+def test_circuit_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 10
+
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # only one trial call
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_deadline(clock):
+    deadline = Deadline(5, clock=clock)
+    assert deadline.remaining() == 5
+    assert not deadline.expired
+    clock.now += 5
+    assert deadline.expired
+    assert Deadline.coerce(deadline) is deadline
+    assert isinstance(Deadline.coerce(3), Deadline)
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_retry_server_error(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff()))
+    retries = []
+    bb.add_hook("on_retry", lambda **kwargs: retries.append(kwargs))
+
+    responses.get(bb.base_url + "/catalog/product/1.json", body="Bad Gateway", status=502)
+    responses.get(bb.base_url + "/catalog/product/1.json",
+                  body="<html><body><h1>504 Gateway Time-out</h1>\nThe server didn't respond in time.\n</body></html>",
+                  status=504)
+    responses.get(bb.base_url + "/catalog/product/1.json", json={"id": 1})
+
+    assert bb.get_product(1) == {"id": 1}
+    assert [(r["attempt"], r["reason"]) for r in retries] == [(1, "server_error"), (2, "server_error")]
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_retry_connection_error(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff()))
+
+    responses.get(bb.base_url + "/catalog/product/1.json", body=requests.ConnectionError("reset"))
+    responses.get(bb.base_url + "/catalog/product/1.json", json={"id": 1})
+
+    assert bb.get_product(1) == {"id": 1}
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_retry_max_retries(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff(), max_retries=1))
+
+    for _ in range(3):
+        responses.get(bb.base_url + "/catalog/product/1.json", body="Internal Server Error", status=500)
+
+    with pytest.raises(BBServerError):
+        bb.get_product(1)
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate()
+def test_no_retry_client_errors_and_writes(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff()))
+
+    responses.post(bb.base_url + "/order/check.json", body="Bad Gateway", status=502)
+    responses.get(bb.base_url + "/catalog/product/1.json", status=409, json={
+        "code": "ER001", "message": '{"info":"Product not found","data":{"skus":["S1"]}}'})
+
+    with pytest.raises(BBServerError):
+        bb.check_order({})
+    with pytest.raises(BBProductNotFoundError):
+        bb.get_product(1)
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate()
+def test_retry_budget_exhausted(app_key):
+    budget = RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1)
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff(), budget=budget, max_retries=5))
+
+    responses.get(bb.base_url + "/catalog/product/1.json", body="Internal Server Error", status=500)
+
+    with pytest.raises(BBServerError):
+        bb.get_product(1)
+
+    # one request + the only retry allowed by the budget
+    assert len(responses.calls) == 2
+
+
+@responses.activate()
+def test_circuit_breaker_opens(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff(), max_retries=0, failure_threshold=2))
+
+    responses.get(bb.base_url + "/order/1.json", body="503 Service Unavailable", status=503)
+    responses.get(bb.base_url + "/order/2.json", body="503 Service Unavailable", status=503)
+    responses.get(bb.base_url + "/catalog/products.json", json=[])
+
+    with pytest.raises(BBTimeoutError):
+        bb.get_order_by_id(1)
+    with pytest.raises(BBTimeoutError):
+        bb.get_order_by_id(2)
+    with pytest.raises(BBCircuitOpenError) as exc_info:
+        bb.get_order_by_id(1)
+
+    assert exc_info.value.endpoint == "order/{id}"
+    assert len(responses.calls) == 2
+
+    # other endpoints are not affected
+    assert bb.get_products() == []
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_circuit_breaker_trial_rate_limited(app_key):
+    # the breaker is half-open right after it opens
+    bb = BigBuy(app_key, retry_on_rate_limit=True,
+                resilience=ResiliencePolicy(backoff=no_backoff(), max_retries=0, failure_threshold=1, reset_timeout=0))
+
+    responses.get(bb.base_url + "/order/1.json", body="Internal Server Error", status=500)
+    responses.get(bb.base_url + "/order/1.json", body=RATE_LIMIT_RESPONSE_TEXT, status=429,
+                  headers={"X-Ratelimit-Reset": str(int(datetime.utcnow().timestamp()))})
+    responses.get(bb.base_url + "/order/1.json", json={"id": 1})
+    responses.get(bb.base_url + "/order/1.json", json={"id": 1})
+
+    with pytest.raises(BBServerError):
+        bb.get_order_by_id(1)
+
+    # the trial call waits for the rate-limit and is retried without being rejected by its own breaker
+    assert bb.get_order_by_id(1) == {"id": 1}
+    assert bb.resilience is not None
+    assert bb.resilience.circuit_breakers["order/{id}"].state == CircuitBreaker.CLOSED
+    assert bb.get_order_by_id(1) == {"id": 1}
+
+
+@responses.activate(registry=OrderedRegistry)
+def test_circuit_breaker_rate_limited(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=no_backoff(), max_retries=0, failure_threshold=2))
+    assert bb.resilience is not None
+
+    for status, body in ((500, "Internal Server Error"), (429, RATE_LIMIT_RESPONSE_TEXT),
+                         (500, "Internal Server Error")):
+        responses.get(bb.base_url + "/order/1.json", body=body, status=status)
+
+    # a rate-limited response is neither a success nor a failure
+    with pytest.raises(BBServerError):
+        bb.get_order_by_id(1)
+    with pytest.raises(BBRateLimitError):
+        bb.get_order_by_id(1)
+    with pytest.raises(BBServerError):
+        bb.get_order_by_id(1)
+    breaker = bb.resilience.circuit_breakers["order/{id}"]
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # nor does it close a half-open breaker
+    breaker.reset_timeout = 0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    responses.get(bb.base_url + "/order/1.json", body=RATE_LIMIT_RESPONSE_TEXT, status=429)
+    with pytest.raises(BBRateLimitError):
+        bb.get_order_by_id(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_circuit_breaker_trial_released(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(failure_threshold=1, reset_timeout=0))
+    assert bb.resilience is not None
+    breaker = bb.resilience.circuit_breaker("order/{id}")
+    assert breaker is not None
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # the trial call is abandoned before any request: another call can try
+    with pytest.raises(BBDeadlineExceededError):
+        bb.get_order_by_id(1, deadline=Deadline(0))
+    assert breaker.allow()
+
+
+@responses.activate()
+def test_deadline_exceeded(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy(backoff=Backoff(base=10, jitter="none")))
+
+    responses.get(bb.base_url + "/order/1.json", body="Internal Server Error", status=500)
+
+    # the backoff delay is longer than the deadline, so we don't retry
+    with pytest.raises(BBServerError):
+        bb.get_order_by_id(1, deadline=5)
+    assert len(responses.calls) == 1
+
+    with pytest.raises(BBDeadlineExceededError):
+        bb.get_order_by_id(1, deadline=Deadline(0))
+    assert len(responses.calls) == 1
+
+
+@responses.activate()
+def test_deadline_caps_timeout(app_key):
+    bb = BigBuy(app_key, resilience=ResiliencePolicy())
+    responses.get(bb.base_url + "/order/1.json", json={"id": 1})
+
+    bb.request_api("get", "order/1", deadline=5, timeout=(3, 30))
+    connect_timeout, read_timeout = responses.calls[0].request.req_kwargs["timeout"]
+    assert connect_timeout == 3
+    assert 4 < read_timeout <= 5
+
+    bb.request_api("get", "order/1", deadline=5, timeout=30)
+    assert 4 < responses.calls[1].request.req_kwargs["timeout"] <= 5
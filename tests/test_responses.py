@@ -0,0 +1,83 @@
+import gc
+import json
+import weakref
+
+from requests import Response
+
+from bigbuy import exceptions as ex
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.responses import ResponseView
+
+
+def _response(status, body, headers=None):
+    response = Response()
+    response.status_code = status
+    response.reason = "Conflict"
+    response.url = "https://api.bigbuy.eu/rest/order/create.json"
+    response.headers.update(headers or {})
+    response._content = body.encode("utf-8")
+    return response
+
+
+def test_from_response():
+    response = _response(409, json.dumps({"code": "ER003"}), {"content-type": "application/json", "X-Other": "1"})
+    view = ResponseView.from_response(response)
+    assert repr(view) == "<ResponseView [409]>"
+    assert not view.ok
+    assert view.reason == "Conflict"
+    assert view.url == response.url
+    assert dict(view.headers) == {"Content-Type": "application/json"}
+    assert view.headers["content-type"] == "application/json"
+    assert view.text == '{"code": "ER003"}'
+    assert view.json() == {"code": "ER003"}
+    assert ResponseView.from_response(view) is view
+
+    view.release()
+    assert view.content == b""
+    assert view.status_code == 409
+
+    view = ResponseView.from_response(_response(201, "", {"Location": "/rest/order/123"}), headers=("Location",),
+                                      content=False)
+    assert view.ok
+    assert view.headers["Location"] == "/rest/order/123"
+
+
+def test_detected_encoding():
+    response = _response(500, "")
+    response._content = "Erreur interne du serveur, réessayez plus tard.".encode("latin-1")
+    assert response.encoding is None
+
+    view = ResponseView.from_response(response)
+    assert view.encoding is None
+    assert view.text == response.text
+
+
+def test_errors_do_not_keep_the_response():
+    response = _response(429, "You exceeded the rate limit", {"X-Ratelimit-Reset": "4102444800"})
+    ref = weakref.ref(response)
+
+    try:
+        ex.raise_for_response(response)
+    except ex.BBRateLimitError as e:
+        # The traceback references the frames that handled the response
+        error = e.with_traceback(None)
+
+    assert isinstance(error.response, ResponseView)
+    assert error.response.text == "You exceeded the rate limit"
+    assert error.rate_limit is not None
+
+    del response
+    gc.collect()
+    assert ref() is None
+
+
+def test_create_order_id():
+    with FakeBigBuyServer(catalog_size=5) as server:
+        client = server.client()
+        product = next(p for p in server.catalog.products if server.catalog.stocks[p["id"]][0]["warehouse"] == 1)
+        order_id = client.create_order_id({
+            "internalReference": "test-responses",
+            "shippingAddress": {"country": "ES", "postcode": "46005"},
+            "products": [{"reference": product["sku"], "quantity": 1}],
+        })
+        assert client.get_order_by_id(order_id)["id"] == order_id
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import responses
+
+from bigbuy import BigBuy, RateLimiter
+from bigbuy.scheduler import PriorityScheduler, endpoint_priority, PRIORITY_BULK, PRIORITY_CRITICAL, \
+    PRIORITY_NORMAL
+
+
+def test_endpoint_priority():
+    assert endpoint_priority("GET", "catalog/products") == PRIORITY_BULK
+    assert endpoint_priority("GET", "catalog/product/{id}") == PRIORITY_NORMAL
+    assert endpoint_priority("POST", "order/create") == PRIORITY_CRITICAL
+    assert endpoint_priority("GET", "tracking/order/{id}") == PRIORITY_CRITICAL
+    assert endpoint_priority("GET", "user/purse") == PRIORITY_CRITICAL
+
+
+def test_acquire():
+    scheduler = PriorityScheduler(RateLimiter(rate=1000, burst=10), bulk_headroom=0)
+    for _ in range(10):
+        assert scheduler.acquire(PRIORITY_BULK)
+    assert scheduler.dispatched == {PRIORITY_BULK: 10}
+    assert scheduler.pending() == 0
+
+
+def test_acquire_timeout():
+    scheduler = PriorityScheduler(RateLimiter(rate=0.1, burst=1))
+    assert scheduler.acquire(PRIORITY_CRITICAL)
+    assert not scheduler.acquire(PRIORITY_CRITICAL, timeout=0.05)
+    assert scheduler.pending() == 0
+
+
+def test_bulk_headroom():
+    scheduler = PriorityScheduler(RateLimiter(rate=0.1, burst=2), bulk_headroom=1)
+    assert scheduler.acquire(PRIORITY_BULK, timeout=0.01)
+    # the last token is reserved to non-bulk requests
+    assert not scheduler.acquire(PRIORITY_BULK, timeout=0.01)
+    assert scheduler.acquire(PRIORITY_CRITICAL, timeout=0.01)
+
+
+def test_bulk_headroom_default_burst():
+    # The headroom is capped at the burst of the rate-limiter, so bulk requests don't wait forever
+    scheduler = PriorityScheduler(RateLimiter(rate=100))
+    assert scheduler.acquire(PRIORITY_BULK, timeout=2)
+
+
+def test_weighted_fair_queuing():
+    scheduler = PriorityScheduler(RateLimiter(rate=200, burst=1), bulk_headroom=0)
+    order: list[str] = []
+    lock = threading.Lock()
+
+    # exhaust the bucket so that all requests queue up
+    assert scheduler.acquire(PRIORITY_CRITICAL)
+
+    def worker(priority):
+        scheduler.acquire(priority)
+        with lock:
+            order.append(priority)
+
+    threads = [threading.Thread(target=worker, args=(PRIORITY_BULK,)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    while scheduler.pending(PRIORITY_BULK) < 20:
+        time.sleep(0.001)
+
+    critical_threads = [threading.Thread(target=worker, args=(PRIORITY_CRITICAL,)) for _ in range(5)]
+    for thread in critical_threads:
+        thread.start()
+    while scheduler.pending(PRIORITY_CRITICAL) < 5 and PRIORITY_CRITICAL not in order:
+        time.sleep(0.001)
+
+    for thread in threads + critical_threads:
+        thread.join()
+
+    assert len(order) == 25
+    # all critical requests are served before the bulk requests that were queued before them
+    last_critical = max(i for i, priority in enumerate(order) if priority == PRIORITY_CRITICAL)
+    assert last_critical < 10
+
+
+def test_backpressure():
+    scheduler = PriorityScheduler(RateLimiter(rate=1, burst=1), backpressure_threshold=5)
+    assert not scheduler.is_backpressured(PRIORITY_BULK)
+
+    scheduler._pending[PRIORITY_BULK] = 10
+    assert scheduler.is_backpressured(PRIORITY_BULK)
+    # critical requests jump the queue
+    assert scheduler.estimated_wait(PRIORITY_CRITICAL) < 5
+
+
+@responses.activate()
+def test_client_scheduler(app_key):
+    scheduler = PriorityScheduler(RateLimiter(rate=1000, burst=10), bulk_headroom=0)
+    bb = BigBuy(app_key, scheduler=scheduler)
+    assert bb.rate_limiter is scheduler.rate_limiter
+
+    responses.get(bb.base_url + "/catalog/products.json", json=[])
+    responses.get(bb.base_url + "/order/1.json", json={"id": "1"})
+
+    bb.get_products()
+    bb.get_order_by_id(1)
+    bb.get_order_by_id(1, priority=PRIORITY_BULK)
+
+    assert scheduler.dispatched == {PRIORITY_BULK: 2, PRIORITY_CRITICAL: 1}
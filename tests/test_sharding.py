@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.sharding import ShardQueue, SharedRateLimiter, ClientFactory, ShardedCatalogSync, run_worker
+from bigbuy.sync import SyncTask, SyncIntegrityError
+
+TASKS = (
+    SyncTask("get_products"),
+    SyncTask("get_products_information", per_language=True),
+)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeBigBuyServer(catalog_size=95, languages=("en", "fr")) as fake_server:
+        yield fake_server
+
+
+def test_shard_queue(tmp_path, clock):
+    queue = ShardQueue(tmp_path / "queue.sqlite", max_attempts=2, clock=clock)
+    assert queue.add("products", "get_products", {}, 0, 10)
+    assert not queue.add("products", "get_products", {}, 0, 10)
+    assert queue.add("products", "get_products", {}, 10, 20)
+
+    shard = queue.lease("w1", 60)
+    assert shard is not None
+    assert (shard.task, shard.start_page, shard.end_page, shard.attempts) == ("products", 0, 10, 1)
+
+    other = queue.lease("w2", 60)
+    assert other is not None and other.start_page == 10
+    assert queue.lease("w2", 60) is None
+    assert not queue.finished
+
+    # w1 dies: its shard is leased again once the lease expires
+    clock.now += 61
+    assert not queue.renew(shard, "w2", 60)
+    retried = queue.lease("w2", 60)
+    assert retried is not None and retried.id == shard.id and retried.attempts == 2
+    assert not queue.complete(shard, "w1", None)
+    assert queue.complete(retried, "w2", 5)
+
+    queue.release(other, "w2", "BBServerError()")
+    assert queue.counts() == {"done": 1, "pending": 1}
+    other = queue.lease("w2", 60)
+    assert other is not None
+    queue.release(other, "w2", "BBServerError()")
+    assert queue.counts() == {"done": 1, "failed": 1}
+    assert queue.finished
+
+
+def test_shared_rate_limiter(tmp_path, clock):
+    path = tmp_path / "queue.sqlite"
+    ShardQueue(path)
+    limiter1 = SharedRateLimiter(path, rate=1, burst=2, clock=clock)
+    limiter2 = SharedRateLimiter(path, rate=1, burst=2, clock=clock)
+
+    assert limiter1.try_acquire()
+    assert limiter2.try_acquire()
+    assert not limiter1.try_acquire()
+    assert limiter2.time_until_available() == 1
+
+    clock.now += 1
+    assert limiter2.available_tokens == 1
+    limiter1.pause_until(clock.now + 10)
+    assert not limiter2.try_acquire()
+    assert limiter2.time_until_available() == 10
+    assert not limiter2.acquire(timeout=1)
+
+
+def test_shared_rate_limiter_more_than_burst(tmp_path):
+    path = tmp_path / "queue.sqlite"
+    ShardQueue(path)
+    limiter = SharedRateLimiter(path, rate=100, burst=2)
+    assert limiter.acquire(2)
+    for method in (limiter.acquire, limiter.try_acquire, limiter.time_until_available):
+        with pytest.raises(ValueError):
+            method(3)
+
+
+def test_run_worker(server, tmp_path):
+    sync = ShardedCatalogSync(tmp_path, ClientFactory("key", base_url=server.base_url), tasks=TASKS,
+                              languages=["en"], page_size=20, pages_per_shard=2)
+    assert sync.plan() == 2
+
+    # a dead worker holds a shard until its lease expires
+    assert sync.queue.lease("dead", 0.2) is not None
+    assert run_worker(tmp_path, sync.client_factory, page_size=20, poll_interval=0.05) == 6
+
+    job = sync.merge()
+    assert job.verify() == {"products": 95, "products_information.en": 95}
+    assert list(job.iter_records("products")) == server.client().get_products()
+
+
+def test_run(server, tmp_path):
+    sync = ShardedCatalogSync(tmp_path, ClientFactory("key", base_url=server.base_url), tasks=TASKS,
+                              page_size=10, pages_per_shard=3, initial_shards=4, rate=1000, burst=10)
+    job = sync.run(processes=2)
+
+    assert sync.languages == ["en", "fr"]
+    assert job.verify() == {"products": 95, "products_information.en": 95, "products_information.fr": 95}
+    # pages fetched after the last page are removed
+    assert sorted(p.name for p in (tmp_path / "products").iterdir()) == [f"{i:06d}.json" for i in range(10)]
+
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["tasks"]["products"]["next_page"] == 10
+
+
+def broken_client_factory(rate_limiter):
+    raise RuntimeError("broken client factory")
+
+
+def test_run_worker_errors(tmp_path):
+    sync = ShardedCatalogSync(tmp_path, broken_client_factory, tasks=TASKS[:1], page_size=20)
+    with pytest.raises(RuntimeError, match="broken client factory"):
+        sync.run(processes=2)
+
+
+def test_merge_incomplete(server, tmp_path):
+    sync = ShardedCatalogSync(tmp_path, ClientFactory("key", base_url=server.base_url), tasks=TASKS[:1],
+                              page_size=20)
+    sync.plan()
+    with pytest.raises(SyncIntegrityError) as exc_info:
+        sync.merge()
+    assert exc_info.value.problems[0] == "products: pages 0-9 are pending"
@@ -0,0 +1,83 @@
+import pytest
+
+from bigbuy.exceptions import BBServerError
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.skus import SkuResolver, SkuMatch
+
+
+def test_resolve_from_index():
+    resolver = SkuResolver()
+    resolver.load([{"id": 1, "sku": "S1"}, {"id": 2, "sku": "S2"}], [{"id": 10, "sku": "V10", "product": 2}])
+    assert len(resolver) == 3
+    assert "S1" in resolver
+    assert " V10 " in resolver
+
+    assert resolver.resolve("S1") == SkuMatch("S1", 1, 1, False, {"id": 1, "sku": "S1"})
+    matches = resolver.resolve_many(["V10", " S2", "X"])
+    assert matches["V10"] is not None and matches["V10"][:4] == ("V10", 10, 2, True)
+    assert matches[" S2"] is not None and matches[" S2"].id == 2
+    assert matches["X"] is None
+    assert resolver.missing(["S1", "X", "Y"]) == ["X", "Y"]
+
+
+def test_resolve_large_order_without_requests():
+    with FakeBigBuyServer(catalog_size=1000) as server:
+        client = server.client()
+        resolver = SkuResolver.from_client(client)
+        assert server.request_count == 2
+
+        skus = [record["sku"] for record in server.catalog.products[:400]] + \
+               [record["sku"] for record in server.catalog.variations[:100]]
+        matches = resolver.resolve_many(skus)
+        assert all(match is not None for match in matches.values())
+        assert server.request_count == 2
+
+
+def test_fetch_misses():
+    with FakeBigBuyServer(catalog_size=20) as server:
+        client = server.client()
+        resolver = SkuResolver(client)
+        resolver.load(client.get_products()[:10])
+        product_sku = server.catalog.products[15]["sku"]
+        skus = [server.catalog.products[0]["sku"], product_sku, "UNKNOWN1", "UNKNOWN2"]
+
+        path = "catalog/productinformationbysku"
+        matches = resolver.resolve_many(skus)
+        assert sum(count for p, count in server.requests_by_path.items() if p.startswith(path)) == 3
+        match = matches[product_sku]
+        assert match is not None
+        assert match.product_id == server.catalog.products[15]["id"]
+        assert match.is_variation is None
+        assert matches["UNKNOWN1"] is None
+        assert matches["UNKNOWN2"] is None
+
+        # Found SKUs are added to the index and missing SKUs are cached
+        request_count = server.request_count
+        assert resolver.missing(skus) == ["UNKNOWN1", "UNKNOWN2"]
+        assert server.request_count == request_count
+
+        resolver.forget(["UNKNOWN1"])
+        assert resolver.missing(skus) == ["UNKNOWN1", "UNKNOWN2"]
+        assert server.request_count == request_count + 1
+
+
+def test_negative_ttl():
+    with FakeBigBuyServer(catalog_size=5) as server:
+        resolver = SkuResolver(server.client(), negative_ttl=0)
+        assert resolver.resolve("UNKNOWN") is None
+        assert resolver.resolve("UNKNOWN") is None
+        assert server.request_count == 2
+
+
+def test_errors_are_raised():
+    with FakeBigBuyServer(catalog_size=5, error_rate=1) as server:
+        resolver = SkuResolver(server.client(max_retries=0))
+        with pytest.raises(BBServerError):
+            resolver.resolve("UNKNOWN")
+        # The SKU is not cached as missing
+        assert resolver._not_found == {}
+
+
+def test_refresh_without_client():
+    with pytest.raises(ValueError):
+        SkuResolver().refresh()
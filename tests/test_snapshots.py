@@ -0,0 +1,130 @@
+import builtins
+import os
+
+import pytest
+
+from bigbuy.snapshots import SnapshotStore, SnapshotFile, write_snapshot_file
+
+
+def products(n, price=10.0):
+    return [{"id": 100 + i, "sku": f"S{100 + i}", "retailPrice": price} for i in range(n)]
+
+
+def test_snapshot_file(tmp_path):
+    path = str(tmp_path / "test.snap")
+    assert write_snapshot_file(path, products(25), block_size=10) == 25
+
+    with SnapshotFile(path) as file:
+        assert len(file) == 25
+        assert len(file.blocks) == 3
+        assert file.get(100) == products(25)[0]
+        assert file.get(124)["sku"] == "S124"
+        assert file.get(99) is None
+        assert file.get(125) is None
+        assert list(file) == products(25)
+
+    (tmp_path / "bad.snap").write_bytes(b"foo")
+    with pytest.raises(ValueError):
+        SnapshotFile(tmp_path / "bad.snap")
+
+
+def test_store_deltas(tmp_path):
+    store = SnapshotStore(tmp_path, block_size=10, full_every=3)
+
+    v1 = products(30)
+    snapshot = store.write("2026-10-01", reversed(v1))
+    assert not snapshot.is_delta
+    assert list(snapshot) == v1
+    snapshot.close()
+
+    v2 = products(30)
+    v2[5]["retailPrice"] = 12.0
+    del v2[10]
+    v2.append({"id": 200, "sku": "S200", "retailPrice": 1.0})
+    snapshot = store.write("2026-10-02", v2)
+    assert snapshot.is_delta
+    assert len(snapshot.file) == 2
+    assert snapshot.deleted == {110}
+    assert len(snapshot) == 30
+    assert list(snapshot) == v2
+    assert snapshot.get(105)["retailPrice"] == 12.0
+    assert snapshot.get(110) is None
+    assert snapshot.get(111) == v2[10]
+    snapshot.close()
+
+    # too many changes for a delta
+    snapshot = store.write("2026-10-03", products(30, price=20.0))
+    assert not snapshot.is_delta
+    snapshot.close()
+
+    for version in ("2026-10-04", "2026-10-05", "2026-10-06"):
+        store.write(version, products(30, price=20.0)).close()
+    kinds = []
+    for version in store.versions():
+        snapshot = store.open(version)
+        kinds.append(snapshot.is_delta)
+        snapshot.close()
+    assert kinds == [False, True, False, True, True, False]
+
+
+def test_files_closed_on_errors(tmp_path, monkeypatch):
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        file = builtins.open(*args, **kwargs)
+        opened.append(file)
+        return file
+
+    monkeypatch.setattr("bigbuy.snapshots.open", tracking_open, raising=False)
+
+    # invalid footer
+    path = tmp_path / "corrupted.snap"
+    write_snapshot_file(path, products(5))
+    data = path.read_bytes()
+    # the footer is JSON followed by its length on 8 bytes
+    path.write_bytes(data[:-9] + b"x" + data[-8:])
+    with pytest.raises(ValueError):
+        SnapshotFile(path)
+
+    # missing base snapshot
+    store = SnapshotStore(tmp_path / "store", full_every=3)
+    store.write("2026-10-01", products(30)).close()
+    store.write("2026-10-02", products(31)).close()
+    os.remove(tmp_path / "store" / "2026-10-01.snap")
+    with pytest.raises(FileNotFoundError):
+        store.open("2026-10-02")
+
+    assert opened and all(file.closed for file in opened)
+
+
+def test_store_point_in_time(tmp_path):
+    store = SnapshotStore(tmp_path, block_size=10)
+    store.write("2026-10-01", products(20)).close()
+    store.write("2026-10-03", products(20, price=11.0)[:1] + products(20)[1:]).close()
+
+    assert store.versions() == ["2026-10-01", "2026-10-03"]
+    assert store.get(100, at="2026-09-30") is None
+    assert store.get(100, at="2026-10-02")["retailPrice"] == 10.0
+    assert store.get(100, at="2026-10-03")["retailPrice"] == 11.0
+    assert store.get(100)["retailPrice"] == 11.0
+
+
+def test_store_invalid_versions(tmp_path):
+    store = SnapshotStore(tmp_path)
+    with pytest.raises(LookupError):
+        store.open()
+    with pytest.raises(ValueError):
+        store.write("../foo", [])
+    store.write("2", []).close()
+    with pytest.raises(ValueError):
+        store.write("1", [])
+    with pytest.raises(ValueError):
+        SnapshotStore(tmp_path, codec="foo")
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_codecs(tmp_path, codec):
+    store = SnapshotStore(tmp_path, codec=codec)
+    snapshot = store.write("1", products(10))
+    assert list(snapshot) == products(10)
+    snapshot.close()
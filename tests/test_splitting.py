@@ -0,0 +1,102 @@
+import itertools
+
+from bigbuy.exceptions import BBWarehouseSplitError
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.responses import ResponseView
+from bigbuy.splitting import WarehouseSplitPlanner
+
+_references = itertools.count()
+
+
+def make_order(products):
+    return {
+        "internalReference": f"test-{next(_references)}",
+        "language": "es",
+        "paymentMethod": "moneybox",
+        "carriers": [{"name": "chrono"}],
+        "shippingAddress": {"firstName": "John", "lastName": "Doe", "country": "ES", "postcode": "46005",
+                            "town": "Valencia", "address": "C/ Altea", "phone": "664869570",
+                            "email": "john@email.com", "comment": ""},
+        "products": [{"reference": reference, "quantity": quantity} for reference, quantity in products],
+    }
+
+
+def make_planner():
+    planner = WarehouseSplitPlanner()
+    planner.update_stocks([
+        {"id": 1, "sku": "A", "stocks": [{"quantity": 5, "minHandlingDays": 1, "maxHandlingDays": 2, "warehouse": 1}]},
+        {"id": 2, "sku": "B", "stocks": [{"quantity": 5, "minHandlingDays": 1, "maxHandlingDays": 2, "warehouse": 3}]},
+        {"id": 3, "sku": "C", "stocks": [
+            {"quantity": 3, "minHandlingDays": 1, "maxHandlingDays": 2, "warehouse": 1},
+            {"quantity": 8, "minHandlingDays": 3, "maxHandlingDays": 5, "warehouse": 3}]},
+    ])
+    return planner
+
+
+def test_plan():
+    planner = make_planner()
+
+    plan = planner.plan(make_order([("A", 1), ("C", 1), ("X", 1)]))
+    assert not plan.multi_shipping
+    assert plan.references == {1: ["A", "C"]}
+    assert plan.unassigned == [{"reference": "X", "quantity": 1}]
+
+    plan = planner.plan(make_order([("A", 1), ("B", 1), ("C", 1)]))
+    assert plan.multi_shipping
+    assert plan.groups == {1: [{"reference": "A", "quantity": 1}, {"reference": "C", "quantity": 1}],
+                           3: [{"reference": "B", "quantity": 1}]}
+
+
+def test_plan_many_reserve():
+    planner = make_planner()
+    orders = [make_order([("A", 1), ("C", 2)]), make_order([("A", 1), ("C", 2)])]
+
+    assert [plan.references for plan in planner.plan_many(orders)] == [{1: ["A", "C"]}, {1: ["A", "C"]}]
+    # After the first order, warehouse 1 only has 1 C left
+    assert [plan.references for plan in planner.plan_many(orders, reserve=True)] == [
+        {1: ["A", "C"]}, {1: ["A"], 3: ["C"]}]
+    assert planner.stocks["C"] == {1: 3, 3: 8}
+
+
+def test_learn():
+    planner = make_planner()
+    planner.learn(BBWarehouseSplitError("split", ResponseView(409), warehouses=[
+        {"id": 1, "references": ["A"]}, {"id": 3, "references": ["C", "X"]}]))
+    plan = planner.plan(make_order([("A", 1), ("C", 1), ("X", 1)]))
+    assert plan.references == {1: ["A"], 3: ["C", "X"]}
+    assert not plan.unassigned
+
+
+def test_create_and_check():
+    with FakeBigBuyServer(catalog_size=100) as server:
+        client = server.client()
+        planner = WarehouseSplitPlanner.from_client(client)
+        in_stock = [sku for sku, stocks in planner.stocks.items() if sum(stocks.values()) >= 1]
+        warehouse_3 = [sku for sku in in_stock if 3 in planner.stocks[sku]]
+        warehouse_1 = [sku for sku in in_stock if 1 in planner.stocks[sku]]
+
+        split_order = make_order([(warehouse_1[0], 1), (warehouse_3[0], 1)])
+        assert planner.plan(split_order).multi_shipping
+        result = planner.check(client, split_order)
+        assert "orders" in result
+        assert len(planner.create(client, split_order)) == 2
+        assert server.requests_by_path.get("order/create", 0) == 0
+
+        order = make_order([(warehouse_1[0], 1), (warehouse_1[1], 1)])
+        assert len(planner.create(client, order)) == 1
+        assert server.requests_by_path.get("order/create/multishipping") == 1
+
+
+def test_create_learns_split():
+    with FakeBigBuyServer(catalog_size=100) as server:
+        client = server.client()
+        stocks = WarehouseSplitPlanner.from_client(client).stocks
+        warehouse_3 = [sku for sku, stock in stocks.items() if stock.get(3, 0) >= 1]
+        warehouse_1 = [sku for sku, stock in stocks.items() if stock.get(1, 0) >= 1]
+
+        # Without stocks, the split is learned from the error of create_order
+        planner = WarehouseSplitPlanner()
+        order = make_order([(warehouse_1[0], 1), (warehouse_3[0], 1)])
+        assert len(planner.create(client, order)) == 2
+        assert planner.known_warehouses == {warehouse_1[0]: 1, warehouse_3[0]: 3}
+        assert planner.plan(order).multi_shipping
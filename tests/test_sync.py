@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.sync import CatalogSyncJob, SyncTask, SyncIntegrityError
+
+TASKS = (
+    SyncTask("get_products"),
+    SyncTask("get_products_information", per_language=True),
+)
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeBigBuyServer(catalog_size=45, languages=("en", "fr")) as fake_server:
+        yield fake_server
+
+
+def count_requests(client):
+    paths = []
+    client.add_hook("before_request", lambda **kwargs: paths.append(kwargs["endpoint"]))
+    return paths
+
+
+def test_sync_task_expand():
+    assert SyncTask("get_products").expand(["en"]) == [("products", {})]
+    assert SyncTask("get_products_information", per_language=True, params={"a": 1}).expand(["en", "fr"]) == [
+        ("products_information.en", {"a": 1, "isoCode": "en"}),
+        ("products_information.fr", {"a": 1, "isoCode": "fr"}),
+    ]
+
+
+def test_run(server, tmp_path):
+    client = server.client()
+    pages = []
+    job = CatalogSyncJob(client, tmp_path, tasks=TASKS, page_size=20,
+                         on_page=lambda name, page, count: pages.append((name, page, count)))
+    assert job.run() == {"products": 45, "products_information.en": 45, "products_information.fr": 45}
+
+    assert job.completed
+    assert job.verify() == {"products": 45, "products_information.en": 45, "products_information.fr": 45}
+    assert pages[:3] == [("products", 0, 20), ("products", 1, 20), ("products", 2, 5)]
+    assert list(job.iter_records("products")) == client.get_products()
+
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["languages"] == ["en", "fr"]
+
+    # running a completed job again doesn't send any request
+    requests = count_requests(client)
+    CatalogSyncJob(client, tmp_path, tasks=TASKS, page_size=20).run()
+    assert requests == []
+
+
+def test_resume(server, tmp_path):
+    client = server.client()
+    requests = count_requests(client)
+
+    def crash(**kwargs):
+        if len(requests) == 5:
+            raise Crash()
+
+    client.add_hook("before_request", crash)
+    with pytest.raises(Crash):
+        CatalogSyncJob(client, tmp_path, tasks=TASKS, page_size=20).run()
+    client.remove_hook("before_request", crash)
+
+    job = CatalogSyncJob(client, tmp_path, tasks=TASKS, page_size=20)
+    assert not job.completed
+    job.run()
+    assert job.verify()["products_information.en"] == 45
+
+    # 1 request for the languages + 3 pages for each of the 3 tasks, the crashed request being sent again
+    assert len(requests) == 1 + 9 + 1
+    assert not any(name.startswith(".tmp-") for _, _, names in os.walk(tmp_path) for name in names)
+
+
+def test_page_size_mismatch(server, tmp_path):
+    CatalogSyncJob(server.client(), tmp_path, tasks=TASKS[:1], page_size=20).run()
+    with pytest.raises(ValueError):
+        CatalogSyncJob(server.client(), tmp_path, tasks=TASKS[:1], page_size=50)
+
+
+def test_verify(server, tmp_path):
+    job = CatalogSyncJob(server.client(), tmp_path, tasks=TASKS, languages=["en"], page_size=20)
+    with pytest.raises(SyncIntegrityError):
+        job.verify()
+
+    job.run()
+    (tmp_path / "products" / "000001.json").write_text("[]")
+    os.unlink(tmp_path / "products_information.en" / "000000.json")
+
+    with pytest.raises(SyncIntegrityError) as exc_info:
+        job.verify()
+    assert exc_info.value.problems == [
+        "products: page 1 doesn't match its checksum",
+        "products_information.en: page 0 is missing",
+    ]
+
+
+def test_run_verifies_resumed_job(server, tmp_path):
+    client = server.client()
+    requests = count_requests(client)
+
+    def crash(**kwargs):
+        if len(requests) == 3:
+            raise Crash()
+
+    client.add_hook("before_request", crash)
+    with pytest.raises(Crash):
+        CatalogSyncJob(client, tmp_path, tasks=TASKS[:1], page_size=20).run()
+    client.remove_hook("before_request", crash)
+
+    # a page completed before the crash is corrupted: the resumed job must not report success
+    (tmp_path / "products" / "000000.json").write_text("[]")
+    job = CatalogSyncJob(client, tmp_path, tasks=TASKS[:1], page_size=20)
+    with pytest.raises(SyncIntegrityError) as exc_info:
+        job.run()
+    assert exc_info.value.problems == ["products: page 0 doesn't match its checksum"]
+    assert "completed_at" not in job.state
@@ -0,0 +1,91 @@
+import pytest
+
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.taxonomy import TaxonomyIndex
+
+
+def taxonomy(taxonomy_id, parent, name, iso_code="en"):
+    return {"id": taxonomy_id, "parentTaxonomy": parent, "name": name, "url": name.lower(), "isoCode": iso_code}
+
+
+TAXONOMIES = [
+    taxonomy(1, 0, "Home"),
+    taxonomy(2, 1, "Kitchen"),
+    taxonomy(3, 2, "Knives"),
+    taxonomy(4, 1, "Garden"),
+    taxonomy(5, 0, "Sports"),
+    taxonomy(1, 0, "Maison", "fr"),
+    taxonomy(2, 1, "Cuisine", "fr"),
+    taxonomy(3, 2, "Couteaux", "fr"),
+]
+
+LINKS = [
+    {"id": 3, "taxonomy": 3, "product": 100},
+    {"id": 4, "taxonomy": 4, "product": 101},
+    {"id": 2, "taxonomy": 2, "product": 100},
+    {"id": 5, "taxonomy": 5, "product": 102},
+    {"id": 99, "taxonomy": 99, "product": 103},
+]
+
+
+@pytest.fixture
+def index():
+    return TaxonomyIndex(TAXONOMIES, LINKS)
+
+
+def test_tree(index):
+    assert len(index) == 5
+    assert index.roots == [1, 5]
+    assert index.languages == ["en", "fr"]
+    assert index.ancestors(3) == (1, 2)
+    assert index.path(3) == (1, 2, 3)
+    assert index.depth(3) == 2
+    assert index.descendants(1) == [1, 2, 3, 4]
+    assert index.descendants(1, include_self=False) == [2, 3, 4]
+    assert 99 not in index
+
+
+def test_breadcrumb(index):
+    assert index.breadcrumb(3) == ["Home", "Kitchen", "Knives"]
+    assert index.breadcrumb(3, "fr") == ["Maison", "Cuisine", "Couteaux"]
+    assert index.breadcrumb(4, "fr") == ["Maison", ""]
+    assert index.name(5) == "Sports"
+    with pytest.raises(KeyError):
+        index.breadcrumb(3, "de")
+
+
+def test_is_ancestor(index):
+    assert index.is_ancestor(1, 3)
+    assert index.is_ancestor(3, 3)
+    assert not index.is_ancestor(3, 1)
+    assert not index.is_ancestor(4, 3)
+    assert not index.is_ancestor(5, 3)
+    assert not index.is_ancestor(99, 3)
+
+
+def test_products_under(index):
+    assert index.products_under(1) == [100, 101]
+    assert index.count_products_under(1) == 3
+    assert index.products_under(2) == [100]
+    assert index.products_under(4) == [101]
+    assert index.products_under(5) == [102]
+    assert index.product_taxonomies[100] == [2, 3]
+
+
+def test_cycle():
+    index = TaxonomyIndex([taxonomy(1, 2, "A"), taxonomy(2, 1, "B"), taxonomy(3, 0, "C")])
+    assert len(index) == 3
+    assert index.is_ancestor(1, 2) != index.is_ancestor(2, 1)
+
+
+def test_from_client():
+    with FakeBigBuyServer(catalog_size=30, languages=("en", "fr")) as server:
+        index = TaxonomyIndex.from_client(server.client())
+
+    assert len(index) == 50
+    assert index.languages == ["en", "fr"]
+    products = index.products_under(index.roots[0])
+    for product in server.catalog.products:
+        if product["id"] in products:
+            assert index.is_ancestor(index.roots[0], product["taxonomy"])
+    assert sum(len(index.products_under(root)) for root in index.roots) == 30
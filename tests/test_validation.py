@@ -0,0 +1,115 @@
+from typing import Any
+
+import pytest
+
+from bigbuy.exceptions import BBOrderValidationError
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.skus import SkuResolver
+from bigbuy.validation import OrderValidator, OrderIssue, predict_warehouses, PRODUCT_NOT_FOUND, STOCK, POSTCODE, \
+    NO_CARRIER, INVALID_QUANTITY, WAREHOUSE_SPLIT
+
+
+def make_validator():
+    skus = SkuResolver()
+    skus.load([{"id": 1, "sku": "S1"}, {"id": 2, "sku": "S2"}, {"id": 3, "sku": "S3"}],
+              [{"id": 10, "sku": "V10", "product": 3}])
+    validator = OrderValidator(skus)
+    validator.update_stocks([
+        {"id": 1, "sku": "S1", "stocks": [{"quantity": 5, "minHandlingDays": 1, "maxHandlingDays": 2, "warehouse": 1}]},
+        {"id": 2, "sku": "S2", "stocks": [{"quantity": 5, "minHandlingDays": 1, "maxHandlingDays": 2, "warehouse": 3}]},
+        {"id": 10, "sku": "V10", "stocks": [
+            {"quantity": 2, "minHandlingDays": 1, "maxHandlingDays": 2, "warehouse": 1},
+            {"quantity": 8, "minHandlingDays": 3, "maxHandlingDays": 5, "warehouse": 3}]},
+    ])
+    validator.update_carriers([{"id": "43", "name": "Chrono", "shippingServices": []}])
+    validator.update_shipping_costs("es", [{"reference": "S1", "cost": "4"}, {"reference": "S2", "cost": None}])
+    return validator
+
+
+def make_order(products, country="ES", postcode="46005", carriers=("chrono",)):
+    return {
+        "internalReference": "123456",
+        "language": "es",
+        "paymentMethod": "moneybox",
+        "carriers": [{"name": name} for name in carriers],
+        "shippingAddress": {"firstName": "John", "lastName": "Doe", "country": country, "postcode": postcode,
+                            "town": "Valencia", "address": "C/ Altea", "phone": "664869570",
+                            "email": "john@email.com", "comment": ""},
+        "products": [{"reference": reference, "quantity": quantity} for reference, quantity in products],
+    }
+
+
+def test_predict_warehouses():
+    stocks = {"A": {1: 5}, "B": {1: 1, 3: 10}, "C": {3: 10}}
+    assert predict_warehouses([("A", 1), ("B", 1)], stocks) == {1: ["A", "B"]}
+    assert predict_warehouses([("B", 1), ("C", 1)], stocks) == {3: ["B", "C"]}
+    assert predict_warehouses([("A", 1), ("B", 5)], stocks) == {1: ["A"], 3: ["B"]}
+    assert predict_warehouses([("A", 10), ("X", 1)], stocks) == {1: ["A"]}
+
+
+def test_valid_order():
+    validation = make_validator().validate(make_order([("S1", 2), ("V10", 1)]))
+    assert validation.ok
+    assert not validation.split
+    assert validation.issues == []
+    assert validation.warehouses == {1: ["S1", "V10"]}
+
+
+def test_issues():
+    validator = make_validator()
+    validation = validator.validate(make_order([("S1", 6), ("UNKNOWN", 1), ("S3", 1), ("V10", 0)], postcode="4600",
+                                               carriers=("chrono", "ups")))
+    assert not validation.ok
+    assert [issue.code for issue in validation.issues] == [INVALID_QUANTITY, PRODUCT_NOT_FOUND, STOCK, STOCK, POSTCODE,
+                                                           NO_CARRIER]
+    assert validation.issues[1] == OrderIssue(PRODUCT_NOT_FOUND, "Product not found: UNKNOWN", ("UNKNOWN",))
+    assert validation.issues[2].references == ("S1",)
+    # S3 has no stock record
+    assert validation.issues[3].references == ("S3",)
+
+    validation = validator.validate(make_order([("S2", 1)], postcode=""))
+    assert [(issue.code, issue.references) for issue in validation.errors] == [(POSTCODE, ()), (NO_CARRIER, ("S2",))]
+
+    # Postcodes of unknown countries are not checked, nor the shipping costs of countries that are not loaded
+    assert validator.validate(make_order([("S2", 1)], country="ZZ", postcode="A1")).ok
+
+
+def test_warehouse_split():
+    validation = make_validator().validate(make_order([("S1", 1), ("V10", 5)]))
+    assert validation.ok
+    assert validation.split
+    assert validation.warehouses == {1: ["S1"], 3: ["V10"]}
+    assert [issue.code for issue in validation.issues] == [WAREHOUSE_SPLIT]
+    assert not validation.issues[0].blocking
+
+
+def test_check_without_request():
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        validator = OrderValidator.from_client(client, countries=["ES"])
+        request_count = server.request_count
+
+        with pytest.raises(BBOrderValidationError) as exc_info:
+            validator.check(make_order([(server.catalog.products[0]["sku"], 1)], postcode=""))
+        assert exc_info.value.validation.errors[0].code == POSTCODE
+        assert server.request_count == request_count
+
+
+def test_predictions_match_check_order():
+    with FakeBigBuyServer(catalog_size=50) as server:
+        client = server.client()
+        validator = OrderValidator.from_client(client, countries=["ES"])
+        stocks = validator.stocks
+        assert stocks is not None
+        in_stock = [record["sku"] for record in server.catalog.products + server.catalog.variations
+                    if sum(stocks.get(record["sku"], {}).values()) > 0]
+
+        for start in range(0, 20, 4):
+            order = make_order([(sku, 1) for sku in in_stock[start:start + 4]])
+            validation = validator.validate(order)
+            assert validation.ok
+            result: Any = validator.check(order)
+            if validation.split:
+                assert {o["warehouse"]: o["productReferences"] for o in result["orders"]} == validation.warehouses
+            else:
+                assert "total" in result
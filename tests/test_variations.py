@@ -0,0 +1,94 @@
+from bigbuy.fake_server import FakeBigBuyServer
+from bigbuy.variations import VariationResolver
+
+VARIATIONS = [
+    {"id": 1000, "attributes": [{"id": 11}, {"id": 21}]},
+    {"id": 1001, "attributes": [{"id": 12}]},
+]
+ATTRIBUTES = {
+    "en": [{"id": 11, "attributeGroup": 1, "name": "Red"}, {"id": 12, "attributeGroup": 1, "name": "Blue"},
+           {"id": 21, "attributeGroup": 2, "name": "XL"}],
+    "fr": [{"id": 11, "attributeGroup": 1, "name": "Rouge"}, {"id": 12, "attributeGroup": 1, "name": "Bleu"},
+           {"id": 21, "attributeGroup": 2, "name": "XL"}],
+}
+GROUPS = {
+    "en": [{"id": 1, "name": "Color"}, {"id": 2, "name": "Size"}],
+    "fr": [{"id": 1, "name": "Couleur"}, {"id": 2, "name": "Taille"}],
+}
+
+
+def make_resolver():
+    resolver = VariationResolver(["en", "fr"])
+    resolver.update_variations(VARIATIONS)
+    for iso_code in ("en", "fr"):
+        resolver.update_attributes(ATTRIBUTES[iso_code], iso_code)
+        resolver.update_attribute_groups(GROUPS[iso_code], iso_code)
+    return resolver
+
+
+def test_resolve():
+    resolver = make_resolver()
+    assert len(resolver) == 2
+    assert resolver.resolve(1000) == {"Color": "Red", "Size": "XL"}
+    assert resolver.resolve(1000, "fr") == {"Couleur": "Rouge", "Taille": "XL"}
+    assert resolver.resolve(9999) is None
+    assert resolver.resolve(1000, "de") == {}
+    assert resolver.resolve_many([1000, 1001, 9999], "fr") == {
+        1000: {"Couleur": "Rouge", "Taille": "XL"},
+        1001: {"Couleur": "Bleu"},
+    }
+
+
+def test_incremental_updates():
+    resolver = make_resolver()
+    resolver.resolve_many([1000, 1001])
+
+    assert resolver.update_variations(VARIATIONS) == set()
+    assert resolver.update_attributes(ATTRIBUTES["en"], "en") == set()
+    assert resolver.update_attribute_groups(GROUPS["en"], "en") == set()
+
+    assert resolver.update_attributes([{"id": 12, "attributeGroup": 1, "name": "Navy"}], "en") == {1001}
+    assert resolver.resolve(1001) == {"Color": "Navy"}
+    assert resolver.resolve(1001, "fr") == {"Couleur": "Bleu"}
+
+    assert resolver.update_attribute_groups([{"id": 2, "name": "Taille EU"}], "fr") == {1000}
+    assert resolver.resolve(1000, "fr") == {"Couleur": "Rouge", "Taille EU": "XL"}
+
+    assert resolver.update_variations([{"id": 1001, "attributes": [{"id": 11}]}], complete=False) == {1001}
+    assert resolver.resolve(1001) == {"Color": "Red"}
+    assert resolver.update_attributes([{"id": 11, "attributeGroup": 1, "name": "Crimson"}], "en") == {1000, 1001}
+
+    assert resolver.update_variations([VARIATIONS[0]]) == {1001}
+    assert resolver.resolve(1001) is None
+
+
+def test_complete_updates():
+    resolver = make_resolver()
+    resolver.resolve_many([1000, 1001])
+
+    # Attribute 12 and group 2 were deleted
+    assert resolver.update_attributes([a for a in ATTRIBUTES["en"] if a["id"] != 12], "en", complete=True) == {1001}
+    assert 12 not in resolver.attribute_names["en"]
+    assert resolver.resolve(1001) == {}
+    assert resolver.update_attribute_groups(GROUPS["en"][:1], "en", complete=True) == {1000}
+    assert resolver.resolve(1000) == {"Color": "Red"}
+    assert resolver.resolve(1000, "fr") == {"Couleur": "Rouge", "Taille": "XL"}
+
+
+def test_resolve_returns_copies():
+    resolver = make_resolver()
+    resolved = resolver.resolve(1000)
+    assert resolved is not None
+    resolved["Color"] = "Green"
+    assert resolver.resolve(1000) == {"Color": "Red", "Size": "XL"}
+
+
+def test_from_client():
+    with FakeBigBuyServer(catalog_size=20, languages=("en", "fr")) as server:
+        client = server.client()
+        resolver = VariationResolver.from_client(client)
+        assert resolver.refresh(client) == set()
+
+    variation = server.catalog.variations[0]
+    resolved = resolver.resolve(variation["id"], "fr")
+    assert resolved is not None and len(resolved) == len(variation["_attributes"])